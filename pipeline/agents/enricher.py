@@ -13,14 +13,14 @@ from typing import Any
 def create_enricher(llm: Any):
     try:
         from crewai import Agent  # type: ignore
-        from crewai_tools import TavilySearchTool, ScrapeWebsiteTool  # type: ignore
+        from pipeline.agents.tools import create_scrape_tool, create_search_tool
     except Exception as e:  # pragma: no cover
         raise RuntimeError(
             "Missing dependencies. Install from pipeline/requirements.txt"
         ) from e
 
-    tavily = TavilySearchTool()
-    scraper = ScrapeWebsiteTool()
+    tavily = create_search_tool()
+    scraper = create_scrape_tool()
 
     return Agent(
         role="Company Profile Enricher",
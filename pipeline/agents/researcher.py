@@ -11,13 +11,13 @@ from typing import Any
 def create_researcher(llm: Any):
     try:
         from crewai import Agent  # type: ignore
-        from crewai_tools import TavilySearchTool  # type: ignore
+        from pipeline.agents.tools import create_search_tool
     except Exception as e:  # pragma: no cover
         raise RuntimeError(
             "Missing dependencies. Install 'crewai' and 'crewai-tools' from pipeline/requirements.txt"
         ) from e
 
-    tavily_tool = TavilySearchTool()
+    tavily_tool = create_search_tool()
 
     return Agent(
         role="Expert Climate Tech Investment Researcher",
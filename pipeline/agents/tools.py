@@ -0,0 +1,64 @@
+"""Shared tool factories for agents.
+
+`create_scrape_tool()` returns a `ScrapeWebsiteTool` whose downloads go through the
+on-disk HTTP cache, so the pipeline, enrichment and seeding reuse each other's pages.
+
+`create_search_tool()` returns a `TavilySearchTool` that waits for a slot in the shared
+`tavily` rate-limit bucket (see `pipeline/utils/rate_limit.py`) before each query.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Any
+
+from bs4 import BeautifulSoup  # type: ignore
+from crewai_tools import ScrapeWebsiteTool, TavilySearchTool  # type: ignore
+
+from pipeline.utils.http_cache import cached_get
+from pipeline.utils.rate_limit import throttle
+from pipeline.utils.spans import span
+
+
+class CachedScrapeWebsiteTool(ScrapeWebsiteTool):
+    """Drop-in `ScrapeWebsiteTool` that fetches through `http_cache.cached_get`."""
+
+    def _run(self, **kwargs: Any) -> Any:
+        website_url = kwargs.get("website_url", self.website_url)
+        with span("tool.scrape", url=website_url) as s:
+            page = cached_get(
+                website_url,
+                headers=self.headers,
+                cookies=self.cookies if self.cookies else {},
+                timeout=15,
+            )
+            s.set(status=page.status, cached=page.from_cache)
+            parsed = BeautifulSoup(page.text, "html.parser")
+
+            text = "The following text is scraped website content:\n\n"
+            text += parsed.get_text(" ")
+            text = re.sub("[ \t]+", " ", text)
+            text = re.sub("\\s+\n\\s+", "\n", text)
+            return text
+
+
+def create_scrape_tool() -> ScrapeWebsiteTool:
+    return CachedScrapeWebsiteTool()
+
+
+class ThrottledTavilySearchTool(TavilySearchTool):
+    """`TavilySearchTool` gated by the cross-process `tavily` token bucket."""
+
+    def _run(self, query: str) -> str:
+        with span("tool.search"):
+            throttle("tavily")
+            return super()._run(query=query)
+
+    async def _arun(self, query: str) -> str:
+        with span("tool.search"):
+            await asyncio.to_thread(throttle, "tavily")
+            return await super()._arun(query=query)
+
+
+def create_search_tool() -> TavilySearchTool:
+    return ThrottledTavilySearchTool()
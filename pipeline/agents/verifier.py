@@ -11,14 +11,14 @@ from typing import Any
 def create_verifier(llm: Any):
     try:
         from crewai import Agent  # type: ignore
-        from crewai_tools import ScrapeWebsiteTool, TavilySearchTool  # type: ignore
+        from pipeline.agents.tools import create_scrape_tool, create_search_tool
     except Exception as e:  # pragma: no cover
         raise RuntimeError(
             "Missing dependencies. Install 'crewai' and 'crewai-tools' from pipeline/requirements.txt"
         ) from e
 
-    scrape_tool = ScrapeWebsiteTool()
-    tavily_tool = TavilySearchTool()
+    scrape_tool = create_scrape_tool()
+    tavily_tool = create_search_tool()
 
     return Agent(
         role="Data Verification and Structuring Specialist",
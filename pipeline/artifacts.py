@@ -0,0 +1,318 @@
+"""
+Content-addressed store for run artifacts (raw crew output, research URLs, parsed payloads).
+
+Layout under ARTIFACT_DIR (default pipeline/.artifacts):
+- blobs/<aa>/<sha256>  zlib-compressed content, addressed by the sha256 of the raw bytes
+- runs/<run_id>.json   manifest: run id, model, timestamps and {artifact name: blob info}
+- runs/attempts/<run_id>/<model>.json  manifest of one hedged attempt (LLM_HEDGE); the
+                       winner's is merged into runs/<run_id>.json when it claims the run
+
+Identical outputs (a re-verified article, an unchanged research list, a replayed
+cache hit) are stored once, however many runs reference them. Blobs and manifests are
+written then renamed, so concurrent runs never see partial files.
+
+Retention runs after each pipeline run: manifests older than ARTIFACT_RETENTION_DAYS
+are dropped, then the oldest runs go until referenced blobs fit in ARTIFACT_MAX_BYTES,
+and finally blobs no manifest references are deleted (after a grace period, so an
+in-flight run's blobs survive).
+
+Replay a run's stored outputs through the current parser and validator without
+calling the model: `python -m pipeline.scripts.artifacts replay <run_id>`.
+
+Environment:
+- ARTIFACT_STORE (default: true)
+- ARTIFACT_DIR (default: pipeline/.artifacts)
+- ARTIFACT_RETENTION_DAYS (default: 90; 0 keeps everything)
+- ARTIFACT_MAX_BYTES (default: 1073741824; 0 for no cap)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), ".artifacts")
+
+# Unreferenced blobs younger than this may belong to a run that has not saved its manifest yet
+_SWEEP_GRACE_S = 3600.0
+
+
+def artifacts_enabled() -> bool:
+    return os.getenv("ARTIFACT_STORE", "true").strip().strip('"').lower() not in ("0", "false", "no", "off")
+
+
+def artifact_root() -> str:
+    return os.getenv("ARTIFACT_DIR", "").strip().strip('"') or DEFAULT_ARTIFACT_DIR
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip().strip('"'))
+    except ValueError:
+        return default
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _encode(value: Any) -> Tuple[bytes, str]:
+    if isinstance(value, bytes):
+        return value, "bytes"
+    if isinstance(value, str):
+        return value.encode("utf-8"), "text"
+    # Canonical JSON, so equal payloads hash equally regardless of key order
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"), "json"
+
+
+def _decode(data: bytes, kind: str) -> Any:
+    if kind == "text":
+        return data.decode("utf-8")
+    if kind == "json":
+        return json.loads(data)
+    return data
+
+
+class ArtifactStore:
+    """Deduplicating, compressed blob store with per-run manifests."""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        *,
+        retention_days: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.root = root or artifact_root()
+        self.retention_days = retention_days if retention_days is not None else _env_int("ARTIFACT_RETENTION_DAYS", 90)
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("ARTIFACT_MAX_BYTES", 1024 * 1024 * 1024)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _manifest_path(self, run_id: str) -> str:
+        return os.path.join(self.root, "runs", f"{run_id}.json")
+
+    def _attempts_dir(self, run_id: str) -> str:
+        return os.path.join(self.root, "runs", "attempts", run_id)
+
+    def _attempt_path(self, run_id: str, attempt: str) -> str:
+        return os.path.join(self._attempts_dir(run_id), re.sub(r"[^A-Za-z0-9._-]+", "_", attempt) + ".json")
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """Store `value` (str, bytes or JSON-serializable); returns its blob info."""
+        data, kind = _encode(value)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            stored = os.path.getsize(path)
+        else:
+            packed = zlib.compress(data, 6)
+            _atomic_write(path, packed)
+            stored = len(packed)
+        return {"sha256": digest, "kind": kind, "size": len(data), "stored": stored}
+
+    def get(self, info: Dict[str, Any]) -> Any:
+        with open(self._blob_path(info["sha256"]), "rb") as f:
+            data = zlib.decompress(f.read())
+        return _decode(data, str(info.get("kind") or "bytes"))
+
+    def run(self, run_id: str, attempt: Optional[str] = None, **meta: Any) -> "RunArtifacts":
+        """Writer for one run's artifacts; picks up an existing manifest (resumed runs).
+
+        With `attempt`, artifacts go to that hedged attempt's own manifest until
+        `RunArtifacts.promote()`, so concurrent attempts never overwrite each other.
+        """
+        manifest = self.load_manifest(run_id) or {}
+        if attempt is not None:
+            manifest = _read_manifest(self._attempt_path(run_id, attempt)) or manifest
+        return RunArtifacts(self, run_id, manifest, meta, attempt=attempt)
+
+    def load_manifest(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return _read_manifest(self._manifest_path(run_id))
+
+    def _attempt_manifests(self) -> List[Tuple[str, Dict[str, Any]]]:
+        out: List[Tuple[str, Dict[str, Any]]] = []
+        for dirpath, _, files in os.walk(os.path.join(self.root, "runs", "attempts")):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    manifest = _read_manifest(path)
+                    if manifest is not None:
+                        out.append((path, manifest))
+        return out
+
+    def read(self, run_id: str, name: str) -> Any:
+        manifest = self.load_manifest(run_id)
+        if manifest is None:
+            raise FileNotFoundError(f"No artifacts stored for run {run_id}")
+        info = manifest.get("artifacts", {}).get(name)
+        if info is None:
+            raise KeyError(f"Run {run_id} has no artifact {name!r}")
+        return self.get(info)
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """All manifests, oldest first."""
+        try:
+            names = os.listdir(os.path.join(self.root, "runs"))
+        except FileNotFoundError:
+            return []
+        out: List[Dict[str, Any]] = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            manifest = self.load_manifest(name[: -len(".json")])
+            if manifest is not None:
+                out.append(manifest)
+        return sorted(out, key=lambda m: (str(m.get("created_at") or ""), str(m.get("run_id"))))
+
+    def prune(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Apply the age and size limits; returns counts of removed runs/blobs and bytes freed."""
+        now = time.time() if now is None else now
+        manifests = self.runs()
+        removed_runs = 0
+
+        def _drop(m: Dict[str, Any]) -> None:
+            nonlocal removed_runs
+            try:
+                os.unlink(self._manifest_path(str(m["run_id"])))
+                removed_runs += 1
+            except FileNotFoundError:
+                pass
+
+        if self.retention_days > 0:
+            cutoff = datetime.fromtimestamp(now - self.retention_days * 86400, timezone.utc).isoformat()
+            keep = []
+            for m in manifests:
+                if str(m.get("updated_at") or m.get("created_at") or "") >= cutoff:
+                    keep.append(m)
+                else:
+                    _drop(m)
+            manifests = keep
+
+        def _referenced(ms: List[Dict[str, Any]]) -> Dict[str, int]:
+            refs: Dict[str, int] = {}
+            for m in ms:
+                for info in m.get("artifacts", {}).values():
+                    refs[info["sha256"]] = int(info.get("stored") or 0)
+            return refs
+
+        # Attempt manifests are left behind by losing hedged attempts; their blobs stay
+        # referenced while the attempt may still be running
+        attempts = []
+        attempt_cutoff = datetime.fromtimestamp(now - _SWEEP_GRACE_S, timezone.utc).isoformat()
+        for path, m in self._attempt_manifests():
+            if str(m.get("updated_at") or m.get("created_at") or "") >= attempt_cutoff:
+                attempts.append(m)
+            else:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+        refs = _referenced(manifests)
+        if self.max_bytes > 0:
+            # Oldest runs go first; the newest run is always kept
+            while len(manifests) > 1 and sum(refs.values()) > self.max_bytes:
+                _drop(manifests.pop(0))
+                refs = _referenced(manifests)
+
+        refs.update(_referenced(attempts))
+        removed_blobs = freed = 0
+        blob_root = os.path.join(self.root, "blobs")
+        for dirpath, _, files in os.walk(blob_root):
+            for name in files:
+                if name in refs or name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                    if now - st.st_mtime < _SWEEP_GRACE_S:
+                        continue
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                removed_blobs += 1
+                freed += st.st_size
+        return {"runs": removed_runs, "blobs": removed_blobs, "bytes": freed}
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class RunArtifacts:
+    """Named artifacts of one run (or one hedged attempt); `save()` writes the manifest."""
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        run_id: str,
+        manifest: Dict[str, Any],
+        meta: Dict[str, Any],
+        attempt: Optional[str] = None,
+    ):
+        self.store = store
+        self.run_id = run_id
+        self.attempt = attempt
+        now = datetime.now(timezone.utc).isoformat()
+        self.manifest: Dict[str, Any] = {
+            "run_id": run_id,
+            "created_at": manifest.get("created_at") or now,
+            **{k: v for k, v in manifest.items() if k not in ("run_id", "created_at")},
+            **{k: v for k, v in meta.items() if v is not None},
+        }
+        self.manifest.setdefault("artifacts", {})
+        self._lock = threading.Lock()
+
+    def put(self, name: str, value: Any) -> Dict[str, Any]:
+        info = self.store.put(value)
+        with self._lock:
+            self.manifest["artifacts"][name] = info
+        return info
+
+    def _path(self) -> str:
+        if self.attempt is None:
+            return self.store._manifest_path(self.run_id)
+        return self.store._attempt_path(self.run_id, self.attempt)
+
+    def save(self) -> None:
+        with self._lock:
+            self.manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+            data = json.dumps(self.manifest, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        _atomic_write(self._path(), data)
+
+    def promote(self) -> "RunArtifacts":
+        """Make a winning attempt's artifacts the run's: its manifest replaces the run
+        manifest and every attempt manifest of the run is dropped. Returns self."""
+        if self.attempt is None:
+            return self
+        with self._lock:
+            self.attempt = None
+        self.save()
+        shutil.rmtree(self.store._attempts_dir(self.run_id), ignore_errors=True)
+        return self
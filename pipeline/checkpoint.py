@@ -0,0 +1,218 @@
+"""
+Stage checkpoints for pipeline runs.
+
+Each run gets a run id and a directory `<PIPELINE_CHECKPOINT_DIR>/<run_id>/` holding:
+- research.json      research URL list and raw researcher output
+- extractions/*.json per-URL verification output (events + raw text), keyed by URL hash
+- validated.json     sanitized/validated batch, drops and counts
+- upserted.json      upsert outcome and run summary (run complete)
+- attempts/<model>/  private stages of each hedged attempt (LLM_HEDGE); the winner's
+                     are copied up into the run once it claims the upsert
+
+`python -m pipeline.main --resume <run_id>` continues from the last completed stage,
+so a failure while parsing or upserting does not redo research and extraction.
+
+Once a run completes, its directory is compacted down to upserted.json (raw outputs
+stay in the artifact store). After each run, run directories not written for
+PIPELINE_CHECKPOINT_RETENTION_DAYS are deleted, which clears failed runs nobody resumed.
+
+Environment:
+- PIPELINE_CHECKPOINT_DIR (default: pipeline/.runs)
+- PIPELINE_CHECKPOINT_RETENTION_DAYS (default: 14; 0 keeps everything)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), ".runs")
+
+
+def checkpoint_root() -> str:
+    return os.getenv("PIPELINE_CHECKPOINT_DIR", "").strip().strip('"') or DEFAULT_CHECKPOINT_DIR
+
+
+def _retention_days() -> int:
+    try:
+        return int(os.getenv("PIPELINE_CHECKPOINT_RETENTION_DAYS", "14").strip().strip('"'))
+    except ValueError:
+        return 14
+
+
+def new_run_id() -> str:
+    """Sortable, collision-safe run id, e.g. 20251016T070000Z-1a2b3c4d."""
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Write-then-rename: a crash mid-write never leaves a truncated checkpoint
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _copy_file(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _copy_stages(src: str, dst: str) -> None:
+    # Extractions first: a copied validated.json must never point at missing work
+    extractions = os.path.join(src, "extractions")
+    if os.path.isdir(extractions):
+        for name in os.listdir(extractions):
+            if name.endswith(".json"):
+                _copy_file(os.path.join(extractions, name), os.path.join(dst, "extractions", name))
+    for stage in RunCheckpoint.STAGES:
+        path = os.path.join(src, f"{stage}.json")
+        if os.path.exists(path):
+            _copy_file(path, os.path.join(dst, f"{stage}.json"))
+
+
+def _read_json(path: str) -> Optional[Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class RunCheckpoint:
+    """Persisted stage outputs for a single run id."""
+
+    STAGES = ("research", "validated", "upserted")
+
+    def __init__(self, run_id: Optional[str] = None, root: Optional[str] = None):
+        self.run_id = run_id or new_run_id()
+        self.dir = os.path.join(root or checkpoint_root(), self.run_id)
+        self.parent: Optional[RunCheckpoint] = None
+
+    @classmethod
+    def resume(cls, run_id: str, root: Optional[str] = None) -> "RunCheckpoint":
+        ckpt = cls(run_id, root)
+        if not os.path.isdir(ckpt.dir):
+            raise FileNotFoundError(f"No checkpoint directory for run {run_id}: {ckpt.dir}")
+        return ckpt
+
+    def _stage_path(self, stage: str) -> str:
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown checkpoint stage: {stage}")
+        return os.path.join(self.dir, f"{stage}.json")
+
+    def save(self, stage: str, data: Dict[str, Any]) -> None:
+        _write_json(self._stage_path(stage), data)
+
+    def load(self, stage: str) -> Optional[Dict[str, Any]]:
+        return _read_json(self._stage_path(stage))
+
+    def completed_stages(self) -> List[str]:
+        return [s for s in self.STAGES if os.path.exists(self._stage_path(s))]
+
+    def _extraction_path(self, url: str) -> str:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.dir, "extractions", f"{digest}.json")
+
+    def save_extraction(self, url: str, events: List[Dict[str, Any]], text: str) -> None:
+        _write_json(self._extraction_path(url), {"url": url, "events": events, "text": text})
+
+    def load_extraction(self, url: str) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+        data = _read_json(self._extraction_path(url))
+        if not isinstance(data, dict):
+            return None
+        return list(data.get("events") or []), str(data.get("text") or "")
+
+    def attempt(self, label: str) -> "RunCheckpoint":
+        """Private checkpoint for one hedged attempt (same run id), so concurrent attempts
+        never overwrite each other's stages. A new attempt starts from the run's
+        completed stages."""
+        child = RunCheckpoint(self.run_id)
+        child.dir = os.path.join(self.dir, "attempts", re.sub(r"[^A-Za-z0-9._-]+", "_", label))
+        child.parent = self
+        if not os.path.isdir(child.dir) and os.path.isdir(self.dir):
+            _copy_stages(self.dir, child.dir)
+        return child
+
+    def promote(self) -> "RunCheckpoint":
+        """Copy an attempt's stages up into its run and return the run's checkpoint."""
+        if self.parent is None:
+            return self
+        _copy_stages(self.dir, self.parent.dir)
+        return self.parent
+
+    def compact(self) -> None:
+        """Keep only upserted.json of a completed run; resuming it still returns the summary."""
+        if not os.path.exists(self._stage_path("upserted")):
+            return
+        for name in os.listdir(self.dir):
+            path = os.path.join(self.dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name != "upserted.json":
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+
+def _last_write(path: str) -> float:
+    latest = os.path.getmtime(path)
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(dirpath, name)))
+            except FileNotFoundError:
+                pass
+    return latest
+
+
+def prune_checkpoints(
+    root: Optional[str] = None,
+    retention_days: Optional[int] = None,
+    now: Optional[float] = None,
+    keep: Tuple[str, ...] = (),
+) -> int:
+    """Delete run directories not written for `retention_days`; returns how many went.
+
+    Runs listed in `keep` (e.g. the one in progress) are never removed.
+    """
+    root = root or checkpoint_root()
+    days = _retention_days() if retention_days is None else retention_days
+    if days <= 0 or not os.path.isdir(root):
+        return 0
+    cutoff = (time.time() if now is None else now) - days * 86400
+    removed = 0
+    for run_id in os.listdir(root):
+        path = os.path.join(root, run_id)
+        if run_id in keep or not os.path.isdir(path):
+            continue
+        try:
+            if _last_write(path) >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
@@ -31,6 +31,7 @@ from pipeline.llm.gemini_client import build_llm
 from pipeline.agents.enricher import create_enricher
 from pipeline.utils.json_utils import extract_json
 from pipeline.supabase_client import get_client
+from pipeline.utils.spans import span, trace
 
 
 def setup_logging() -> None:
@@ -84,6 +85,17 @@ def upsert_company_profile(slug: str, bio: Optional[str], website: Optional[str]
 
 
 def run_once(slug: str) -> Dict[str, Any]:
+    from pipeline.llm.usage import summarize_usage
+
+    with trace("enrich", slug=slug) as root:
+        summary = _run_stages(slug)
+    summary["timings_ms"] = root.flatten()
+    summary["duration_ms"] = round(root.duration_ms, 1)
+    summary["usage"] = summarize_usage(root)
+    return summary
+
+
+def _run_stages(slug: str) -> Dict[str, Any]:
     from crewai import Crew, Task, Process  # type: ignore
 
     llm = build_llm()
@@ -111,16 +123,18 @@ def run_once(slug: str) -> Dict[str, Any]:
     )
 
     crew = Crew(agents=[enricher], tasks=[task], process=Process.sequential)
-    result = crew.kickoff()
+    with span("crew"):
+        result = crew.kickoff()
     result_text = str(result)
     logging.info("Agent result received (%s chars)", len(result_text))
     logging.debug("Raw result preview:\n%s", result_text[:1000])
 
-    try:
-        payload = extract_json(result_text)
-    except Exception as e:
-        logging.warning("Failed to parse JSON from result: %s", e)
-        payload = {}
+    with span("extract_json"):
+        try:
+            payload = extract_json(result_text)
+        except Exception as e:
+            logging.warning("Failed to parse JSON from result: %s", e)
+            payload = {}
 
     slug_out = payload.get("slug") if isinstance(payload, dict) else None
     website = payload.get("website_url") if isinstance(payload, dict) else None
@@ -132,7 +146,8 @@ def run_once(slug: str) -> Dict[str, Any]:
 
     bio = sanitize_bio(bio_raw if isinstance(bio_raw, str) else None)
 
-    upsert_resp = upsert_company_profile(slug, bio, website, sources)
+    with span("upsert"):
+        upsert_resp = upsert_company_profile(slug, bio, website, sources)
     logging.info("Upsert response: %s", upsert_resp)
 
     return {
@@ -0,0 +1,93 @@
+"""
+Record/replay cache for LLM calls.
+
+Responses are keyed by (provider model, message hash, temperature, seed, max_tokens)
+and stored compressed in `<CACHE_DIR>/llm.sqlite3` with LRU eviction, so
+post-processing and benchmarks can be re-run deterministically without network or quota.
+
+Modes (LLM_CACHE_MODE):
+- off (default): every call goes to the provider
+- record: every call goes to the provider and the response is stored
+- replay: responses come only from the cache; a miss raises `LLMCacheMiss` (fully offline)
+- read-through: serve from cache when present, otherwise call the provider and store
+
+Environment:
+- LLM_CACHE_MODE (default: off)
+- LLM_CACHE_MAX_MB (LRU byte cap, default: 512)
+- CACHE_DIR (default: pipeline/.cache)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from pipeline.utils.disk_cache import DiskCache, cache_dir
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay", "read-through")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when no recorded response exists for a call."""
+
+
+def cache_mode() -> str:
+    mode = os.getenv("LLM_CACHE_MODE", "off").strip().strip('"').strip("'").lower().replace("_", "-")
+    if mode in ("", "0", "false", "no"):
+        return "off"
+    if mode not in MODES:
+        logger.warning("Unknown LLM_CACHE_MODE=%r; caching disabled", mode)
+        return "off"
+    return mode
+
+
+def cache_key(
+    model: str,
+    messages: Any,
+    *,
+    temperature: Optional[float] = None,
+    seed: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    tools: Any = None,
+) -> str:
+    """Stable key for one LLM call. Native tool schemas count as part of the prompt."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    prompt = json.dumps({"messages": messages, "tools": tools}, sort_keys=True, default=str)
+    message_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    parts = [str(model or ""), message_hash, repr(temperature), repr(seed), repr(max_tokens)]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+_CACHE: Optional[DiskCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> DiskCache:
+    """Process-wide cache instance backed by `<CACHE_DIR>/llm.sqlite3`."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                try:
+                    max_mb = int(os.getenv("LLM_CACHE_MAX_MB", "512").strip().strip('"'))
+                except ValueError:
+                    max_mb = 512
+                _CACHE = DiskCache(os.path.join(cache_dir(), "llm.sqlite3"), max_bytes=max_mb * 1024 * 1024)
+    return _CACHE
+
+
+def lookup(key: str, cache: Optional[DiskCache] = None) -> Optional[str]:
+    entry = (cache or get_llm_cache()).get(key)
+    if entry is None:
+        return None
+    return entry.value.decode("utf-8")
+
+
+def store(key: str, response: str, *, model: str = "", cache: Optional[DiskCache] = None) -> None:
+    (cache or get_llm_cache()).set(key, response.encode("utf-8"), {"model": model})
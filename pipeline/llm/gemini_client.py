@@ -8,6 +8,13 @@ Requires environment:
 - LLM_TIMEOUT (optional, seconds, default: 120)
 - LLM_MAX_TOKENS (optional, default: 4000)
 - LLM_SEED (optional, default: 42)
+- RATE_LIMITS (optional, see pipeline/utils/rate_limit.py): per-model requests/tokens
+  per minute, enforced across processes before each call
+- LLM_CACHE_MODE (optional, off|record|replay|read-through, see pipeline/llm/cache.py):
+  record/replay responses keyed on model, prompt, temperature, seed and max_tokens
+- LLM_PRICING (optional, see pipeline/llm/usage.py): USD per 1M tokens for cost telemetry
+- LLM_STREAM (optional, default: false, see pipeline/llm/streaming.py): stream tokens so
+  `events` elements can be processed while the model is still writing
 
 Docs:
 - CrewAI LLMs: https://docs.crewai.com/en/concepts/llms
@@ -16,7 +23,13 @@ Docs:
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import Any, Dict, Optional
+
+from pipeline.llm import cache as llm_cache
+from pipeline.llm import streaming as llm_streaming
+from pipeline.llm.usage import UsageCapture, agent_key, release_capture
+from pipeline.utils.rate_limit import estimate_tokens, throttle
+from pipeline.utils.spans import span
 
 try:
     from crewai import LLM  # type: ignore
@@ -42,6 +55,76 @@ def _provider_model(model_id: str) -> str:
     return f"gemini/{model_id}"
 
 
+_PIPELINE_LLM_CLASSES: Dict[type, type] = {}
+
+# Positional parameters of crewai.LLM.call after `messages`
+_CALL_ARGS = ("tools", "callbacks", "available_functions", "from_task", "from_agent")
+
+
+def _pipeline_llm_class(base: type) -> type:
+    """Return a subclass of `base` (CrewAI's LLM) with pipeline hooks around `call`.
+
+    Built lazily from whatever `LLM` currently is so tests can swap in a stub.
+    """
+    cls = _PIPELINE_LLM_CLASSES.get(base)
+    if cls is None:
+
+        def call(self, messages, *args: Any, **kwargs: Any):  # type: ignore[no-untyped-def]
+            model = str(getattr(self, "model", ""))
+            call_kwargs = dict(zip(_CALL_ARGS, args))
+            call_kwargs.update(kwargs)
+            role = getattr(call_kwargs.get("from_agent"), "role", None)
+            # Streamed chunks of this call go to the caller's event sink, if any
+            sink = llm_streaming.current_sink()
+            if sink is not None:
+                sink.begin()
+            with span("llm", model=model, agent=agent_key(role) if role else None) as s:
+                mode = llm_cache.cache_mode()
+                key = None
+                if mode != "off":
+                    key = llm_cache.cache_key(
+                        model,
+                        messages,
+                        temperature=getattr(self, "temperature", None),
+                        seed=getattr(self, "seed", None),
+                        max_tokens=getattr(self, "max_tokens", None),
+                        tools=call_kwargs.get("tools"),
+                    )
+                    if mode in ("replay", "read-through"):
+                        cached = llm_cache.lookup(key)
+                        if cached is not None:
+                            s.set(cached=True)
+                            if sink is not None:
+                                sink.end(cached)
+                            return cached
+                        if mode == "replay":
+                            raise llm_cache.LLMCacheMiss(f"No recorded response for {model} (key {key[:12]})")
+
+                # Queue for a shared per-model slot instead of discovering the quota via 429s
+                waited = throttle(model, tokens=estimate_tokens(messages))
+                if waited:
+                    s.set(rate_limit_wait_ms=round(waited * 1000.0, 1))
+                # CrewAI reports provider usage to every callback passed into the call
+                capture = UsageCapture()
+                call_kwargs["callbacks"] = list(call_kwargs.get("callbacks") or []) + [capture]
+                try:
+                    result = base.call(self, messages, **call_kwargs)
+                finally:
+                    release_capture(capture)
+                if capture.usage:
+                    s.set(**capture.usage)
+                if sink is not None:
+                    sink.end(result)
+                # Only plain text completions are replayable; tool-call objects are not stored
+                if key is not None and isinstance(result, str):
+                    llm_cache.store(key, result, model=model)
+                return result
+
+        cls = type("PipelineLLM", (base,), {"call": call, "__module__": __name__})
+        _PIPELINE_LLM_CLASSES[base] = cls
+    return cls
+
+
 def build_llm(
     model: Optional[str] = None,
     *,
@@ -49,6 +132,7 @@ def build_llm(
     timeout: Optional[int] = None,
     max_tokens: Optional[int] = None,
     seed: Optional[int] = None,
+    stream: Optional[bool] = None,
 ) -> LLM:
     """Construct a CrewAI LLM configured for Gemini.
 
@@ -93,17 +177,19 @@ def build_llm(
     timeout_final = timeout if timeout is not None else _to_int(env_timeout, 120)
     max_tokens_final = max_tokens if max_tokens is not None else _to_int(env_max_tokens, 4000)
     seed_final = seed if seed is not None else _to_int(env_seed, 42)
+    stream_final = stream if stream is not None else llm_streaming.stream_enabled()
 
     if LLM is None:  # pragma: no cover - real runs require crewai installed
         raise RuntimeError(
             "crewai is not installed. Please install dependencies from pipeline/requirements.txt"
         )
 
-    return LLM(  # type: ignore[misc]
+    return _pipeline_llm_class(LLM)(  # type: ignore[misc]
         model=model_final,
         temperature=temperature_final,
         timeout=timeout_final,
         max_tokens=max_tokens_final,
         seed=seed_final,
+        **({"stream": True} if stream_final else {}),
     )
 
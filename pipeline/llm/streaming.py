@@ -0,0 +1,109 @@
+"""
+Streaming LLM output into an incremental events parser.
+
+With LLM_STREAM enabled, `build_llm` asks the provider for a token stream. CrewAI
+publishes every chunk on its event bus from the thread making the call; chunks
+arriving while a `stream_events(on_event)` block is active in the current context
+are fed to an `EventStreamParser`, and `on_event` runs for each element of the
+`"events"` array as soon as it is complete, long before the agent finishes.
+
+    with stream_events(handle_row):
+        verify_url(llm, url)
+
+Each LLM call starts a fresh parse. Calls answered without chunks (cache replay,
+CrewAI's non-streaming fallback) are parsed from their full response instead.
+
+Environment:
+- LLM_STREAM (optional, default: false)
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from pipeline.utils.json_utils import EventStreamParser
+
+logger = logging.getLogger(__name__)
+
+
+def stream_enabled() -> bool:
+    return os.getenv("LLM_STREAM", "false").strip().strip('"').lower() in ("1", "true", "yes", "on")
+
+
+class EventSink:
+    """Routes the chunks of the current LLM call to a parser and `on_event`."""
+
+    def __init__(self, on_event: Callable[[Dict[str, Any]], None]):
+        self.on_event = on_event
+        self.parser = EventStreamParser()
+        self.emitted = 0
+        self._chunks = 0
+
+    def begin(self) -> None:
+        self.parser.reset()
+        self._chunks = 0
+
+    def feed(self, chunk: str) -> None:
+        self._chunks += 1
+        for element in self.parser.feed(chunk):
+            self.emitted += 1
+            try:
+                self.on_event(element)
+            except Exception as e:  # noqa: BLE001 - a bad row must not break the LLM call
+                logger.warning("Streamed event handler failed: %s", e)
+
+    def end(self, response: Any) -> None:
+        if not self._chunks and isinstance(response, str):
+            self.feed(response)
+
+
+_SINK: contextvars.ContextVar[Optional[EventSink]] = contextvars.ContextVar("pipeline_event_sink", default=None)
+
+
+def current_sink() -> Optional[EventSink]:
+    return _SINK.get()
+
+
+@contextmanager
+def stream_events(on_event: Callable[[Dict[str, Any]], None]) -> Iterator[EventSink]:
+    """Deliver streamed `events` elements of LLM calls made in this block to `on_event`."""
+    _register_chunk_handler()
+    sink = EventSink(on_event)
+    token = _SINK.set(sink)
+    try:
+        yield sink
+    finally:
+        _SINK.reset(token)
+
+
+def _on_chunk(source: Any, event: Any) -> None:
+    sink = _SINK.get()
+    chunk = getattr(event, "chunk", None)
+    if sink is not None and isinstance(chunk, str):
+        sink.feed(chunk)
+
+
+_REGISTERED = False
+_REGISTER_LOCK = threading.Lock()
+
+
+def _register_chunk_handler() -> None:
+    # One process-wide handler; it only acts when a sink is active in the caller's context
+    global _REGISTERED
+    if _REGISTERED:
+        return
+    with _REGISTER_LOCK:
+        if _REGISTERED:
+            return
+        try:
+            from crewai.events.event_bus import crewai_event_bus  # type: ignore
+            from crewai.events.types.llm_events import LLMStreamChunkEvent  # type: ignore
+        except Exception as e:  # pragma: no cover - crewai missing or moved
+            logger.debug("LLM stream events unavailable; parsing full responses only: %s", e)
+        else:
+            crewai_event_bus.register_handler(LLMStreamChunkEvent, _on_chunk)
+        _REGISTERED = True
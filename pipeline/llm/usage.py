@@ -0,0 +1,201 @@
+"""
+Token usage and cost accounting for LLM calls made through `build_llm`.
+
+Each call's provider usage (prompt/completion tokens) is attached to its `llm`
+span (see `pipeline/utils/spans.py`) together with the calling agent, so a run's
+span tree can be rolled up per stage, per agent and per model after the fact.
+
+Environment:
+- LLM_PRICING (optional): USD per 1M tokens, semicolon-separated
+  `model:input=N,output=M` entries, e.g. "gemini-2.0-flash:input=0.10,output=0.40".
+  Models without an entry use litellm's price table when available.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from pipeline.utils.spans import Span
+
+try:
+    import litellm  # type: ignore
+except Exception:  # pragma: no cover - optional; only used for default prices
+    litellm = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Agent role keywords -> short agent key used in telemetry
+_AGENT_KEYWORDS = (
+    ("research", "researcher"),
+    ("verif", "verifier"),
+    ("enrich", "enricher"),
+    ("extract", "extractor"),
+)
+
+
+def agent_key(role: Optional[str]) -> str:
+    """Map a CrewAI agent role to its short key, e.g. "...Researcher" -> "researcher"."""
+    r = (role or "").lower()
+    if not r:
+        return "unknown"
+    for keyword, key in _AGENT_KEYWORDS:
+        if keyword in r:
+            return key
+    return re.sub(r"[^a-z0-9]+", "_", r).strip("_")
+
+
+class UsageCapture:
+    """Per-call callback receiving the provider usage CrewAI reports after a completion.
+
+    Only the first report is kept, so a late duplicate delivery cannot double count.
+    """
+
+    def __init__(self) -> None:
+        self.usage: Optional[Dict[str, int]] = None
+
+    def log_success_event(self, kwargs: Any, response_obj: Any, start_time: Any, end_time: Any) -> None:
+        if self.usage is None and isinstance(response_obj, dict):
+            self.usage = usage_counts(response_obj.get("usage"))
+
+
+def release_capture(capture: UsageCapture) -> None:
+    """Drop a finished capture from litellm's global callback lists.
+
+    CrewAI registers per-call callbacks with litellm globally; without this every
+    call would leave its capture object behind for the rest of the process.
+    """
+    if litellm is None:
+        return
+    for name in ("callbacks", "input_callback", "success_callback", "failure_callback",
+                 "_async_success_callback", "_async_failure_callback"):
+        lst = getattr(litellm, name, None)
+        if isinstance(lst, list):
+            while capture in lst:
+                try:
+                    lst.remove(capture)
+                except ValueError:  # removed concurrently
+                    break
+
+
+def usage_counts(usage: Any) -> Optional[Dict[str, int]]:
+    """Normalize a litellm Usage object or dict to {prompt_tokens, completion_tokens}."""
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else (lambda k: getattr(usage, k, None))
+    try:
+        prompt = int(get("prompt_tokens") or 0)
+        completion = int(get("completion_tokens") or 0)
+    except (TypeError, ValueError):
+        return None
+    if not prompt and not completion:
+        return None
+    return {"prompt_tokens": prompt, "completion_tokens": completion}
+
+
+def parse_pricing(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse LLM_PRICING into {model: (input_usd_per_1m, output_usd_per_1m)}."""
+    out: Dict[str, Tuple[float, float]] = {}
+    for entry in (spec or "").strip().strip('"').strip("'").split(";"):
+        if ":" not in entry:
+            continue
+        key, _, params = entry.partition(":")
+        values: Dict[str, float] = {}
+        for kv in params.split(","):
+            name, _, val = kv.partition("=")
+            try:
+                values[name.strip().lower()] = float(val)
+            except ValueError:
+                continue
+        if key.strip() and ("input" in values or "output" in values):
+            out[key.strip().lower()] = (values.get("input", 0.0), values.get("output", 0.0))
+    return out
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Cost of one call in USD, or None when the model has no known price."""
+    table = parse_pricing(os.getenv("LLM_PRICING", ""))
+    m = (model or "").strip().lower()
+    price = table.get(m) or table.get(m.split("/", 1)[-1])
+    if price is not None:
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+    if litellm is None:
+        return None
+    try:
+        p_cost, c_cost = litellm.cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return float(p_cost) + float(c_cost)
+    except Exception:
+        return None
+
+
+def _bucket() -> Dict[str, Any]:
+    return {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+def _add(bucket: Dict[str, Any], attrs: Dict[str, Any], cost: Optional[float]) -> None:
+    bucket["calls"] += 1
+    if attrs.get("cached"):
+        bucket["cached_calls"] += 1
+    bucket["prompt_tokens"] += int(attrs.get("prompt_tokens") or 0)
+    bucket["completion_tokens"] += int(attrs.get("completion_tokens") or 0)
+    if cost is not None:
+        bucket["cost_usd"] += cost
+
+
+def _finish(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    bucket["total_tokens"] = bucket["prompt_tokens"] + bucket["completion_tokens"]
+    bucket["cost_usd"] = round(bucket["cost_usd"], 6)
+    return bucket
+
+
+def summarize_usage(root: Span, validated_count: Optional[int] = None) -> Dict[str, Any]:
+    """Roll up usage from every `llm` span below `root` per stage, agent and model.
+
+    A stage is the top-level span the call happened under (e.g. "research", "verify").
+    `tokens_per_validated_event` is total tokens / `validated_count` when it is > 0.
+    """
+    total = _bucket()
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    by_agent: Dict[str, Dict[str, Any]] = {}
+    by_model: Dict[str, Dict[str, Any]] = {}
+    priced = True
+
+    def _walk(s: Span, stage: str) -> None:
+        nonlocal priced
+        for c in list(s.children):
+            c_stage = stage or c.name
+            if c.name == "llm":
+                attrs = c.attrs
+                cost = None
+                if not attrs.get("cached"):
+                    cost = cost_usd(
+                        str(attrs.get("model") or ""),
+                        int(attrs.get("prompt_tokens") or 0),
+                        int(attrs.get("completion_tokens") or 0),
+                    )
+                    if cost is None and (attrs.get("prompt_tokens") or attrs.get("completion_tokens")):
+                        priced = False
+                for bucket in (
+                    total,
+                    by_stage.setdefault(c_stage, _bucket()),
+                    by_agent.setdefault(str(attrs.get("agent") or "unknown"), _bucket()),
+                    by_model.setdefault(str(attrs.get("model") or "unknown"), _bucket()),
+                ):
+                    _add(bucket, attrs, cost)
+            _walk(c, c_stage)
+
+    _walk(root, "")
+    summary = _finish(total)
+    if not priced:
+        # Partial prices would understate cost; report unknown instead
+        summary["cost_usd"] = None
+    summary["tokens_per_validated_event"] = (
+        round(summary["total_tokens"] / validated_count, 2) if validated_count else None
+    )
+    summary["by_stage"] = {k: _finish(v) for k, v in by_stage.items()}
+    summary["by_agent"] = {k: _finish(v) for k, v in by_agent.items()}
+    summary["by_model"] = {k: _finish(v) for k, v in by_model.items()}
+    return summary
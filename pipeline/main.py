@@ -5,30 +5,51 @@ Pipeline main entrypoint.
 
 - Constructs LLM (Gemini) via CrewAI `LLM`
 - Builds agents and tasks
-- Runs the crew sequentially
+- Runs research, then verifies each discovered URL as an independent job
+  (bounded by VERIFY_CONCURRENCY)
 - Attempts to parse structured JSON and upsert into Supabase
+  (with LLM_STREAM, rows are upserted as verification crews stream them)
 
 Environment:
 - See ../.env.example. For local dev, copy to pipeline/.env and fill values.
 """
+import contextvars
+import json
 import logging
 import os
 import time
 import random
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
 
 from dotenv import load_dotenv
 
 from pipeline.llm.gemini_client import build_llm
+from pipeline.llm.streaming import stream_enabled, stream_events
+from pipeline.llm.usage import summarize_usage
 from pipeline.utils.json_utils import extract_json
-from pipeline.utils.event_sanitizer import sanitize_events
+from pipeline.utils.dedupe import EventIndex, dedupe_enabled, dedupe_events, with_sources
+from pipeline.utils.drop_ledger import DropLedger
+from pipeline.utils.event_sanitizer import (
+    REASON_INVALID_RECORD,
+    REASON_UPSERT_REJECTED,
+    reject_records,
+    validate_events,
+)
+from pipeline.utils.url_utils import extract_urls
+from pipeline.utils.known_urls import KnownUrlIndex, skip_known_enabled
+from pipeline.utils.spans import Span, bind_context, span, trace
 from pipeline.agents.researcher import create_researcher
 from pipeline.agents.verifier import create_verifier
 from pipeline.tasks.research_task import create_research_task
-from pipeline.tasks.verification_task import create_verification_task
-from pipeline.supabase_client import upsert_funding_events
-from pipeline.models import FundingEvent, ValidationError
-from pipeline.telemetry import build_run_record, insert_run
+from pipeline.tasks.verification_task import create_url_verification_task
+from pipeline.supabase_client import fetch_source_urls, upsert_funding_events
+from pipeline.artifacts import ArtifactStore, RunArtifacts, artifacts_enabled
+from pipeline.checkpoint import RunCheckpoint, prune_checkpoints
+from pipeline.telemetry import build_run_record, fetch_duration_p95, insert_run
 
 
 def setup_logging() -> None:
@@ -75,6 +96,8 @@ def _is_non_retryable_error(e: Exception) -> bool:
         "bad request",
         "invalid argument",
         "malformed",
+        # LLM_CACHE_MODE=replay miss: retrying or falling back cannot produce a recording
+        "no recorded response",
     ]
     return any(s in msg for s in non_retryable)
 
@@ -120,6 +143,8 @@ def kickoff_with_retry(crew) -> str:
     base_delay = int(os.getenv("LLM_RETRY_BASE_DELAY", "30"))
 
     for attempt in range(max_retries + 1):
+        # A hedged attempt that already lost stops before paying for another call
+        _check_hedge()
         try:
             res = crew.kickoff()
             # Guard: sometimes the LLM wrapper may return None or an empty/"None" string without raising.
@@ -164,161 +189,722 @@ def kickoff_with_retry(crew) -> str:
                 wait_s,
                 e,
             )
-            time.sleep(wait_s)
+            hedge = _HEDGE.get()
+            if hedge is not None:
+                hedge.sleep(wait_s)
+            else:
+                time.sleep(wait_s)
 
 
-def run_once_with_model(model_id: str) -> Dict[str, Any]:
+class RunCancelled(Exception):
+    """Raised inside a hedged attempt once another model has won."""
+
+
+class HedgeToken:
+    """Coordinates hedged attempts: the first one to claim the commit wins.
+
+    Attempts call `check()` at stage boundaries, before every LLM call and between
+    URLs, and `claim()` right before writing to Supabase, so a losing attempt never
+    upserts and stops at its next check. An LLM call already in flight is not
+    interrupted.
+    """
+
+    def __init__(self, delay_ms: int, delay_source: str):
+        self.delay_ms = delay_ms
+        self.delay_source = delay_source
+        self.candidates: List[str] = []
+        self.winner: str | None = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def started(self, model_id: str) -> None:
+        with self._lock:
+            self.candidates.append(model_id)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise RunCancelled("hedged attempt cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """Retry backoff that ends early (raising RunCancelled) once the attempt lost."""
+        if self._cancelled.wait(seconds):
+            raise RunCancelled("hedged attempt cancelled")
+
+    def lost(self, model_id: str) -> bool:
+        """Whether another attempt has won, or the hedged run was cancelled, for `model_id`."""
+        return self._cancelled.is_set() and self.winner != model_id
+
+    def claim(self, model_id: str) -> bool:
+        with self._lock:
+            if self.winner is None and not self._cancelled.is_set():
+                self.winner = model_id
+                self._cancelled.set()
+                return True
+            return False
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "winner": self.winner,
+                "candidates": list(self.candidates),
+                "delay_ms": self.delay_ms,
+                "delay_source": self.delay_source,
+            }
+
+
+# The hedge token of the attempt running in this context (None outside hedged runs)
+_HEDGE: contextvars.ContextVar[HedgeToken | None] = contextvars.ContextVar("hedge", default=None)
+
+
+def _check_hedge() -> None:
+    hedge = _HEDGE.get()
+    if hedge is not None:
+        hedge.check()
+
+
+def _row_key(row: Dict[str, Any]) -> str:
+    return json.dumps(row, sort_keys=True, default=str)
+
+
+class StreamedUpserts:
+    """Validates and upserts streamed `events` elements while verification is running.
+
+    A row that fails to validate or upsert here is simply left to the batch upsert at
+    the end of the run, which skips rows already written (see `pending`). With
+    EVENT_DEDUPE, only the first report of each funding round is streamed; later
+    reports are merged into it by the dedupe stage.
+    """
+
+    def __init__(self, t0: float):
+        self.t0 = t0
+        self.first_row_ms: int | None = None
+        self._keys: set[str] = set()
+        self._urls: set[str] = set()
+        self._index = EventIndex() if dedupe_enabled() else None
+        self._lock = threading.Lock()
+
+    def handle(self, url: str, event: Dict[str, Any]) -> None:
+        event = dict(event)
+        if not event.get("source_url"):
+            event["source_url"] = url
+        rows, _ = validate_events([event])
+        if not rows:
+            return
+        row = rows[0]
+        if self._index is not None:
+            with self._lock:
+                _, matched = self._index.add(row)
+            if matched:
+                logging.debug("Streamed event from %s repeats an earlier round; merging at the end", url)
+                return
+            row = with_sources(row)
+        key = _row_key(row)
+        with self._lock:
+            if key in self._keys:
+                return
+        with span("stream_upsert"):
+            resp = upsert_funding_events([row])
+        if resp.get("error"):
+            logging.warning("Streamed upsert failed for %s; leaving it to the batch upsert: %s", url, resp["error"])
+            return
+        with self._lock:
+            self._keys.add(key)
+            self._urls.add(row["source_url"])
+            if self.first_row_ms is None:
+                self.first_row_ms = int((time.time() - self.t0) * 1000)
+                logging.info("First streamed row upserted after %sms", self.first_row_ms)
+
+    def streamed_urls(self) -> set[str]:
+        with self._lock:
+            return set(self._urls)
+
+    def pending(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [r for r in rows if _row_key(r) not in self._keys]
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+
+def _verify_concurrency() -> int:
+    try:
+        return max(1, int(os.getenv("VERIFY_CONCURRENCY", "4")))
+    except ValueError:
+        return 4
+
+
+def run_research(llm: Any) -> Tuple[List[str], str]:
+    """Run the researcher crew alone and return (urls, raw_text)."""
     from crewai import Crew, Process  # type: ignore
 
-    # Create agents & tasks
-    llm = build_llm(model=model_id)
     researcher = create_researcher(llm=llm)
     research_task = create_research_task(agent=researcher)
-
-    verifier = create_verifier(llm=llm)
-    verification_task = create_verification_task(agent=verifier, research_task=research_task)
-
-    # Log tool names for diagnostics
     try:
         r_tools = getattr(researcher, "tools", [])
-        v_tools = getattr(verifier, "tools", [])
-        r_tool_names = [getattr(t, "name", type(t).__name__) for t in r_tools]
-        v_tool_names = [getattr(t, "name", type(t).__name__) for t in v_tools]
-        logging.debug("Researcher tools: %s", r_tool_names)
-        logging.debug("Verifier tools: %s", v_tool_names)
+        logging.debug("Researcher tools: %s", [getattr(t, "name", type(t).__name__) for t in r_tools])
     except Exception as tool_log_err:  # pragma: no cover
         logging.debug("Failed to log agent tools: %s", tool_log_err)
 
-    crew = Crew(
-        agents=[researcher, verifier],
-        tasks=[research_task, verification_task],
-        process=Process.sequential,
-    )
-    t0 = time.time()
+    crew = Crew(agents=[researcher], tasks=[research_task], process=Process.sequential)
+    with span("crew"):
+        result_text = str(kickoff_with_retry(crew))
+    urls = extract_urls(result_text)
+    logging.info("Research returned %s URL(s)", len(urls))
+    return urls, result_text
+
+
+def verify_url(llm: Any, url: str) -> Tuple[List[Dict[str, Any]], str]:
+    """Run a single-article verification crew and return (events, raw_text)."""
+    from crewai import Crew, Process  # type: ignore
+
+    # Agents keep per-run state, so each job gets its own verifier instance.
+    verifier = create_verifier(llm=llm)
+    task = create_url_verification_task(agent=verifier, url=url)
+    crew = Crew(agents=[verifier], tasks=[task], process=Process.sequential)
+    with span("crew"):
+        result_text = str(kickoff_with_retry(crew))
 
-    result = kickoff_with_retry(crew)
+    return events_from_output(url, result_text), result_text
 
-    # CrewAI returns a result object; stringify for safety
-    result_text = str(result)
-    logging.info("Crew result received (%s chars)", len(result_text))
-    logging.debug("Crew raw result preview:\n%s", result_text[:1000])
+
+def events_from_output(url: str, result_text: str) -> List[Dict[str, Any]]:
+    """Parse a verification crew's raw output for `url` into event dicts."""
+    with span("extract_json"):
+        try:
+            payload = extract_json(result_text)
+            events = payload.get("events", []) if isinstance(payload, dict) else []
+        except Exception as e:
+            logging.warning("Failed to parse JSON for %s: %s", url, e)
+            events = []
+    events = [e for e in events if isinstance(e, dict)]
+    # The article URL is the canonical source; fill it in when the model omitted it.
+    for e in events:
+        if not e.get("source_url"):
+            e["source_url"] = url
+    return events
+
+
+def verify_urls(
+    urls: List[str],
+    verify: Callable[[str], Tuple[List[Dict[str, Any]], str]],
+    *,
+    max_workers: int | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, str], Dict[str, Exception]]:
+    """Verify URLs as independent jobs with bounded concurrency.
+
+    Returns (events, raw_outputs_by_url, errors_by_url). Events are merged in the
+    original URL order so output is deterministic regardless of completion order.
+    A non-retryable error aborts the whole stage; if every job failed, the first
+    error is re-raised so the caller's model fallback logic still applies.
+    """
+    if not urls:
+        return [], {}, {}
+    workers = min(max_workers or _verify_concurrency(), len(urls))
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    outputs: Dict[str, str] = {}
+    errors: Dict[str, Exception] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") as pool:
+        # bind_context keeps each job's spans under the caller's "verify" span
+        futures = {pool.submit(bind_context(verify), u): u for u in urls}
+        for fut in as_completed(futures):
+            url = futures[fut]
+            try:
+                _check_hedge()
+                events, text = fut.result()
+            except Exception as e:  # noqa: BLE001
+                if isinstance(e, RunCancelled) or _is_non_retryable_error(e):
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                logging.warning("Verification failed for %s: %s", url, e)
+                errors[url] = e
+                continue
+            results[url] = events
+            outputs[url] = text
+            logging.info("Verified %s: %s event(s)", url, len(events))
+
+    if errors and not results:
+        raise next(iter(errors.values()))
+
+    merged: List[Dict[str, Any]] = []
+    for u in urls:
+        merged.extend(results.get(u, []))
+    return merged, outputs, errors
+
+
+def load_known_url_index() -> KnownUrlIndex | None:
+    """Load the local index of ingested source URLs and refresh it incrementally.
+
+    Returns None when SKIP_KNOWN_URLS is disabled. A failed refresh (e.g. no
+    Supabase env) is not fatal: the previously saved index is still used.
+    """
+    if not skip_known_enabled():
+        return None
+    index = KnownUrlIndex().load()
     try:
-        out_path = os.path.join(os.path.dirname(__file__), "last_result.txt")
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(result_text)
-        logging.debug("Wrote raw result to %s", out_path)
-    except Exception as write_err:  # pragma: no cover
-        logging.warning("Failed to persist raw result: %s", write_err)
+        added = index.refresh(fetch_source_urls)
+        index.save()
+        logging.info("Known-URL index refreshed: +%s row(s), %s total", added, len(index))
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Known-URL index refresh failed; using local copy (%s URLs): %s", len(index), e)
+    return index
+
 
+def _summarize_drop_reasons(dropped: List[Dict[str, Any]]) -> None:
+    # Emit an info-level summary of drop reasons for quick diagnosis in logs
     try:
-        payload = extract_json(result_text)
-        events: List[Dict[str, Any]] = payload.get("events", []) if isinstance(payload, dict) else []
-    except Exception as e:
-        logging.warning("Failed to parse JSON from result: %s", e)
-        events = []
+        reason_counts: Dict[str, int] = {}
+        for d in dropped:
+            r = d.get("__reason", "unknown")
+            reason_counts[r] = reason_counts.get(r, 0) + 1
+        if reason_counts:
+            summary = ", ".join(f"{k}={v}" for k, v in reason_counts.items())
+            logging.info("Drop reasons summary: %s", summary)
+    except Exception as _e:  # pragma: no cover
+        logging.debug("Failed to summarize drop reasons: %s", _e)
+
+
+def _put_artifact(artifacts: RunArtifacts | None, name: str, value: Any) -> None:
+    # Artifacts are for replays and post-mortems; failing to store one never fails a run
+    if artifacts is None:
+        return
+    try:
+        artifacts.put(name, value)
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Failed to store artifact %s: %s", name, e)
 
-    raw_count = len(events)
-    sanitized_valid, sanitized_dropped = sanitize_events(events)
-    logging.info(
-        "Sanitized events: %s valid, %s dropped (raw %s)",
-        len(sanitized_valid),
-        len(sanitized_dropped),
-        raw_count,
+
+def _save_artifacts(artifacts: RunArtifacts | None, prune: bool = False, hedge: HedgeToken | None = None) -> None:
+    if artifacts is None:
+        return
+    if hedge is not None and artifacts.attempt is not None and hedge.lost(artifacts.attempt):
+        # A losing hedged attempt's outputs are discarded, not kept for post-mortems
+        return
+    try:
+        artifacts.save()
+        if prune:
+            removed = artifacts.store.prune()
+            if removed["runs"] or removed["blobs"]:
+                logging.info(
+                    "Artifact retention: removed %s run(s), %s blob(s), %s bytes",
+                    removed["runs"], removed["blobs"], removed["bytes"],
+                )
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Failed to save run artifacts: %s", e)
+
+
+def _tidy_checkpoints(ckpt: RunCheckpoint) -> None:
+    # Like artifacts, checkpoint housekeeping never fails a run
+    try:
+        ckpt.compact()
+        removed = prune_checkpoints(os.path.dirname(ckpt.dir), keep=(ckpt.run_id,))
+        if removed:
+            logging.info("Checkpoint retention: removed %s stale run(s)", removed)
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Failed to clean up checkpoints: %s", e)
+
+
+def run_once_with_model(
+    model_id: str,
+    hedge: HedgeToken | None = None,
+    checkpoint: RunCheckpoint | None = None,
+) -> Dict[str, Any]:
+    ckpt = checkpoint or RunCheckpoint()
+    reset = _HEDGE.set(hedge)
+    try:
+        with trace("pipeline", model=model_id) as root:
+            return _run_stages(model_id, ckpt, root, hedge)
+    finally:
+        _HEDGE.reset(reset)
+
+
+def _run_stages(model_id: str, ckpt: RunCheckpoint, root: Span, hedge: HedgeToken | None) -> Dict[str, Any]:
+    done = ckpt.load("upserted")
+    if done is not None:
+        logging.info("Run %s already completed; nothing to resume", ckpt.run_id)
+        return done["summary"]
+
+    llm = build_llm(model=model_id)
+    t0 = time.time()
+
+    # Hedged attempts may not write before claiming the run, so they never stream rows
+    streamer = StreamedUpserts(t0) if stream_enabled() and hedge is None else None
+    # Hedged attempts share the run id, so each keeps its own manifest until it wins
+    artifacts = (
+        ArtifactStore().run(ckpt.run_id, attempt=model_id if hedge is not None else None, model=model_id)
+        if artifacts_enabled()
+        else None
     )
 
-    # Pydantic validation stage: ensure strict schema prior to DB upsert
-    validated_events: List[Dict[str, Any]] = []
-    pydantic_dropped: List[Dict[str, Any]] = []
-    for e in sanitized_valid:
+    known_index: KnownUrlIndex | None = None
+    validated_stage = ckpt.load("validated")
+    if validated_stage is None:
+        # Stage 1: research (single crew) -> URL list
+        with span("research") as s:
+            research = ckpt.load("research")
+            if research is not None:
+                urls, research_text = list(research["urls"]), str(research["text"])
+                s.set(restored=True)
+                logging.info("Run %s: restored research stage (%s URL(s))", ckpt.run_id, len(urls))
+            else:
+                urls, research_text = run_research(llm)
+                ckpt.save("research", {"urls": urls, "text": research_text, "model": model_id})
+            s.set(urls=len(urls))
+        _put_artifact(artifacts, "research/text", research_text)
+        _put_artifact(artifacts, "research/urls", urls)
+        _check_hedge()
+
+        # Drop URLs already in funding_events before paying for scraping/extraction
+        with span("known_urls") as s:
+            known_index = load_known_url_index() if urls else None
+            if known_index is not None:
+                urls, known = known_index.partition(urls)
+                s.set(skipped=len(known))
+                if known:
+                    logging.info("Skipping %s already-ingested URL(s); %s left to verify", len(known), len(urls))
+
+        # Stage 2: per-URL verification fan-out; wall-clock tracks the slowest article
+        def _verify(u: str) -> Tuple[List[Dict[str, Any]], str]:
+            with span("url", url=u) as s:
+                restored = ckpt.load_extraction(u)
+                if restored is not None:
+                    s.set(restored=True)
+                    logging.debug("Run %s: restored extraction for %s", ckpt.run_id, u)
+                    events_u, text_u = restored
+                else:
+                    _check_hedge()
+                    with stream_events(partial(streamer.handle, u)) if streamer is not None else nullcontext():
+                        events_u, text_u = verify_url(llm, u)
+                    ckpt.save_extraction(u, events_u, text_u)
+                    s.set(events=len(events_u))
+                _put_artifact(artifacts, f"output/{u}", text_u)
+                _put_artifact(artifacts, f"events/{u}", events_u)
+                return events_u, text_u
+
+        with span("verify", urls=len(urls)):
+            try:
+                events, outputs, verify_errors = verify_urls(urls, _verify)
+            finally:
+                # Keep whatever was verified for post-mortems, even if the stage failed
+                _save_artifacts(artifacts, hedge=hedge)
+        if verify_errors:
+            logging.warning("%s of %s URL(s) failed verification", len(verify_errors), len(urls))
+
+        result_text = "\n\n".join(
+            ["=== research ===", research_text]
+            + [f"=== {u} ===\n{outputs[u]}" for u in urls if u in outputs]
+        )
+        logging.info("Crew results received (%s chars)", len(result_text))
+        logging.debug("Crew raw result preview:\n%s", result_text[:1000])
         try:
-            fe = FundingEvent(**e)
-            validated_events.append(fe.to_db_dict())
-        except ValidationError as ve:
-            # Persist errors for offline debugging alongside sanitizer drops
-            pydantic_dropped.append({**e, "__reason": "pydantic_validation_error", "__errors": ve.errors()})
+            out_path = os.path.join(os.path.dirname(__file__), "last_result.txt")
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(result_text)
+            logging.debug("Wrote raw result to %s", out_path)
+        except Exception as write_err:  # pragma: no cover
+            logging.warning("Failed to persist raw result: %s", write_err)
+
+        raw_count = len(events)
+        # Single pass: normalization, sanitizer rules and the FundingEvent schema together
+        with span("validate", rows=raw_count):
+            validated_events, rejects = validate_events(events)
+        schema_rejects = sum(1 for r in rejects if r.reason == REASON_INVALID_RECORD)
+        logging.info(
+            "Validated events: %s valid, %s dropped (raw %s)",
+            len(validated_events),
+            len(rejects),
+            raw_count,
+        )
 
-    if pydantic_dropped:
-        logging.info("Pydantic validation dropped %s additional event(s)", len(pydantic_dropped))
+        counts = {
+            "raw_count": raw_count,
+            "sanitized_valid_count": len(validated_events),
+            "sanitized_dropped_count": len(rejects) - schema_rejects,
+            "validated_count": len(validated_events),
+            "validation_dropped_count": schema_rejects,
+        }
+        # One row per funding round: collapse reports of it from several outlets
+        if dedupe_enabled():
+            with span("dedupe", rows=len(validated_events)) as s:
+                validated_events, merged = dedupe_events(
+                    validated_events, prefer=streamer.streamed_urls() if streamer is not None else None
+                )
+                s.set(merged=merged)
+            counts["merged_count"] = merged
+            if merged:
+                logging.info("Merged %s duplicate report(s); %s event(s) left", merged, len(validated_events))
+        combined_dropped = reject_records(rejects)
+        _put_artifact(
+            artifacts, "validated", {"counts": counts, "validated_events": validated_events, "dropped": combined_dropped}
+        )
+        _save_artifacts(artifacts, hedge=hedge)
+        ckpt.save(
+            "validated",
+            {"counts": counts, "validated_events": validated_events, "dropped": combined_dropped, "model": model_id},
+        )
+    else:
+        counts = dict(validated_stage["counts"])
+        validated_events = list(validated_stage["validated_events"])
+        combined_dropped = list(validated_stage["dropped"])
+        logging.info(
+            "Run %s: restored validated stage (%s event(s)); resuming at upsert",
+            ckpt.run_id,
+            len(validated_events),
+        )
 
-    # Combine drops and persist for inspection
-    combined_dropped = sanitized_dropped + pydantic_dropped
-    if combined_dropped:
-        try:
-            import json as _json
-            drop_path = os.path.join(os.path.dirname(__file__), "dropped_events.json")
-            with open(drop_path, "w", encoding="utf-8") as f:
-                _json.dump(combined_dropped, f, ensure_ascii=False, indent=2)
-            logging.debug("Wrote dropped events to %s", drop_path)
-        except Exception as persist_err:  # pragma: no cover
-            logging.debug("Failed to persist dropped events: %s", persist_err)
-        # Emit an info-level summary of drop reasons for quick diagnosis in logs
-        try:
-            reason_counts: Dict[str, int] = {}
-            for d in combined_dropped:
-                r = d.get("__reason", "unknown")
-                reason_counts[r] = reason_counts.get(r, 0) + 1
-            if reason_counts:
-                summary = ", ".join(f"{k}={v}" for k, v in reason_counts.items())
-                logging.info("Drop reasons summary: %s", summary)
-        except Exception as _e:  # pragma: no cover
-            logging.debug("Failed to summarize drop reasons: %s", _e)
+    # Hedged runs: only the first attempt to get here may write anything
+    if hedge is not None:
+        if not hedge.claim(model_id):
+            raise RunCancelled(f"hedged attempt with {model_id} lost")
+        # From here on the run's own checkpoint and manifest hold the winner's stages
+        ckpt = ckpt.promote()
+        if artifacts is not None:
+            try:
+                artifacts.promote()
+            except Exception as e:  # noqa: BLE001
+                logging.warning("Failed to promote run artifacts: %s", e)
 
+    upsert_error = None
+    rejected: List[Dict[str, Any]] = []
     if validated_events:
-        upsert_resp = upsert_funding_events(validated_events)
-        logging.info("Upsert response: %s", upsert_resp)
+        pending_rows = streamer.pending(validated_events) if streamer is not None else validated_events
+        if pending_rows:
+            with span("upsert", rows=len(pending_rows)):
+                upsert_resp = upsert_funding_events(pending_rows)
+            chunks = upsert_resp.get("chunks") or []
+            logging.info(
+                "Upsert: %s row(s) in %s request(s), %s ms total",
+                len(pending_rows),
+                len(chunks),
+                round(sum(c.get("ms") or 0 for c in chunks)),
+            )
+            upsert_error = upsert_resp.get("error")
+            rejected = list(upsert_resp.get("rejected") or [])
+            if upsert_error and (upsert_resp.get("failed") or not rejected):
+                # Leave the validated checkpoint in place so `--resume` retries just the upsert
+                raise RuntimeError(f"Supabase upsert failed for run {ckpt.run_id}: {upsert_error}")
+            # Rows the database refused one by one become drops; the rest of the batch is in
+            for r in rejected:
+                combined_dropped.append({**r["row"], "__reason": REASON_UPSERT_REJECTED, "__error": r["error"]})
+            if rejected:
+                logging.warning("%s row(s) rejected by the database: %s", len(rejected), upsert_error)
+        else:
+            logging.info("All %s validated event(s) were already upserted while streaming", len(validated_events))
+        if known_index is None:
+            known_index = load_known_url_index()
+        if known_index is not None:
+            try:
+                rejected_urls = {r["row"].get("source_url") for r in rejected}
+                known_index.add(
+                    u for e in validated_events if e["source_url"] not in rejected_urls
+                    for u in e.get("sources") or [e["source_url"]]
+                )
+                known_index.save()
+            except Exception as idx_err:  # pragma: no cover
+                logging.debug("Failed to update known-URL index: %s", idx_err)
     else:
         logging.info("No valid events after validation; skipping Supabase upsert.")
 
+    # Append drops to the ledger (history across runs; see pipeline.scripts.drops)
+    if combined_dropped:
+        try:
+            drop_path = DropLedger().append(combined_dropped, run_id=ckpt.run_id, model=model_id)
+            logging.debug("Appended %s dropped event(s) to %s", len(combined_dropped), drop_path)
+        except Exception as persist_err:  # pragma: no cover
+            logging.warning("Failed to append dropped events to the ledger: %s", persist_err)
+        _summarize_drop_reasons(combined_dropped)
+
+    if streamer is not None:
+        root.set(streamed_rows=streamer.count, first_row_ms=streamer.first_row_ms)
+
+    usage = summarize_usage(root, validated_count=counts["validated_count"])
+    logging.info(
+        "LLM usage: %s prompt + %s completion tokens, cost %s USD, %s tokens/validated event",
+        usage["prompt_tokens"],
+        usage["completion_tokens"],
+        usage["cost_usd"],
+        usage["tokens_per_validated_event"],
+    )
+
+    summary = {
+        "events_count": len(validated_events) - len(rejected),
+        "dropped_count": len(combined_dropped),
+        "model": model_id,
+        "run_id": ckpt.run_id,
+        "tokens": usage["total_tokens"],
+    }
+    ckpt.save("upserted", {"summary": summary})
+    _tidy_checkpoints(ckpt)
+    _put_artifact(artifacts, "summary", summary)
+    _save_artifacts(artifacts, prune=True)
+
     # Telemetry: record successful run
     try:
         duration_ms = int((time.time() - t0) * 1000)
         record = build_run_record(
             model=model_id,
-            raw_count=raw_count,
-            sanitized_valid_count=len(sanitized_valid),
-            sanitized_dropped_count=len(sanitized_dropped),
-            validated_count=len(validated_events),
-            validation_dropped_count=len(pydantic_dropped),
             duration_ms=duration_ms,
             status="ok",
+            hedge=hedge.describe() if hedge is not None else None,
+            run_id=ckpt.run_id,
+            spans=root.to_dict(),
+            stage_ms=root.flatten(),
+            usage=usage,
+            **counts,
         )
         insert_run(record)
     except Exception as tel_err:  # pragma: no cover
         logging.debug("Telemetry record failed: %s", tel_err)
 
-    return {"events_count": len(validated_events), "dropped_count": len(combined_dropped), "model": model_id}
+    return summary
+
+
+def _record_error_run(
+    model: str,
+    duration_ms: int,
+    error: Exception,
+    hedge: HedgeToken | None = None,
+    run_id: str | None = None,
+) -> None:
+    try:
+        record = build_run_record(
+            model=model,
+            raw_count=0,
+            sanitized_valid_count=0,
+            sanitized_dropped_count=0,
+            validated_count=0,
+            validation_dropped_count=0,
+            duration_ms=duration_ms,
+            status="error",
+            error=str(error),
+            hedge=hedge.describe() if hedge is not None else None,
+            run_id=run_id,
+        )
+        insert_run(record)
+    except Exception:  # pragma: no cover
+        pass
+
+
+def _hedge_enabled() -> bool:
+    return os.getenv("LLM_HEDGE", "false").strip().strip('"').lower() in ("1", "true", "yes", "on")
+
+
+def _hedge_delay_ms(primary: str) -> Tuple[int, str]:
+    """Hedge threshold: LLM_HEDGE_DELAY_MS if set, else p95 of the primary's recent runs.
+
+    Falls back to LLM_HEDGE_DEFAULT_DELAY_MS (default 120000) without enough telemetry.
+    """
+    env_delay = os.getenv("LLM_HEDGE_DELAY_MS", "").strip().strip('"')
+    if env_delay:
+        try:
+            return max(0, int(env_delay)), "env"
+        except ValueError:
+            logging.warning("Ignoring invalid LLM_HEDGE_DELAY_MS=%r", env_delay)
+    p95 = fetch_duration_p95(primary)
+    if p95 is not None:
+        return p95, "p95"
+    try:
+        return int(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "120000").strip().strip('"')), "default"
+    except ValueError:
+        return 120000, "default"
+
+
+def run_hedged(models: List[str], checkpoint: RunCheckpoint | None = None) -> Dict[str, Any]:
+    """Start the primary model; if it has not finished within the hedge delay (or fails
+    with a rate-limit error), start the next fallback in parallel. The first attempt to
+    reach the upsert stage wins and the others are cancelled at their next check (stage
+    boundary, URL or LLM call). Each attempt checkpoints under its own directory; the
+    winner's stages are copied into the run once it claims the upsert.
+    """
+    ckpt = checkpoint or RunCheckpoint()
+    delay_ms, delay_source = _hedge_delay_ms(models[0])
+    token = HedgeToken(delay_ms, delay_source)
+    logging.info("Hedged model fallback enabled: delay %sms (%s)", delay_ms, delay_source)
+    t0 = time.time()
+    pending: Dict[Future, str] = {}
+    next_idx = 0
+    last_error: Exception | None = None
+    pool = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="hedge")
+
+    def _start_next() -> None:
+        nonlocal next_idx
+        model_id = models[next_idx]
+        next_idx += 1
+        token.started(model_id)
+        logging.info("Attempting pipeline with model: %s", model_id)
+        pending[pool.submit(run_once_with_model, model_id, token, checkpoint=ckpt.attempt(model_id))] = model_id
+
+    try:
+        _start_next()
+        while pending:
+            timeout = delay_ms / 1000.0 if next_idx < len(models) else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logging.warning(
+                    "No result within %sms; hedging with %s", delay_ms, models[next_idx]
+                )
+                _start_next()
+                continue
+            for fut in done:
+                model_id = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except RunCancelled:
+                    logging.info("Hedged attempt with %s cancelled", model_id)
+                    continue
+                except Exception as e:  # noqa: BLE001
+                    last_error = e
+                    if _is_rate_limit_error(e) and not _is_non_retryable_error(e):
+                        logging.warning("Model %s hit rate limit/quota during hedged run", model_id)
+                        if next_idx < len(models):
+                            _start_next()
+                        continue
+                    token.cancel()
+                    logging.error("Hedged attempt with %s failed: %s", model_id, e)
+                    _record_error_run(model_id, int((time.time() - t0) * 1000), e, token, ckpt.run_id)
+                    raise
+                logging.info("Hedged run won by %s (candidates: %s)", model_id, token.candidates)
+                return {**result, "hedge": token.describe()}
+    finally:
+        token.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    assert last_error is not None
+    _record_error_run(";".join(token.candidates), int((time.time() - t0) * 1000), last_error, token, ckpt.run_id)
+    raise RuntimeError(
+        f"All configured LLM models failed due to rate limits or errors. Last error: {last_error}"
+    )
 
 
-def run() -> Dict[str, Any]:
+def run(resume: str | None = None) -> Dict[str, Any]:
+    """Run the pipeline with model fallback. `resume` continues a checkpointed run id."""
     models = _parse_model_fallbacks()
     if not models:  # Extra guard (should not happen)
         models = ["gemini-2.0-flash"]
+    ckpt = RunCheckpoint.resume(resume) if resume else RunCheckpoint()
+    if resume:
+        logging.info("Resuming run %s (completed stages: %s)", ckpt.run_id, ckpt.completed_stages() or "none")
+    else:
+        logging.info("Starting run %s", ckpt.run_id)
+    if _hedge_enabled() and len(models) > 1:
+        return run_hedged(models, checkpoint=ckpt)
     last_error: Exception | None = None
     for model_id in models:
         logging.info("Attempting pipeline with model: %s", model_id)
         attempt_t0 = time.time()
         try:
-            return run_once_with_model(model_id)
+            return run_once_with_model(model_id, checkpoint=ckpt)
         except Exception as e:  # noqa: BLE001
             last_error = e
             if _is_non_retryable_error(e):
                 logging.error("Non-retryable error with model %s: %s", model_id, e)
-                try:
-                    duration_ms = int((time.time() - attempt_t0) * 1000)
-                    record = build_run_record(
-                        model=model_id,
-                        raw_count=0,
-                        sanitized_valid_count=0,
-                        sanitized_dropped_count=0,
-                        validated_count=0,
-                        validation_dropped_count=0,
-                        duration_ms=duration_ms,
-                        status="error",
-                        error=str(e),
-                    )
-                    insert_run(record)
-                except Exception:  # pragma: no cover
-                    pass
+                _record_error_run(model_id, int((time.time() - attempt_t0) * 1000), e, run_id=ckpt.run_id)
                 raise
             if _is_rate_limit_error(e):
                 logging.warning(
@@ -326,22 +912,7 @@ def run() -> Dict[str, Any]:
                 )
                 continue
             # Unknown error: propagate
-            try:
-                duration_ms = int((time.time() - attempt_t0) * 1000)
-                record = build_run_record(
-                    model=model_id,
-                    raw_count=0,
-                    sanitized_valid_count=0,
-                    sanitized_dropped_count=0,
-                    validated_count=0,
-                    validation_dropped_count=0,
-                    duration_ms=duration_ms,
-                    status="error",
-                    error=str(e),
-                )
-                insert_run(record)
-            except Exception:  # pragma: no cover
-                pass
+            _record_error_run(model_id, int((time.time() - attempt_t0) * 1000), e, run_id=ckpt.run_id)
             raise
 
     # If we exhausted all models
@@ -349,32 +920,24 @@ def run() -> Dict[str, Any]:
     err = RuntimeError(
         f"All configured LLM models failed due to rate limits or errors. Last error: {last_error}"
     )
-    try:
-        record = build_run_record(
-            model=";".join(models),
-            raw_count=0,
-            sanitized_valid_count=0,
-            sanitized_dropped_count=0,
-            validated_count=0,
-            validation_dropped_count=0,
-            duration_ms=0,
-            status="error",
-            error=str(last_error),
-        )
-        insert_run(record)
-    except Exception:  # pragma: no cover
-        pass
+    _record_error_run(";".join(models), 0, last_error, run_id=ckpt.run_id)
     raise err
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the funding events pipeline")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="Continue a checkpointed run from its last completed stage")
+    args = parser.parse_args()
+
     # Load env from pipeline/.env if present
     env_path = os.path.join(os.path.dirname(__file__), ".env")
     load_dotenv(env_path, override=False)
 
     setup_logging()
     try:
-        summary = run()
+        summary = run(resume=args.resume)
         logging.info("Run complete: %s", summary)
     except Exception as e:
         logging.exception("Pipeline run failed: %s", e)
@@ -0,0 +1,112 @@
+"""
+Inspect, replay and prune the run artifact store (see pipeline/artifacts.py).
+
+Usage:
+  python -m pipeline.scripts.artifacts list
+  python -m pipeline.scripts.artifacts show <run_id> [<name>]   # manifest, or one artifact's content
+  python -m pipeline.scripts.artifacts replay <run_id>          # re-parse + re-validate stored outputs
+  python -m pipeline.scripts.artifacts prune
+
+`replay` runs the current JSON extraction and validation over a run's stored crew
+outputs, without any LLM call, and compares the counts with what the run recorded.
+Parser or sanitizer changes can be checked against real outputs this way.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+from pipeline.artifacts import ArtifactStore
+from pipeline.utils.event_sanitizer import validate_events
+
+_OUTPUT = "output/"
+
+
+def replay_run(store: ArtifactStore, run_id: str) -> Dict[str, Any]:
+    """Re-parse and re-validate a run's stored crew outputs; returns per-URL and total counts."""
+    # Imported here: main pulls in the agent modules, which `list`/`prune` do not need
+    from pipeline.main import events_from_output
+
+    manifest = store.load_manifest(run_id)
+    if manifest is None:
+        raise FileNotFoundError(f"No artifacts stored for run {run_id}")
+    names = manifest.get("artifacts", {})
+    urls: List[Dict[str, Any]] = []
+    events: List[Dict[str, Any]] = []
+    for name in sorted(names):
+        if not name.startswith(_OUTPUT):
+            continue
+        url = name[len(_OUTPUT):]
+        parsed = events_from_output(url, store.get(names[name]))
+        stored = f"events/{url}"
+        urls.append({
+            "url": url,
+            "events": len(parsed),
+            "recorded_events": len(store.get(names[stored])) if stored in names else None,
+        })
+        events.extend(parsed)
+    rows, rejects = validate_events(events)
+    recorded = store.get(names["validated"]).get("counts") if "validated" in names else None
+    return {
+        "run_id": run_id,
+        "model": manifest.get("model"),
+        "urls": urls,
+        "raw_count": len(events),
+        "validated_count": len(rows),
+        "dropped_count": len(rejects),
+        "recorded_counts": recorded,
+        "changed": [u["url"] for u in urls if u["recorded_events"] is not None and u["events"] != u["recorded_events"]],
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run artifact store")
+    parser.add_argument("--dir", default=None, help="Store directory (default: ARTIFACT_DIR)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Stored runs, oldest first")
+    p_show = sub.add_parser("show", help="A run's manifest, or one artifact")
+    p_show.add_argument("run_id")
+    p_show.add_argument("name", nargs="?")
+    p_replay = sub.add_parser("replay", help="Re-parse and re-validate stored outputs without the LLM")
+    p_replay.add_argument("run_id")
+    sub.add_parser("prune", help="Apply ARTIFACT_RETENTION_DAYS / ARTIFACT_MAX_BYTES now")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(args.dir)
+    try:
+        if args.cmd == "list":
+            for m in store.runs():
+                arts = m.get("artifacts", {})
+                print(json.dumps({
+                    "run_id": m.get("run_id"),
+                    "model": m.get("model"),
+                    "created_at": m.get("created_at"),
+                    "artifacts": len(arts),
+                    "bytes": sum(int(a.get("size") or 0) for a in arts.values()),
+                }))
+        elif args.cmd == "show":
+            if args.name:
+                value = store.read(args.run_id, args.name)
+                if isinstance(value, str):
+                    sys.stdout.write(value)
+                else:
+                    print(json.dumps(value, ensure_ascii=False, indent=2, default=str))
+            else:
+                manifest = store.load_manifest(args.run_id)
+                if manifest is None:
+                    raise FileNotFoundError(f"No artifacts stored for run {args.run_id}")
+                print(json.dumps(manifest, ensure_ascii=False, indent=2))
+        elif args.cmd == "replay":
+            print(json.dumps(replay_run(store, args.run_id), ensure_ascii=False))
+        elif args.cmd == "prune":
+            print(json.dumps(store.prune()))
+    except (FileNotFoundError, KeyError) as e:
+        print(json.dumps({"ok": False, "error": str(e)}))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,481 @@
+"""
+Micro-benchmarks for pipeline hot paths on synthetic data.
+
+Usage:
+  python -m pipeline.scripts.bench validate [--rows 100000] [--repeat 3]
+  python -m pipeline.scripts.bench classify [--rows 100000] [--repeat 3]
+  python -m pipeline.scripts.bench json [--mb 4] [--repeat 3] [--run-id RUN_ID]
+  python -m pipeline.scripts.bench dedupe [--rows 100000] [--repeat 3]
+  python -m pipeline.scripts.bench html [--mb 10] [--repeat 3]
+
+Each benchmark prints one JSON object per measured variant with rows/s, so results
+can be compared across commits.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from pipeline.artifacts import ArtifactStore
+from pipeline.models import FundingEvent, ValidationError
+from pipeline.utils.event_sanitizer import ClimateClassifier, load_taxonomy, validate_events
+from pipeline.utils.dedupe import dedupe_events
+from pipeline.utils.html_candidates import available_backends
+from pipeline.utils.json_utils import extract_json
+
+_SECTORS = ["Energy Storage", "Grid Software", "Solar", "EV Charging", "Hydrogen", "Fintech", "Developer Tools", "Healthcare", None, ""]
+_STAGES = ["Seed", "Series A", "Series B ", None]
+_AMOUNTS = ["$50,000,000", "12000000", 7_500_000, 3.2e6, None, "undisclosed"]
+
+
+def synthetic_events(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Realistic-looking mix of valid rows and the usual LLM mistakes."""
+    rnd = random.Random(seed)
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        out.append(
+            {
+                "startup_name": rnd.choice([f" Startup {i} ", f"Startup {i}", "", None]) if rnd.random() < 0.05 else f"Startup {i}",
+                "source_url": rnd.choice(["http://news.example/a", None]) if rnd.random() < 0.03 else f"https://news.example/{i}",
+                "amount_raised_usd": rnd.choice(_AMOUNTS),
+                "funding_date": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" if rnd.random() < 0.9 else "2025-13-40",
+                "geography": rnd.choice([" US ", "Germany", None]),
+                "funding_stage": rnd.choice(_STAGES),
+                "lead_investor": rnd.choice(["Breakthrough Energy Ventures", None]),
+                "sub_sector": rnd.choice(_SECTORS),
+            }
+        )
+    return out
+
+
+def _per_row_models(events: List[Dict[str, Any]]) -> int:
+    # Reference: the schema alone, one FundingEvent per row (pre-batch main.py validation step)
+    ok = 0
+    for e in events:
+        try:
+            FundingEvent(**e).to_db_dict()
+            ok += 1
+        except ValidationError:
+            pass
+    return ok
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_validate(rows: int, repeat: int) -> None:
+    events = synthetic_events(rows)
+    variants = {
+        "validate_events": lambda: validate_events(events),
+        "per_row_FundingEvent": lambda: _per_row_models(events),
+    }
+    valid, rejects = validate_events(events)
+    for name, fn in variants.items():
+        secs = _time(fn, repeat)
+        print(json.dumps({
+            "bench": "validate",
+            "variant": name,
+            "rows": rows,
+            "valid": len(valid),
+            "rejected": len(rejects),
+            "seconds": round(secs, 4),
+            "rows_per_s": int(rows / secs) if secs else None,
+        }))
+
+
+def _legacy_substring_filter(taxonomy: Dict[str, Any]) -> Callable[[Any, Any], bool]:
+    # The pre-taxonomy filter: substring scans over flat keyword lists
+    positive = [t.lower() for terms in taxonomy["sectors"].values() for t in terms]
+    negative = [t.lower() for t in taxonomy.get("negative", [])]
+    names = [t.lower() for t in taxonomy.get("negative_names", [])]
+
+    def _relevant(sub: Any, name: Any) -> bool:
+        sub_l = sub.lower().strip() if isinstance(sub, str) else ""
+        name_l = name.lower().strip() if isinstance(name, str) else ""
+        if any(neg in (sub_l + " " + name_l) for neg in negative):
+            return False
+        if any(bad in name_l for bad in names):
+            return False
+        if sub_l:
+            return any(pos in sub_l for pos in positive)
+        return True
+
+    return _relevant
+
+
+def _inflated_taxonomy(taxonomy: Dict[str, Any], factor: int) -> Dict[str, Any]:
+    # Same taxonomy plus (factor - 1) x as many synthetic terms that never match
+    sectors = dict(taxonomy["sectors"])
+    negative = list(taxonomy.get("negative", []))
+    for k in range(factor - 1):
+        for tag, terms in taxonomy["sectors"].items():
+            sectors[f"{tag}_{k}"] = [f"{t} zz{k}" if " " in t else f"{t}zz{k}" for t in terms]
+        negative += [f"{t}zz{k}" for t in taxonomy.get("negative", [])]
+    return {**taxonomy, "sectors": sectors, "negative": negative}
+
+
+def bench_classify(rows: int, repeat: int) -> None:
+    events = synthetic_events(rows)
+    pairs = [(e.get("sub_sector"), e.get("startup_name")) for e in events]
+    base = load_taxonomy()
+    for factor in (1, 10):
+        taxonomy = _inflated_taxonomy(base, factor)
+        n_terms = sum(len(t) for t in taxonomy["sectors"].values()) + len(taxonomy["negative"])
+        legacy = _legacy_substring_filter(taxonomy)
+        variants = {
+            "legacy_substring": lambda: [legacy(s, n) for s, n in pairs],
+            # Fresh classifier per run so its sub-sector cache starts cold
+            "compiled_classifier": lambda: [c.classify(s, n) for c in [ClimateClassifier(taxonomy)] for s, n in pairs],
+        }
+        for name, fn in variants.items():
+            secs = _time(fn, repeat)
+            print(json.dumps({
+                "bench": "classify",
+                "variant": name,
+                "rows": rows,
+                "terms": n_terms,
+                "seconds": round(secs, 4),
+                "rows_per_s": int(rows / secs) if secs else None,
+            }))
+
+
+def synthetic_agent_output(target_bytes: int, seed: int = 42) -> str:
+    """Chatty ReAct-style transcript: tool calls, scraped prose with stray braces and
+    quotes, repeated mentions of "events": and a final answer holding the payload."""
+    rnd = random.Random(seed)
+    parts: List[str] = []
+    size = 0
+    i = 0
+    while size < target_bytes * 0.8:
+        chunk = (
+            f"Thought: check article {i}\n"
+            f'Action: Read website content\nAction Input: {{"website_url": "https://news.example/{i}"}}\n'
+            f"Observation: Startup {i} raised funds {{per filings}} and said \"events\": were great; "
+            f"the \"events\": list [{i}] follows. " + "lorem ipsum " * rnd.randint(20, 80) + "\n"
+        )
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    events = synthetic_events(max(1, int(target_bytes * 0.2) // 260), seed=seed)
+    parts.append("Final Answer: ```json\n" + json.dumps({"events": events}) + "\n```")
+    return "".join(parts)
+
+
+def _legacy_extract_json(text: str) -> Dict[str, Any]:
+    # json_utils.extract_json before the single-pass scanner (strategies 1-4)
+    text = (text or "").strip()
+
+    def _try_load(s: str) -> Any:
+        try:
+            obj = json.loads(s)
+        except Exception:
+            return None
+        if isinstance(obj, list):
+            return {"events": obj}
+        return obj if isinstance(obj, dict) else None
+
+    parsed = _try_load(text)
+    if parsed is not None:
+        return parsed
+    for pattern in (r"```json\s*(.*?)```", r"```\s*(.*?)```"):
+        for m in re.finditer(pattern, text, re.DOTALL | re.IGNORECASE):
+            parsed = _try_load(m.group(1).strip())
+            if parsed is not None:
+                return parsed
+    for ev_match in re.finditer(r'"events"\s*:', text, re.IGNORECASE):
+        start_idx = text.rfind("{", 0, ev_match.start())
+        if start_idx == -1:
+            continue
+        depth = 0
+        end_idx = -1
+        for i in range(start_idx, len(text)):
+            ch = text[i]
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    end_idx = i
+                    break
+        if end_idx != -1:
+            parsed = _try_load(text[start_idx : end_idx + 1])
+            if parsed is not None:
+                return parsed
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        parsed = _try_load(text[start : end + 1])
+        if parsed is not None:
+            return parsed
+    raise ValueError("Could not parse JSON from text")
+
+
+def stored_outputs(run_id: str) -> List[str]:
+    """Raw verification outputs of a past run from the artifact store."""
+    store = ArtifactStore()
+    manifest = store.load_manifest(run_id)
+    if manifest is None:
+        raise SystemExit(f"No artifacts stored for run {run_id}")
+    arts = manifest.get("artifacts", {})
+    return [store.get(arts[name]) for name in sorted(arts) if name.startswith("output/")]
+
+
+def _extract_all(fn: Callable[[str], Dict[str, Any]], texts: List[str]) -> int:
+    events = 0
+    for text in texts:
+        try:
+            events += len(fn(text).get("events") or [])
+        except ValueError:
+            pass
+    return events
+
+
+def bench_json(mb: float, repeat: int, run_id: str | None = None) -> None:
+    if run_id:
+        inputs = [(stored_outputs(run_id), f"run:{run_id}")]
+    else:
+        synthetic = synthetic_agent_output(int(mb * 1024 * 1024))
+        inputs = [
+            ([synthetic], "fenced_final_answer"),
+            # Same transcript without the code fence: legacy falls through to its brace scans
+            ([synthetic.replace("```json", "").replace("```", "")], "unfenced"),
+        ]
+    for texts, label in inputs:
+        size = sum(len(t.encode("utf-8")) for t in texts)
+        for name, fn in (("legacy", _legacy_extract_json), ("single_pass", extract_json)):
+            events = _extract_all(fn, texts)
+            secs = _time(lambda: _extract_all(fn, texts), repeat)
+            print(json.dumps({
+                "bench": "json",
+                "input": label,
+                "variant": name,
+                "bytes": size,
+                "events": events,
+                "seconds": round(secs, 4),
+                "mb_per_s": round(size / 1024 / 1024 / secs, 2) if secs else None,
+            }))
+
+
+_SYLLABLES = ["vol", "ta", "gri", "dex", "sol", "ar", "hy", "dro", "ne", "on", "car", "bo", "ther", "mo", "flux", "ion", "ra", "ve", "zen", "lu"]
+
+
+def synthetic_reports(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Validated-shape funding events where ~40% of rounds are reported 2-3 times with
+    the usual variations: name casing/suffix/typos, amounts +-5%, dates a few days apart."""
+    rnd = random.Random(seed)
+    out: List[Dict[str, Any]] = []
+    i = 0
+    while len(out) < n:
+        name = "".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize() + f" {rnd.choice(_SYLLABLES)}{i % 97}"
+        amount = rnd.choice([1, 2, 3, 5, 8, 12, 20, 35, 50, 80, 120]) * 1_000_000
+        day = rnd.randint(1, 28)
+        month = rnd.randint(1, 12)
+        for copy in range(rnd.choice([1, 1, 1, 2, 3])):
+            variant = name if copy == 0 else rnd.choice([name.upper(), name + " Inc.", name[:-1] + name[-1] * 2, name])
+            out.append({
+                "startup_name": variant,
+                "amount_raised_usd": int(amount * rnd.uniform(0.96, 1.04)) if copy else amount,
+                "funding_date": f"2025-{month:02d}-{min(28, day + copy * rnd.randint(0, 3)):02d}",
+                "funding_stage": rnd.choice(["Seed", "Series A", None]) if copy == 0 else None,
+                "source_url": f"https://news.example/{i}/{copy}",
+                "geography": None,
+                "lead_investor": None,
+                "sub_sector": "Solar",
+            })
+        i += 1
+    return out[:n]
+
+
+def bench_dedupe(rows: int, repeat: int) -> None:
+    events = synthetic_reports(rows)
+    out, merged = dedupe_events(events)
+    secs = _time(lambda: dedupe_events(events), repeat)
+    print(json.dumps({
+        "bench": "dedupe",
+        "variant": "blocking_index",
+        "rows": rows,
+        "merged": merged,
+        "seconds": round(secs, 4),
+        "rows_per_s": round(rows / secs) if secs else None,
+    }))
+
+
+def synthetic_list_page(target_bytes: int, seed: int = 42) -> str:
+    """Startup directory page: cards, list items and definition lists linking out to
+    company sites (some twice), mixed with nav/social links, scripts, comments and
+    relative links."""
+    rnd = random.Random(seed)
+    parts: List[str] = [
+        "<html><head><title>Climate startups</title><style>.card{margin:0}</style></head><body>",
+        "<nav><a href='/'>Home</a><a href='https://twitter.com/list'>Twitter</a></nav>",
+    ]
+    size = 0
+    i = 0
+    while size < target_bytes:
+        name = "".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(2, 3))).capitalize()
+        site = f"https://www.{name.lower()}{i}.{rnd.choice(['com', 'io', 'energy', 'co.uk', 'com.au'])}/"
+        kind = i % 4
+        if kind == 0:
+            chunk = (
+                f"<div class='card'><h3><a href='{site}'>{name} Energy</a></h3>"
+                f"<p>{'lorem ipsum ' * rnd.randint(5, 30)} <a href='{site}about'>Read more</a></p>"
+                f"<a href='https://www.linkedin.com/company/{name.lower()}'>LinkedIn</a></div>\n"
+            )
+        elif kind == 1:
+            chunk = f"<ul><li><strong>{name}</strong> &mdash; <a href='{site}' title='{name}'>website</a></li></ul>\n"
+        elif kind == 2:
+            chunk = f"<dl><dt>{name} Inc.</dt><dd><a href='{site}'><span>{name}</span></a></dd></dl>\n"
+        else:
+            chunk = (
+                f"<!-- card {i} --><script>track({i}, '<a href=\\'x\\'>')</script>"
+                f"<h2>{name} Hydrogen <a href='/companies/{i}'>profile</a> <a href='{site}'>site</a></h2>\n"
+            )
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append("<footer><a href='mailto:hi@list.example'>Contact</a></footer></body></html>")
+    return "".join(parts)
+
+
+def _legacy_heuristic_extract(html: str, base_url: str, max_items: int = 300) -> List[Dict[str, Optional[str]]]:
+    # seed_companies.heuristic_extract before the single-pass scanner: BeautifulSoup,
+    # one find_all for anchors plus a CSS select and a find() per heading, substring
+    # ban-list scans and second-to-last-label domain names
+    from bs4 import BeautifulSoup  # type: ignore
+
+    from pipeline.seed_companies import _BAN_DOMAINS, _clean_name
+    from pipeline.utils.slug import slugify
+
+    def _domain(netloc: str) -> str:
+        return netloc.lower()
+
+    def _sld(host: str) -> str:
+        parts = host.split(".")
+        return parts[-2] if len(parts) >= 2 else host
+
+    soup = BeautifulSoup(html, "html.parser")
+    base_host = _domain(urlparse(base_url).netloc)
+    seen: set = set()
+    results: List[Dict[str, Optional[str]]] = []
+
+    def add(name: str, website: Optional[str]) -> None:
+        name_clean = _clean_name(name)
+        if not name_clean or len(name_clean) < 2 or len(name_clean) > 80:
+            return
+        slug = slugify(name_clean)
+        if not slug or slug in seen:
+            return
+        seen.add(slug)
+        results.append({"name": name_clean, "website": website})
+
+    for a in soup.find_all("a", href=True):
+        if len(results) >= max_items:
+            break
+        href = a.get("href")
+        if not href or any(href.startswith(p) for p in ("#", "mailto:", "tel:", "javascript:")):
+            continue
+        abs_url = urljoin(base_url, href)
+        p = urlparse(abs_url)
+        if p.scheme not in ("http", "https") or not p.netloc:
+            continue
+        host = _domain(p.netloc)
+        if host == base_host or any(b in host for b in _BAN_DOMAINS):
+            continue
+        add(_clean_name(a.get_text(strip=True) or a.get("title", "")) or _sld(host), abs_url)
+
+    for node in soup.select("h1, h2, h3, h4, li, dt"):
+        if len(results) >= max_items:
+            break
+        name = _clean_name(node.get_text(" ", strip=True))
+        if not name:
+            continue
+        link = node.find("a", href=True)
+        if not link:
+            continue
+        abs_url = urljoin(base_url, link.get("href"))
+        p = urlparse(abs_url)
+        host = _domain(p.netloc)
+        if p.scheme in ("http", "https") and host and host != base_host and not any(b in host for b in _BAN_DOMAINS):
+            add(name, abs_url)
+    return results
+
+
+def bench_html(mb: float, repeat: int) -> None:
+    from pipeline.seed_companies import heuristic_extract, website_key
+
+    html = synthetic_list_page(int(mb * 1024 * 1024))
+    base = "https://list.example/startups"
+    size = len(html.encode("utf-8"))
+    # max_items high enough that every candidate is visited
+    limit = 1_000_000
+    variants: Dict[str, Callable[[], Any]] = {"legacy_bs4_two_pass": lambda: _legacy_heuristic_extract(html, base, limit)}
+    for backend in available_backends():
+        variants[f"single_pass_{backend}"] = lambda b=backend: heuristic_extract(html, base, limit, backend=b)
+    reference = variants["legacy_bs4_two_pass"]()
+    for name, fn in variants.items():
+        tracemalloc.start()
+        out = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        secs = _time(fn, repeat)
+        print(json.dumps({
+            "bench": "html",
+            "variant": name,
+            "bytes": size,
+            "companies": len(out),
+            # Extra rows pointing at a website domain already listed
+            "duplicate_sites": len(out) - len({website_key(c["website"]) for c in out}),
+            "same_output": out == reference,
+            "seconds": round(secs, 4),
+            "mb_per_s": round(size / 1024 / 1024 / secs, 2) if secs else None,
+            "peak_mb": round(peak / 1024 / 1024, 1),
+        }))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pipeline micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p_val = sub.add_parser("validate", help="Batch event validation throughput")
+    p_val.add_argument("--rows", type=int, default=100_000)
+    p_val.add_argument("--repeat", type=int, default=3)
+    p_cls = sub.add_parser("classify", help="Climate-relevance classifier throughput vs taxonomy size")
+    p_cls.add_argument("--rows", type=int, default=100_000)
+    p_cls.add_argument("--repeat", type=int, default=3)
+    p_json = sub.add_parser("json", help="JSON extraction throughput on long agent transcripts")
+    p_json.add_argument("--mb", type=float, default=4.0)
+    p_json.add_argument("--repeat", type=int, default=3)
+    p_json.add_argument("--run-id", default=None, help="Use a stored run's crew outputs instead of synthetic text")
+    p_dd = sub.add_parser("dedupe", help="Funding-event entity resolution throughput")
+    p_dd.add_argument("--rows", type=int, default=100_000)
+    p_dd.add_argument("--repeat", type=int, default=3)
+    p_html = sub.add_parser("html", help="Heuristic list-page extraction throughput and peak memory")
+    p_html.add_argument("--mb", type=float, default=10.0)
+    p_html.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.bench == "validate":
+        bench_validate(args.rows, args.repeat)
+    elif args.bench == "classify":
+        bench_classify(args.rows, args.repeat)
+    elif args.bench == "json":
+        bench_json(args.mb, args.repeat, args.run_id)
+    elif args.bench == "dedupe":
+        bench_dedupe(args.rows, args.repeat)
+    elif args.bench == "html":
+        bench_html(args.mb, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+"""
+Query the dropped-events ledger (see pipeline/utils/drop_ledger.py).
+
+Usage:
+  python -m pipeline.scripts.drops                       # last 7 days, counts per reason/day/run
+  python -m pipeline.scripts.drops --since 2026-10-01 --until 2026-10-15
+  python -m pipeline.scripts.drops --run-id 20261016T070000Z-1a2b3c4d --list
+  python -m pipeline.scripts.drops --reason non_climate --list --limit 20
+
+Reasons: invalid_record, missing_startup_name, invalid_source_url, non_climate
+(sanitizer and schema) and upsert_rejected (refused by the database).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from pipeline.utils.drop_ledger import DropLedger, summarize_drops
+from pipeline.utils.event_sanitizer import DROP_REASONS
+
+
+def _date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aggregate dropped events over a date range")
+    parser.add_argument("--since", type=_date, help="First UTC day (default: 7 days ago)")
+    parser.add_argument("--until", type=_date, help="Last UTC day, inclusive (default: today)")
+    parser.add_argument("--dir", default=None, help="Ledger directory (default: DROP_LEDGER_DIR)")
+    parser.add_argument("--run-id", default=None, help="Only drops of this run")
+    parser.add_argument("--reason", default=None, help=f"Only drops with this reason ({', '.join(DROP_REASONS)})")
+    parser.add_argument("--list", action="store_true", help="Print matching entries (JSONL) instead of counts")
+    parser.add_argument("--limit", type=int, default=0, help="Max entries with --list (0 = all)")
+    args = parser.parse_args(argv)
+
+    today = datetime.now(timezone.utc).date()
+    since = args.since or (today - timedelta(days=7))
+    until = args.until or today
+
+    entries = (
+        e
+        for e in DropLedger(args.dir).entries(since, until)
+        if (args.run_id is None or e.get("run_id") == args.run_id)
+        and (args.reason is None or e.get("reason") == args.reason)
+    )
+    if args.list:
+        for n, e in enumerate(entries, 1):
+            print(json.dumps(e, ensure_ascii=False))
+            if args.limit and n >= args.limit:
+                break
+        return 0
+
+    summary = summarize_drops(entries)
+    print(json.dumps({"since": since.isoformat(), "until": until.isoformat(), **summary}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
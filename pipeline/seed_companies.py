@@ -4,13 +4,16 @@ Seed companies from list articles and similar sources.
 
 - Scrapes provided URLs (startup lists, reports, blog posts) and extracts company names
   and, when available, official websites.
-- Upserts into Supabase `companies` table with `slug`, optional `website`, `updated_at`.
+- Upserts into Supabase `companies` table with `slug`, optional `website`, `updated_at`,
+  in chunked bulk requests (see `upsert_companies`).
 - Can be run in Docker (see pipeline/Dockerfile) or locally in a compatible Python env.
 
 Usage:
   python -m pipeline.seed_companies --url <URL> [--url <URL> ...]
   # Heuristic (non-LLM) mode to avoid LLM quota
   python -m pipeline.seed_companies --heuristic --url <URL> [...]
+  # Heuristic mode that also follows pagination / category pages of the same site
+  python -m pipeline.seed_companies --crawl --url <URL> [--max-depth 2] [--max-pages 50]
 
 Env (copy `pipeline/.env`):
 - SUPABASE_URL
@@ -29,23 +32,32 @@ import json
 import logging
 import os
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 from dotenv import load_dotenv
 
-from pipeline.supabase_client import get_client
+from pipeline.supabase_client import upsert_rows
 from pipeline.llm.gemini_client import build_llm
+from pipeline.llm.usage import summarize_usage
 from pipeline.utils.json_utils import extract_json
+from pipeline.utils.domains import DomainSet, domain_label, registrable_domain
+from pipeline.utils.crawl import NEXT, Frontier, RobotsCache, crawl_user_agent, discover_links
+from pipeline.utils.fetcher import body_limits, concurrency_limit, fetch_concurrently, host_gate, new_session
+from pipeline.utils.html_candidates import Candidates, html_backend, scan_candidates
+from pipeline.utils.http_cache import body_digest, cached_get, get_extraction_cache
+from pipeline.utils.slug import slugify
+from pipeline.utils.spans import bind_context, span, trace
 
 # Heuristic mode deps are optional and only used when --heuristic is passed
+# (HTML parsing: lxml or beautifulsoup4, see utils/html_candidates.py)
 try:
     import requests  # type: ignore
-    from bs4 import BeautifulSoup  # type: ignore
 except Exception:  # pragma: no cover
     requests = None  # type: ignore
-    BeautifulSoup = None  # type: ignore
 
 
 LOG = logging.getLogger(__name__)
@@ -56,66 +68,124 @@ def setup_logging() -> None:
     logging.basicConfig(level=getattr(logging, level, logging.INFO), format="%(levelname)s %(message)s")
 
 
-def slugify(name: str) -> str:
-    s = (name or "").strip().lower()
-    # replace non-alphanumeric with hyphens
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = s.strip("-")
-    s = re.sub(r"-+", "-", s)
-    return s[:80]
-
-
-def upsert_company(slug: str, website: Optional[str], name: Optional[str] = None) -> Dict[str, Any]:
-    client = get_client()
-    table = os.getenv("SUPABASE_COMPANIES_TABLE", "companies").strip() or "companies"
-    now_iso = datetime.now(timezone.utc).isoformat()
-
-    record: Dict[str, Any] = {"slug": slug, "updated_at": now_iso}
+def company_record(slug: str, website: Optional[str], name: Optional[str] = None, now_iso: Optional[str] = None) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"slug": slug, "updated_at": now_iso or datetime.now(timezone.utc).isoformat()}
     if website:
         record["website"] = website
     if name:
         record["name"] = name
+    return record
 
+
+def website_key(website: Optional[str]) -> Optional[str]:
+    """Registrable domain (eTLD+1) of a website URL, e.g. "gridco.co.uk"; None if unparseable."""
+    if not website:
+        return None
     try:
-        resp = client.table(table).upsert(record, on_conflict="slug").execute()
-        data = getattr(resp, "data", None)
-        error = getattr(resp, "error", None)
-        return {"data": data, "error": error}
-    except Exception as e:  # pragma: no cover
-        LOG.exception("Supabase upsert failed: %s", e)
-        return {"data": None, "error": str(e)}
+        host = urlparse(website if "//" in website else f"//{website}").hostname
+    except ValueError:
+        return None
+    return registrable_domain(host) if host else None
+
+
+def merge_companies(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse records sharing a slug or a website domain, in first-seen order; a record
+    with a website wins. "GridCo" at gridco.com and "Gridco Energy" at www.gridco.com/about
+    become one row under the first slug."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    by_site: Dict[str, str] = {}
+    for r in records:
+        slug = r["slug"]
+        site = website_key(r.get("website"))
+        if slug not in merged and site in by_site:
+            slug = by_site[site]
+            r = {**r, "slug": slug}
+        existing = merged.get(slug)
+        if existing is None:
+            merged[slug] = dict(r)
+        elif r.get("website") and not existing.get("website"):
+            merged[slug] = {**existing, **r}
+        else:
+            for k, v in r.items():
+                existing.setdefault(k, v)
+        if site and site not in by_site and website_key(merged[slug].get("website")) == site:
+            by_site[site] = slug
+    return list(merged.values())
+
+
+def upsert_companies(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bulk upsert company records on `slug` (chunked, retried; see `upsert_rows`).
+
+    Rows are grouped by their set of columns: in a bulk request PostgREST writes NULL
+    for columns a row lacks, which would clear a website we already know. Returns
+    {"data", "error", "upserted", "errors"}, where `errors` maps slug -> message for
+    rows that were rejected or could not be written.
+    """
+    rows = merge_companies(records)
+    table = os.getenv("SUPABASE_COMPANIES_TABLE", "companies").strip() or "companies"
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault(tuple(sorted(r)), []).append(r)
+
+    data: List[Any] = []
+    errors: Dict[str, str] = {}
+    for group in groups.values():
+        try:
+            resp = upsert_rows(table, group, on_conflict="slug")
+        except Exception as e:  # pragma: no cover
+            LOG.exception("Supabase upsert failed: %s", e)
+            errors.update({r["slug"]: str(e) for r in group})
+            continue
+        data.extend(resp.get("data") or [])
+        for bad in (resp.get("rejected") or []) + (resp.get("failed") or []):
+            errors[bad["row"]["slug"]] = bad["error"]
+    for slug, err in errors.items():
+        LOG.warning("Upsert error for %s: %s", slug, err)
+    return {
+        "data": data,
+        "error": next(iter(errors.values()), None),
+        "upserted": len(rows) - len(errors),
+        "errors": errors,
+    }
 
 
-def _heuristic_fetch(url: str, timeout: int = 20) -> Optional[str]:
+def upsert_company(slug: str, website: Optional[str], name: Optional[str] = None) -> Dict[str, Any]:
+    resp = upsert_companies([company_record(slug, website, name)])
+    return {"data": resp["data"], "error": resp["error"]}
+
+
+_BROWSER_UA = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0 Safari/537.36"
+)
+
+
+def _heuristic_fetch(
+    url: str, timeout: float = 20, session: Any = None, user_agent: Optional[str] = None
+) -> Optional[str]:
     if requests is None:
         LOG.error("requests not installed; cannot run heuristic mode")
         return None
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0 Safari/537.36"
-        )
-    }
+    headers = {"User-Agent": user_agent or _BROWSER_UA}
     try:
-        resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        if resp.status_code >= 400:
-            LOG.warning("Fetch %s failed with status %s", url, resp.status_code)
+        # Streamed: non-HTML is rejected from its headers, oversized or slow bodies are cut off
+        resp = cached_get(url, headers=headers, timeout=timeout, session=session, accept=("text/html",), **body_limits())
+        if resp.status >= 400:
+            LOG.warning("Fetch %s failed with status %s", url, resp.status)
             return None
-        ct = resp.headers.get("content-type", "").lower()
+        ct = resp.content_type.lower()
         if "text/html" not in ct:
             LOG.warning("Skip non-HTML content at %s: %s", url, ct)
             return None
+        if resp.from_cache:
+            LOG.debug("Served %s from HTTP cache", url)
         return resp.text
     except Exception as e:
         LOG.warning("Fetch error for %s: %s", url, e)
         return None
 
 
-def _domain(host: str) -> str:
-    return host.lower()
-
-
 _BAN_DOMAINS = (
     "twitter.com",
     "x.com",
@@ -130,6 +200,8 @@ _BAN_DOMAINS = (
     "angel.co",
     "dealroom.co",
 )
+# Matches each listed domain and its subdomains, label by label
+_BANNED = DomainSet(_BAN_DOMAINS)
 
 
 def _clean_name(text: str) -> str:
@@ -154,81 +226,158 @@ def _clean_name(text: str) -> str:
     return t.strip().strip("- ")
 
 
-def _sld(host: str) -> str:
-    parts = host.split(".")
-    if len(parts) >= 2:
-        return parts[-2]
-    return host
+def heuristic_extract(
+    html: str, base_url: str, max_items: int = 300, backend: Optional[str] = None
+) -> List[Dict[str, Optional[str]]]:
+    """Companies linked from a list page, as [{"name", "website"}], de-duplicated by slug
+    and by the website's registrable domain.
+
+    One pass over the page (see `utils/html_candidates.py`) collects every anchor and
+    every heading/list item with its first link. Anchors pointing off-site come first
+    (text, title or domain as the name), then headings whose link points off-site.
+    Off-site means another registrable domain than the page's (`utils/domains.py`), so
+    links to the list's own blog or shop subdomains are skipped too. Each distinct href
+    is resolved once.
+    """
+    if html_backend(backend) is None:
+        LOG.error("Neither lxml nor beautifulsoup4 installed; cannot run heuristic mode")
+        return []
+    return companies_from_candidates(scan_candidates(html, backend), base_url, max_items)
 
 
-def heuristic_extract(html: str, base_url: str, max_items: int = 300) -> List[Dict[str, Optional[str]]]:
-    if BeautifulSoup is None:
-        LOG.error("beautifulsoup4 not installed; cannot run heuristic mode")
-        return []
-    soup = BeautifulSoup(html, "html.parser")
-    base_host = _domain(urlparse(base_url).netloc)
+def companies_from_candidates(
+    candidates: Candidates, base_url: str, max_items: int = 300
+) -> List[Dict[str, Optional[str]]]:
+    """The company-picking half of `heuristic_extract`, for an already scanned page."""
+    base_host = urlparse(base_url).hostname or ""
+    base_site = registrable_domain(base_host) or base_host
     seen: set[str] = set()
+    seen_sites: set[str] = set()
     results: List[Dict[str, Optional[str]]] = []
-
-    def add(name: str, website: Optional[str]):
-        nonlocal results
+    resolved: Dict[str, Tuple[str, Optional[str], str]] = {}
+
+    def external(href: str) -> Tuple[str, Optional[str], str]:
+        # (absolute URL, host, registrable domain); host None unless it is an http(s)
+        # link to another, allowed site
+        hit = resolved.get(href)
+        if hit is None:
+            abs_url = urljoin(base_url, href)
+            try:
+                p = urlparse(abs_url)
+                host = p.hostname or ""
+            except ValueError:
+                p, host = None, ""
+            site = (registrable_domain(host) or host) if host else ""
+            ok = p is not None and p.scheme in ("http", "https") and host and site != base_site and not _BANNED.contains(host)
+            hit = resolved[href] = (abs_url, host if ok else None, site)
+        return hit
+
+    def add(name: str, website: str, site: str):
         name_clean = _clean_name(name)
         if not name_clean or len(name_clean) < 2 or len(name_clean) > 80:
             return
         slug = slugify(name_clean)
-        if not slug or slug in seen:
+        if not slug or slug in seen or site in seen_sites:
             return
         seen.add(slug)
-        if website and not website.lower().startswith("http"):
-            website = f"https://{website}"
+        seen_sites.add(site)
         results.append({"name": name_clean, "website": website})
 
     # Pass 1: external anchors likely pointing to official sites
-    for a in soup.find_all("a", href=True):
+    for href, text, title in candidates.anchors:
         if len(results) >= max_items:
             break
-        href = a.get("href")
-        if not href or any(href.startswith(p) for p in ("#", "mailto:", "tel:", "javascript:")):
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
             continue
-        abs_url = urljoin(base_url, href)
-        p = urlparse(abs_url)
-        if p.scheme not in ("http", "https") or not p.netloc:
+        abs_url, host, site = external(href)
+        if host is None or site in seen_sites:
             continue
-        host = _domain(p.netloc)
-        if host == base_host or any(b in host for b in _BAN_DOMAINS):
-            continue
-        text = a.get_text(strip=True) or a.get("title", "")
-        name = _clean_name(text) or _sld(host)
-        add(name, abs_url)
+        add(_clean_name(text or title) or domain_label(host), abs_url, site)
 
-    # Pass 2: headings/list items with a qualifying external link nearby
-    for node in soup.select("h1, h2, h3, h4, li, dt"):  # dt for definition lists
+    # Pass 2: headings/list items with a qualifying external link inside
+    for text, href in candidates.headings:
         if len(results) >= max_items:
             break
-        name = _clean_name(node.get_text(" ", strip=True))
-        if not name:
-            continue
-        # Try to find an anchor within the same container
-        link = node.find("a", href=True)
-        if not link:
+        name = _clean_name(text)
+        if not name or href is None:
             continue
-        abs_url = urljoin(base_url, link.get("href"))
-        p = urlparse(abs_url)
-        host = _domain(p.netloc)
-        if p.scheme in ("http", "https") and host and host != base_host and not any(b in host for b in _BAN_DOMAINS):
-            add(name, abs_url)
+        abs_url, host, site = external(href)
+        if host is not None:
+            add(name, abs_url, site)
 
     return results
 
 
+# Part of the extraction memo key; bump when heuristic_extract's output for a page changes
+_EXTRACT_VERSION = "heuristic-2"
+
+
+def _memoized(namespace: str, html: str, base_url: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+    # (result, from_memo); result must be JSON-serializable
+    memo = get_extraction_cache()
+    backend = html_backend()
+    if memo is None or backend is None:
+        return compute(), False
+    key = body_digest(f"{_EXTRACT_VERSION}:{namespace}{backend}", base_url, html)
+    entry = memo.get(key)
+    if entry is not None:
+        try:
+            return json.loads(entry.value), True
+        except ValueError:
+            pass
+    value = compute()
+    memo.set(key, json.dumps(value, ensure_ascii=False).encode("utf-8"), {"url": base_url})
+    return value, False
+
+
+def heuristic_extract_cached(html: str, base_url: str) -> Tuple[List[Dict[str, Optional[str]]], bool]:
+    """`heuristic_extract` memoized on the page body; returns (items, from_memo).
+
+    Weekly re-seeds mostly get 304s or unchanged bodies back from the HTTP cache, so the
+    parse result from last time is reused instead of parsing the page again.
+    """
+    return _memoized("", html, base_url, lambda: heuristic_extract(html, base_url))
+
+
+def crawl_extract_cached(html: str, page_url: str) -> Tuple[List[Dict[str, Optional[str]]], List[List[str]], bool]:
+    """Companies and crawlable links [url, kind] of one page, from a single scan;
+    memoized on the page body like `heuristic_extract_cached`."""
+
+    def _scan() -> Dict[str, Any]:
+        candidates = scan_candidates(html)
+        return {
+            "items": companies_from_candidates(candidates, page_url),
+            "links": [list(link) for link in discover_links(page_url, candidates)],
+        }
+
+    if html_backend() is None:
+        LOG.error("Neither lxml nor beautifulsoup4 installed; cannot run heuristic mode")
+        return [], [], False
+    value, from_memo = _memoized("crawl:", html, page_url, _scan)
+    return value["items"], value["links"], from_memo
+
+
 def run_heuristic(urls: List[str]) -> Dict[str, Any]:
+    # Pages download concurrently (see pipeline/utils/fetcher.py); each is parsed here as
+    # soon as it arrives, while the others are still in flight.
+    extracted: Dict[str, List[Dict[str, Optional[str]]]] = {}
+    memo_hits = 0
+    for outcome in fetch_concurrently(urls, lambda u, session, timeout: _heuristic_fetch(u, timeout, session)):
+        if outcome.error is not None:
+            LOG.warning("Fetch error for %s: %s", outcome.url, outcome.error)
+            continue
+        if not outcome.value:
+            continue
+        with span("extract", url=outcome.url) as s:
+            extracted[outcome.url], from_memo = heuristic_extract_cached(outcome.value, outcome.url)
+            s.set(memo=from_memo)
+        memo_hits += from_memo
+
     all_companies: Dict[str, Dict[str, Optional[str]]] = {}
     total_extracted = 0
+    # Merge in input order so the result does not depend on which page finished first
     for u in urls:
-        html = _heuristic_fetch(u)
-        if not html:
-            continue
-        items = heuristic_extract(html, u)
+        items = extracted.get(u) or []
         total_extracted += len(items)
         for c in items:
             name = c.get("name") if isinstance(c, dict) else None
@@ -242,29 +391,207 @@ def run_heuristic(urls: List[str]) -> Dict[str, Any]:
             if existing is None or (not existing.get("website") and website):
                 all_companies[slug] = {"name": name, "website": website}
 
-    upserts = 0
+    now_iso = datetime.now(timezone.utc).isoformat()
+    records = []
     for slug, entry in all_companies.items():
         site = entry.get("website")
-        resp = upsert_company(slug, site if isinstance(site, str) else None, entry.get("name") if isinstance(entry.get("name"), str) else None)
-        if not resp.get("error"):
-            upserts += 1
-        else:
-            LOG.warning("Upsert error for %s: %s", slug, resp.get("error"))
+        name = entry.get("name")
+        records.append(company_record(slug, site if isinstance(site, str) else None, name if isinstance(name, str) else None, now_iso))
+    # The same company listed on two pages under different names shares a website domain
+    records = merge_companies(records)
+    with span("upsert", rows=len(records)):
+        resp = upsert_companies(records)
+
+    return {
+        "input_urls": len(urls),
+        "fetched": len(extracted),
+        "parse_skipped": memo_hits,
+        "extracted": total_extracted,
+        "unique": len(records),
+        "upserts": resp["upserted"],
+        "errors": len(resp["errors"]),
+    }
+
 
-    return {"input_urls": len(urls), "extracted": total_extracted, "unique": len(all_companies), "upserts": upserts}
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip().strip('"'))
+    except ValueError:
+        return default
+
+
+class BatchedCompanyUpserts:
+    """Collects companies found while crawling and upserts them in batches of
+    `batch_size` on a background thread, so the crawl keeps fetching meanwhile.
+
+    A company is queued once per slug and once per website domain (as in
+    `merge_companies`); a later sighting with a website upgrades a website-less one.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Dict[str, Any]] = []
+        self._slugs: Dict[str, bool] = {}
+        self._sites: set[str] = set()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self.queued = 0
+
+    def add(self, items: List[Dict[str, Optional[str]]], now_iso: Optional[str] = None) -> int:
+        """Queue new companies from one page; returns how many were new."""
+        now_iso = now_iso or datetime.now(timezone.utc).isoformat()
+        added = 0
+        with self._lock:
+            for c in items:
+                name = c.get("name") if isinstance(c, dict) else None
+                if not isinstance(name, str):
+                    continue
+                slug = slugify(name)
+                if not slug:
+                    continue
+                website = c.get("website")
+                website = website if isinstance(website, str) else None
+                site = website_key(website)
+                had_site = self._slugs.get(slug)
+                if had_site or (had_site is not None and not website) or (site and site in self._sites):
+                    continue
+                self._slugs[slug] = bool(website)
+                if site:
+                    self._sites.add(site)
+                self._pending.append(company_record(slug, website, name, now_iso))
+                added += 1
+            self.queued += added
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+        return added
+
+    def _flush_locked(self) -> None:
+        batch, self._pending = self._pending, []
+        if batch:
+            self._futures.append(self._pool.submit(bind_context(self._upsert), batch))
+
+    @staticmethod
+    def _upsert(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with span("upsert", rows=len(batch)):
+            return upsert_companies(batch)
+
+    def close(self) -> Dict[str, Any]:
+        """Upsert what is left, wait for all batches; returns {"upserted", "errors", "batches"}."""
+        with self._lock:
+            self._flush_locked()
+        upserted = 0
+        errors: Dict[str, str] = {}
+        try:
+            for fut in self._futures:
+                try:
+                    resp = fut.result()
+                except Exception as e:  # noqa: BLE001
+                    LOG.warning("Company upsert batch failed: %s", e)
+                    continue
+                upserted += resp["upserted"]
+                errors.update(resp["errors"])
+        finally:
+            self._pool.shutdown(wait=True)
+        return {"upserted": upserted, "errors": errors, "batches": len(self._futures)}
+
+
+def run_crawl(seeds: List[str], max_depth: Optional[int] = None, max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """Heuristic seeding that also follows pagination and same-site list pages.
+
+    The frontier starts from `seeds` (depth 0). Next pages of a list keep their depth;
+    category/list links add one, up to `max_depth` (CRAWL_MAX_DEPTH). At most
+    `max_pages` pages (CRAWL_MAX_PAGES) are fetched, in waves of FETCH_CONCURRENCY
+    that share one session and one per-host gate, so politeness spacing (and any
+    robots.txt Crawl-delay) holds across waves. Disallowed URLs are never fetched, and
+    pages are requested with the same user agent robots.txt is checked against.
+    Companies stream into batched upserts (CRAWL_UPSERT_BATCH) as pages are parsed.
+    """
+    max_depth = _env_int("CRAWL_MAX_DEPTH", 2) if max_depth is None else max_depth
+    max_pages = _env_int("CRAWL_MAX_PAGES", 50) if max_pages is None else max_pages
+    frontier = Frontier()
+    for u in seeds:
+        frontier.push(u, 0)
+    workers = concurrency_limit()
+    gate = host_gate()
+    session = new_session(workers)
+    # Identify as the agent robots.txt rules are evaluated for
+    user_agent = crawl_user_agent()
+    robots = RobotsCache(session, user_agent=user_agent)
+    upserts = BatchedCompanyUpserts(_env_int("CRAWL_UPSERT_BATCH", 200))
+    stats = {"pages": 0, "failed": 0, "robots_blocked": 0, "parse_skipped": 0, "extracted": 0, "links": 0}
+    try:
+        while frontier and stats["pages"] < max_pages:
+            wave: Dict[str, int] = {}
+            while frontier and len(wave) < workers and stats["pages"] + len(wave) < max_pages:
+                url, depth = frontier.pop()
+                if not robots.allowed(url):
+                    stats["robots_blocked"] += 1
+                    continue
+                delay = robots.crawl_delay(url)
+                if delay:
+                    gate.set_delay((urlparse(url).hostname or "").lower(), delay)
+                wave[url] = depth
+            if not wave:
+                continue
+            stats["pages"] += len(wave)
+            with span("crawl_wave", pages=len(wave), frontier=len(frontier)):
+                outcomes = fetch_concurrently(
+                    list(wave),
+                    lambda u, sess, timeout: _heuristic_fetch(u, timeout, sess, user_agent=user_agent),
+                    concurrency=workers,
+                    session=session,
+                    gate=gate,
+                )
+                for outcome in outcomes:
+                    if outcome.error is not None or not outcome.value:
+                        if outcome.error is not None:
+                            LOG.warning("Fetch error for %s: %s", outcome.url, outcome.error)
+                        stats["failed"] += 1
+                        continue
+                    with span("extract", url=outcome.url) as s:
+                        items, links, from_memo = crawl_extract_cached(outcome.value, outcome.url)
+                        s.set(memo=from_memo, links=len(links))
+                    stats["parse_skipped"] += from_memo
+                    stats["extracted"] += len(items)
+                    upserts.add(items)
+                    depth = wave[outcome.url]
+                    for link, kind in links:
+                        next_depth = depth if kind == NEXT else depth + 1
+                        if next_depth <= max_depth and frontier.push(link, next_depth, kind):
+                            stats["links"] += 1
+    finally:
+        session.close()
+        resp = upserts.close()
+
+    return {
+        "mode": "crawl",
+        "input_urls": len(seeds),
+        "fetched": stats["pages"] - stats["failed"],
+        "failed": stats["failed"],
+        "robots_blocked": stats["robots_blocked"],
+        "links_queued": stats["links"],
+        "frontier_left": len(frontier),
+        "parse_skipped": stats["parse_skipped"],
+        "extracted": stats["extracted"],
+        "unique": upserts.queued,
+        "upserts": resp["upserted"],
+        "upsert_batches": resp["batches"],
+        "errors": len(resp["errors"]),
+    }
 
 
 def create_extractor(llm: Any):
     try:
         from crewai import Agent  # type: ignore
-        from crewai_tools import ScrapeWebsiteTool, TavilySearchTool  # type: ignore
+        from pipeline.agents.tools import create_scrape_tool, create_search_tool
     except Exception as e:  # pragma: no cover
         raise RuntimeError(
             "Missing dependencies. Install from pipeline/requirements.txt"
         ) from e
 
-    scraper = ScrapeWebsiteTool()
-    tavily = TavilySearchTool()
+    scraper = create_scrape_tool()
+    tavily = create_search_tool()
 
     return Agent(
         role="Climate Tech Company List Extractor",
@@ -351,40 +678,53 @@ def run_once(urls: List[str]) -> Dict[str, Any]:
         verbose=True,
     )
 
-    raw = kickoff_with_retry(crew)
-    payload = extract_json(raw)
+    with span("crew"):
+        raw = kickoff_with_retry(crew)
+    with span("extract_json"):
+        payload = extract_json(raw)
     companies = payload.get("companies") if isinstance(payload, dict) else None
     if not isinstance(companies, list):
         companies = []
 
-    seen: set[str] = set()
-    upserts = 0
+    now_iso = datetime.now(timezone.utc).isoformat()
+    records = []
     for c in companies:
-        name = (c or {}).get("name")
-        website = (c or {}).get("website")
+        if not isinstance(c, dict):
+            continue
+        name = c.get("name")
+        website = c.get("website")
         if not isinstance(name, str) or not name.strip():
             continue
         slug = slugify(name)
-        if not slug or slug in seen:
+        if not slug:
             continue
-        seen.add(slug)
         site = str(website).strip() if isinstance(website, str) and website else None
         if site and not site.lower().startswith("http"):
             site = f"https://{site}"
-        resp = upsert_company(slug, site, name if isinstance(name, str) else None)
-        if not resp.get("error"):
-            upserts += 1
-        else:
-            LOG.warning("Upsert error for %s: %s", slug, resp.get("error"))
-
-    return {"input_urls": len(urls), "extracted": len(companies), "upserts": upserts}
+        records.append(company_record(slug, site, name, now_iso))
+    # Same-slug duplicates merge in upsert_companies (the entry with a website wins)
+    with span("upsert", rows=len(records)):
+        resp = upsert_companies(records)
+
+    return {
+        "input_urls": len(urls),
+        "extracted": len(companies),
+        "upserts": resp["upserted"],
+        "errors": len(resp["errors"]),
+    }
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Seed companies from list pages")
     parser.add_argument("--url", action="append", default=[], help="Source URL (repeatable)")
     parser.add_argument("--heuristic", action="store_true", help="Use heuristic scraping (no LLM)")
+    parser.add_argument(
+        "--crawl", action="store_true", help="Heuristic mode that also follows pagination and same-site list pages"
+    )
+    parser.add_argument("--max-depth", type=int, default=None, help="Crawl link depth (default: CRAWL_MAX_DEPTH or 2)")
+    parser.add_argument("--max-pages", type=int, default=None, help="Crawl page budget (default: CRAWL_MAX_PAGES or 50)")
     args = parser.parse_args()
+    heuristic = args.heuristic or args.crawl
 
     # Load env from pipeline/.env if present
     env_path = os.path.join(os.path.dirname(__file__), ".env")
@@ -397,10 +737,17 @@ def main() -> None:
         raise SystemExit("No --url provided")
 
     try:
-        if args.heuristic:
-            summary = run_heuristic(urls)
-        else:
-            summary = run_once(urls)
+        with trace("seed", heuristic=heuristic, crawl=args.crawl) as root:
+            if args.crawl:
+                summary = run_crawl(urls, args.max_depth, args.max_pages)
+            elif args.heuristic:
+                summary = run_heuristic(urls)
+            else:
+                summary = run_once(urls)
+        summary["timings_ms"] = root.flatten()
+        summary["duration_ms"] = round(root.duration_ms, 1)
+        if not heuristic:
+            summary["usage"] = summarize_usage(root)
         LOG.info("Seeding complete: %s", json.dumps(summary, ensure_ascii=False))
     except Exception as e:
         LOG.exception("Seeding failed: %s", e)
@@ -6,19 +6,57 @@ Env vars required:
 - SUPABASE_SERVICE_ROLE_KEY
 - SUPABASE_TABLE (optional, default: funding_events)
 
+Connection pool (one client per process, see `get_client`):
+- SUPABASE_POOL_SIZE (optional, max open connections, default: 10)
+- SUPABASE_KEEPALIVE_EXPIRY (optional, seconds an idle connection is kept, default: 60)
+- SUPABASE_CONNECT_TIMEOUT (optional, seconds, default: 10)
+- SUPABASE_TIMEOUT (optional, read/write seconds per request, default: 60)
+
+Bulk upserts (see `upsert_rows`):
+- SUPABASE_UPSERT_CHUNK_SIZE (optional, rows per request, default: 500)
+- SUPABASE_UPSERT_CONCURRENCY (optional, chunks in flight, default: 4)
+- SUPABASE_UPSERT_RETRIES (optional, retries per chunk on transient errors, default: 3)
+- SUPABASE_UPSERT_RETRY_BASE_DELAY (optional, seconds, doubled per retry, default: 1)
+
 Table schema is documented in plan.md Section 6.
 """
 from __future__ import annotations
 
+import asyncio
+import atexit
 import os
 import logging
-from typing import List, Dict, Any
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from pipeline.utils.spans import bind_context, span
 
 try:
-    from supabase import create_client, Client  # type: ignore
+    from supabase import create_client, Client, ClientOptions  # type: ignore
 except Exception:  # pragma: no cover - handled at runtime
     create_client = None  # type: ignore
     Client = object  # type: ignore
+    ClientOptions = None  # type: ignore
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - installed with supabase
+    httpx = None  # type: ignore
+
+try:
+    import h2  # type: ignore  # noqa: F401
+    _HTTP2 = True
+except Exception:  # pragma: no cover - optional; HTTP/1.1 keep-alive still pools
+    _HTTP2 = False
+
+try:
+    from postgrest.types import ReturnMethod  # type: ignore
+except Exception:  # pragma: no cover - handled at runtime
+    ReturnMethod = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -39,34 +77,345 @@ def _unquote(s: str) -> str:
     return s2
 
 
-def get_client() -> "Client":
+def _credentials() -> Tuple[str, str]:
     if create_client is None:
         raise RuntimeError(
             "supabase package not installed. Please install dependencies from pipeline/requirements.txt"
         )
-    url = _get_env("SUPABASE_URL")
-    key = _get_env("SUPABASE_SERVICE_ROLE_KEY")
-    return create_client(url, key)
+    return _get_env("SUPABASE_URL"), _get_env("SUPABASE_SERVICE_ROLE_KEY")
+
+
+def _pool_options() -> Dict[str, Any]:
+    size = max(1, _env_int("SUPABASE_POOL_SIZE", 10))
+    return {
+        "limits": httpx.Limits(
+            max_connections=size,
+            max_keepalive_connections=size,
+            keepalive_expiry=_env_float("SUPABASE_KEEPALIVE_EXPIRY", 60.0),
+        ),
+        "timeout": httpx.Timeout(
+            _env_float("SUPABASE_TIMEOUT", 60.0), connect=_env_float("SUPABASE_CONNECT_TIMEOUT", 10.0)
+        ),
+        "http2": _HTTP2,
+        "follow_redirects": True,
+    }
+
+
+# Process-wide client: PostgREST requests from every thread share one pooled,
+# keep-alive httpx session instead of paying a TLS handshake per call.
+_CLIENT: Optional[Tuple[Tuple[str, str, int], Any, Any]] = None  # ((url, key, pid), client, http)
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> "Client":
+    """Shared Supabase client for this process (thread-safe, created on first use).
+
+    A change of SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY or a fork gets a new client;
+    `close_client()` releases the pool (also run at exit).
+    """
+    global _CLIENT
+    url, key = _credentials()
+    ident = (url, key, os.getpid())
+    current = _CLIENT
+    if current is not None and current[0] == ident:
+        return current[1]
+    with _CLIENT_LOCK:
+        current = _CLIENT
+        if current is not None and current[0] == ident:
+            return current[1]
+        if httpx is None or ClientOptions is None:  # pragma: no cover - very old supabase
+            client, http = create_client(url, key), None
+        else:
+            http = httpx.Client(**_pool_options())
+            client = create_client(url, key, options=ClientOptions(httpx_client=http))
+        _CLIENT = (ident, client, http)
+    if current is not None and current[0][2] == ident[2]:
+        _close_http(current[2])
+    logger.debug("Created pooled Supabase client for %s", url)
+    return client
+
+
+def _close_http(http: Any) -> None:
+    if http is None:
+        return
+    try:
+        http.close()
+    except Exception as e:  # pragma: no cover - best effort
+        logger.debug("Failed to close Supabase HTTP pool: %s", e)
+
+
+def close_client() -> None:
+    """Close the shared client's connection pool; the next `get_client()` reconnects."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        current, _CLIENT = _CLIENT, None
+    # A forked child must not close sockets it shares with its parent
+    if current is not None and current[0][2] == os.getpid():
+        _close_http(current[2])
+
+
+# Async callers get one client per event loop (httpx.AsyncClient is bound to its loop)
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Tuple[str, str], Any, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def get_async_client() -> Any:
+    """Shared async Supabase client for the running event loop."""
+    from supabase import AsyncClientOptions, acreate_client  # type: ignore
+
+    url, key = _credentials()
+    loop = asyncio.get_running_loop()
+    current = _ASYNC_CLIENTS.get(loop)
+    if current is not None and current[0] == (url, key):
+        return current[1]
+    http = httpx.AsyncClient(**_pool_options())
+    client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http))
+    _ASYNC_CLIENTS[loop] = ((url, key), client, http)
+    if current is not None:
+        await current[2].aclose()
+    return client
+
+
+async def aclose_client() -> None:
+    """Close the running loop's async client pool."""
+    current = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if current is not None:
+        await current[2].aclose()
+
+
+atexit.register(close_client)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_unquote(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_unquote(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+# Postgres SQLSTATEs / HTTP statuses worth retrying as-is: statement timeouts,
+# serialization failures, deadlocks, connection limits and gateway/overload errors.
+# Fatal errors (see below) fail the whole request; anything else is treated as a
+# problem with the rows themselves and bisected.
+_TRANSIENT_CODES = {"57014", "40001", "40P01", "53300", "429", "500", "502", "503", "504"}
+_TRANSIENT_MARKERS = (
+    "timeout",
+    "timed out",
+    "temporarily unavailable",
+    "service unavailable",
+    "bad gateway",
+    "too many requests",
+    "connection reset",
+    "connection refused",
+    "server disconnected",
+)
+
+
+def is_transient_upsert_error(error: Any) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__module__.startswith(("httpx", "httpcore")):
+        return True
+    code = str(getattr(error, "code", "") or "").upper()
+    if code:
+        # SQLSTATE class 08 = connection exceptions
+        return code in _TRANSIENT_CODES or code.startswith("08")
+    msg = str(error).lower()
+    return any(m in msg for m in _TRANSIENT_MARKERS)
+
+
+# Errors no row can fix: PostgREST request/schema-cache/JWT errors (PGRST1xx-3xx;
+# PGRST0xx are connection errors), SQLSTATE classes 42 (undefined table/column,
+# privileges) and 28 (invalid authorization), and HTTP 401/403/404.
+_FATAL_HTTP = {"401", "403", "404"}
+_FATAL_MARKERS = (
+    "permission denied",
+    "invalid api key",
+    "jwt expired",
+    "invalid jwt",
+    "schema cache",
+)
+
+
+def is_fatal_upsert_error(error: Any) -> bool:
+    code = str(getattr(error, "code", "") or "").upper()
+    if code:
+        if code.startswith("PGRST"):
+            return not code.startswith("PGRST0")
+        return code in _FATAL_HTTP or code.startswith(("42", "28"))
+    msg = str(error).lower()
+    return any(m in msg for m in _FATAL_MARKERS)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+
+def upsert_rows(
+    table: str,
+    rows: List[Dict[str, Any]],
+    *,
+    on_conflict: str,
+    client: Any = None,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    returning: str = "minimal",
+) -> Dict[str, Any]:
+    """Upsert `rows` into `table` in chunks, several chunks at a time.
+
+    - transient failures (timeouts, 5xx, deadlocks) are retried with exponential backoff
+    - fatal failures (auth, missing table/column, bad request) fail the whole chunk
+      without bisecting: every row would be refused the same way
+    - any other failure bisects the chunk until the offending rows are isolated, so one
+      bad row costs O(log chunk) extra requests and never loses the rest of the batch
+    - `returning="minimal"` (default) asks PostgREST not to echo rows back
+
+    Returns {"data", "error", "rejected", "failed", "chunks"}: `rejected` holds single
+    rows the database refused ({"row", "error"}), `failed` rows that were not written
+    after exhausting retries or because of a fatal error, `chunks` per-request metrics ({"rows", "ms", "attempts",
+    "error"}), and `error` the first error message when anything was not written.
+    """
+    if not rows:
+        return {"data": [], "error": None, "rejected": [], "failed": [], "chunks": []}
+
+    client = client or get_client()
+    size = max(1, chunk_size or _env_int("SUPABASE_UPSERT_CHUNK_SIZE", 500))
+    workers = max(1, concurrency or _env_int("SUPABASE_UPSERT_CONCURRENCY", 4))
+    retries = max(0, _env_int("SUPABASE_UPSERT_RETRIES", 3))
+    base_delay = max(0.0, _env_float("SUPABASE_UPSERT_RETRY_BASE_DELAY", 1.0))
+    kwargs: Dict[str, Any] = {"on_conflict": on_conflict}
+    if ReturnMethod is not None:
+        kwargs["returning"] = ReturnMethod(returning)
+
+    def _send(chunk: List[Dict[str, Any]], metrics: List[Dict[str, Any]]) -> Tuple[Any, Optional[Exception]]:
+        # One request with retries on transient errors; returns (data, last_error)
+        attempt = 0
+        while True:
+            attempt += 1
+            t0 = time.perf_counter()
+            error: Optional[Exception] = None
+            data = None
+            with span("upsert_chunk", rows=len(chunk), attempt=attempt) as s:
+                try:
+                    resp = client.table(table).upsert(chunk, **kwargs).execute()
+                    data = getattr(resp, "data", None)
+                    resp_error = getattr(resp, "error", None)
+                    if resp_error:
+                        error = RuntimeError(str(resp_error))
+                except Exception as e:  # noqa: BLE001 - classified below
+                    error = e
+                if error is not None:
+                    s.set(failed=type(error).__name__)
+            metrics.append({
+                "rows": len(chunk),
+                "ms": round((time.perf_counter() - t0) * 1000.0, 1),
+                "attempts": attempt,
+                "error": str(error) if error is not None else None,
+            })
+            if error is None:
+                return data, None
+            if attempt > retries or not is_transient_upsert_error(error):
+                return None, error
+            delay = base_delay * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.warning("Transient upsert error on %s row(s), retry %d/%d in %.1fs: %s",
+                           len(chunk), attempt, retries, delay, error)
+            time.sleep(delay)
+
+    def _upsert_chunk(chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"data": [], "rejected": [], "failed": [], "chunks": []}
+        pending = [chunk]
+        while pending:
+            part = pending.pop()
+            data, error = _send(part, out["chunks"])
+            if error is None:
+                if isinstance(data, list):
+                    out["data"].extend(data)
+                continue
+            if is_transient_upsert_error(error) or is_fatal_upsert_error(error):
+                out["failed"].extend({"row": r, "error": str(error)} for r in part)
+            elif len(part) == 1:
+                out["rejected"].append({"row": part[0], "error": str(error)})
+            else:
+                mid = len(part) // 2
+                pending.extend([part[mid:], part[:mid]])
+        return out
+
+    chunks = _chunks(rows, size)
+    if workers == 1 or len(chunks) == 1:
+        results = [_upsert_chunk(c) for c in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks)), thread_name_prefix="upsert") as pool:
+            results = list(pool.map(bind_context(_upsert_chunk), chunks))
+
+    merged: Dict[str, Any] = {"data": [], "error": None, "rejected": [], "failed": [], "chunks": []}
+    for r in results:
+        for k in ("data", "rejected", "failed", "chunks"):
+            merged[k].extend(r[k])
+    problems = merged["failed"] + merged["rejected"]
+    if problems:
+        merged["error"] = problems[0]["error"]
+    total_ms = sum(c["ms"] for c in merged["chunks"])
+    logger.info(
+        "Upserted %s/%s row(s) into %s in %s request(s) (%.0f ms total); %s rejected, %s failed",
+        len(rows) - len(problems),
+        len(rows),
+        table,
+        len(merged["chunks"]),
+        total_ms,
+        len(merged["rejected"]),
+        len(merged["failed"]),
+    )
+    return merged
 
 
 def upsert_funding_events(events: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Upsert a list of funding event dicts into Supabase with dedupe on source_url."""
+    """Upsert a list of funding event dicts into Supabase with dedupe on source_url.
+
+    Thin wrapper over `upsert_rows`; see there for the chunking/retry/result shape.
+    """
     if not events:
         logger.info("No events to upsert.")
         return {"data": [], "error": None}
 
-    client = get_client()
     table = _unquote(os.getenv("SUPABASE_TABLE", "funding_events"))
-
     try:
-        # Postgrest response typically has .data and .error
-        resp = client.table(table).upsert(events, on_conflict="source_url").execute()
-        data = getattr(resp, "data", None)
-        error = getattr(resp, "error", None)
-        logger.info("Upserted %s events into %s", len(events), table)
-        if error:
-            logger.error("Supabase upsert error: %s", error)
-        return {"data": data, "error": error}
+        resp = upsert_rows(table, events, on_conflict="source_url")
     except Exception as e:  # pragma: no cover
         logger.exception("Exception during Supabase upsert: %s", e)
         return {"data": None, "error": str(e)}
+    if resp["error"]:
+        logger.error("Supabase upsert error: %s", resp["error"])
+    return resp
+
+
+def fetch_source_urls(since: Optional[str] = None, page_size: int = 1000) -> List[Tuple[str, str]]:
+    """Return (source_url, created_at) pairs from the funding events table.
+
+    When `since` (ISO timestamp) is given only rows created at or after it are
+    returned, which lets callers refresh a local index incrementally.
+    """
+    client = get_client()
+    table = _unquote(os.getenv("SUPABASE_TABLE", "funding_events"))
+    rows: List[Tuple[str, str]] = []
+    offset = 0
+    while True:
+        query = client.table(table).select("source_url, created_at")
+        if since:
+            query = query.gte("created_at", since)
+        resp = query.order("created_at").range(offset, offset + page_size - 1).execute()
+        data = getattr(resp, "data", None) or []
+        for r in data:
+            if r.get("source_url"):
+                rows.append((r["source_url"], r.get("created_at") or ""))
+        if len(data) < page_size:
+            break
+        offset += page_size
+    return rows
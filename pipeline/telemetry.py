@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import logging
+import math
 import os
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from . import supabase_client
 
@@ -25,8 +26,14 @@ def build_run_record(
     duration_ms: int,
     status: str,
     error: Optional[str] = None,
+    hedge: Optional[Dict[str, Any]] = None,
+    run_id: Optional[str] = None,
+    spans: Optional[Dict[str, Any]] = None,
+    stage_ms: Optional[Dict[str, float]] = None,
+    usage: Optional[Dict[str, Any]] = None,
+    merged_count: Optional[int] = None,
 ) -> Dict[str, Any]:
-    return {
+    record = {
         "ts": _iso_now(),
         "model": model,
         "raw_count": int(raw_count),
@@ -38,6 +45,25 @@ def build_run_record(
         "status": status,
         "error": error,
     }
+    # Optional columns are only sent when set so older table schemas keep accepting inserts
+    if hedge is not None:
+        record["hedge"] = hedge
+    if run_id is not None:
+        record["run_id"] = run_id
+    if merged_count is not None:
+        record["merged_count"] = int(merged_count)
+    if spans is not None:
+        record["spans"] = spans
+    if stage_ms is not None:
+        record["stage_ms"] = stage_ms
+    if usage is not None:
+        # Headline numbers get their own columns for cheap SQL; the breakdown stays in JSONB
+        record["usage"] = usage
+        record["prompt_tokens"] = int(usage.get("prompt_tokens") or 0)
+        record["completion_tokens"] = int(usage.get("completion_tokens") or 0)
+        record["cost_usd"] = usage.get("cost_usd")
+        record["tokens_per_event"] = usage.get("tokens_per_validated_event")
+    return record
 
 
 def insert_run(record: Dict[str, Any]) -> Dict[str, Any]:
@@ -60,3 +86,38 @@ def insert_run(record: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:  # pragma: no cover
         logger.debug("Telemetry insert skipped/failure: %s", e)
         return {"data": None, "error": str(e)}
+
+
+def _percentile(values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def fetch_duration_p95(model: str, limit: int = 50, min_samples: int = 5) -> Optional[int]:
+    """Return p95 duration_ms over the model's most recent successful runs.
+
+    Returns None when telemetry is unavailable or there are fewer than
+    `min_samples` runs to estimate from.
+    """
+    table = os.getenv("TELEMETRY_TABLE", "pipeline_runs").strip() or "pipeline_runs"
+    try:
+        client = supabase_client.get_client()
+        resp = (
+            client.table(table)
+            .select("duration_ms")
+            .eq("model", model)
+            .eq("status", "ok")
+            .order("ts", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        rows = getattr(resp, "data", None) or []
+    except Exception as e:  # pragma: no cover
+        logger.debug("Telemetry p95 lookup failed for %s: %s", model, e)
+        return None
+    durations = [int(r["duration_ms"]) for r in rows if isinstance(r, dict) and r.get("duration_ms") is not None]
+    if len(durations) < min_samples:
+        return None
+    return _percentile(durations, 95)
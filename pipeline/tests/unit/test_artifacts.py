@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+from pipeline import main
+from pipeline.artifacts import ArtifactStore
+from pipeline.checkpoint import RunCheckpoint
+from pipeline.scripts import artifacts as artifacts_cli
+
+
+def _blobs(root):
+    return sorted(n for _, _, files in os.walk(os.path.join(root, "blobs")) for n in files)
+
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    a = store.run("r1", model="m")
+    a.put("research/text", "same output " * 100)
+    a.put("research/urls", {"b": 1, "a": [1, 2]})
+    a.save()
+    b = store.run("r2", model="m")
+    b.put("research/text", "same output " * 100)
+    b.put("research/urls", {"a": [1, 2], "b": 1})  # equal JSON, different key order
+    b.save()
+
+    assert len(_blobs(str(tmp_path))) == 2
+    info = store.load_manifest("r2")["artifacts"]["research/text"]
+    assert info["kind"] == "text" and info["stored"] < info["size"]
+    assert store.read("r1", "research/text") == "same output " * 100
+    assert store.read("r2", "research/urls") == {"a": [1, 2], "b": 1}
+    assert [m["run_id"] for m in store.runs()] == ["r1", "r2"]
+
+
+def test_prune_by_age_and_size_keeps_shared_blobs(tmp_path):
+    store = ArtifactStore(str(tmp_path), retention_days=30, max_bytes=1000)
+    for run_id, values in (("r1", ["shared", "old"]), ("r2", ["shared", os.urandom(2000)]), ("r3", ["new"])):
+        run = store.run(run_id)
+        for i, value in enumerate(values):
+            run.put(f"output/{i}", value)
+        run.save()
+    # r1 is past retention; r2 (incompressible) then breaks the size cap
+    manifest = store.load_manifest("r1")
+    manifest["created_at"] = manifest["updated_at"] = "2020-01-01T00:00:00+00:00"
+    with open(os.path.join(str(tmp_path), "runs", "r1.json"), "w") as f:
+        json.dump(manifest, f)
+
+    removed = store.prune(now=time.time() + 7200)
+    assert removed["runs"] == 2 and removed["blobs"] == 3
+    assert [m["run_id"] for m in store.runs()] == ["r3"]
+    assert store.read("r3", "output/0") == "new"
+
+
+def test_run_stores_artifacts_and_replays_without_llm(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(main, "__file__", str(tmp_path / "main.py"))
+    monkeypatch.setenv("DROP_LEDGER_DIR", str(tmp_path / "drops"))
+    monkeypatch.setenv("ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(main, "build_llm", lambda model=None: object())
+    monkeypatch.setattr(main, "load_known_url_index", lambda: None)
+    monkeypatch.setattr(main, "insert_run", lambda record: None)
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1"], "research says https://n/1"))
+    output = 'Final Answer: {"events": [{"startup_name": "Gridco", "sub_sector": "Grid"}]}'
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: (main.events_from_output(u, output), output))
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: {"data": [], "error": None})
+
+    out = main.run_once_with_model("m", checkpoint=RunCheckpoint(root=str(tmp_path / "runs")))
+
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    manifest = store.load_manifest(out["run_id"])
+    assert manifest["model"] == "m"
+    assert set(manifest["artifacts"]) == {
+        "research/text", "research/urls", "output/https://n/1", "events/https://n/1", "validated", "summary",
+    }
+    assert store.read(out["run_id"], "output/https://n/1") == output
+
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: (_ for _ in ()).throw(AssertionError("no LLM on replay")))
+    assert artifacts_cli.main(["--dir", str(tmp_path / "artifacts"), "replay", out["run_id"]]) == 0
+    replay = json.loads(capsys.readouterr().out)
+    assert replay["validated_count"] == 1 and replay["changed"] == []
+    assert replay["recorded_counts"]["validated_count"] == 1
+
+
+def test_losing_hedged_attempt_never_overwrites_the_run_manifest(tmp_path, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(main, "__file__", str(tmp_path / "main.py"))
+    monkeypatch.setenv("DROP_LEDGER_DIR", str(tmp_path / "drops"))
+    monkeypatch.setenv("ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setenv("LLM_HEDGE_DELAY_MS", "50")
+    monkeypatch.setattr(main, "build_llm", lambda model=None: model)
+    monkeypatch.setattr(main, "load_known_url_index", lambda: None)
+    monkeypatch.setattr(main, "insert_run", lambda record: None)
+    monkeypatch.setattr(main, "fetch_duration_p95", lambda model: None)
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: {"data": [], "error": None})
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1"], f"research by {llm}"))
+    release = threading.Event()
+
+    def _verify(llm, u):
+        if llm == "a":
+            release.wait(5)  # still in flight when "b" wins
+        output = '{"events": [{"startup_name": "Gridco %s", "sub_sector": "Grid"}]}' % llm
+        return main.events_from_output(u, output), output
+
+    monkeypatch.setattr(main, "verify_url", _verify)
+    finished = []
+    run_once = main.run_once_with_model
+
+    def _tracked(model_id, hedge=None, checkpoint=None):
+        try:
+            return run_once(model_id, hedge, checkpoint=checkpoint)
+        finally:
+            finished.append(model_id)
+
+    monkeypatch.setattr(main, "run_once_with_model", _tracked)
+    out = main.run_hedged(["a", "b"], checkpoint=RunCheckpoint(root=str(tmp_path / "runs")))
+    assert out["model"] == "b"
+    release.set()
+    deadline = time.time() + 5
+    while "a" not in finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert "a" in finished
+
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    manifest = store.load_manifest(out["run_id"])
+    assert manifest["model"] == "b"
+    assert {"validated", "summary", "research/text"} <= set(manifest["artifacts"])
+    assert store.read(out["run_id"], "research/text") == "research by b"
+    assert "Gridco b" in store.read(out["run_id"], "output/https://n/1")
+    # The loser saved nothing after losing
+    assert not os.path.exists(os.path.join(str(tmp_path / "artifacts"), "runs", "attempts", out["run_id"]))
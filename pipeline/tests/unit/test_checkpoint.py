@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+from pipeline import main
+from pipeline.checkpoint import RunCheckpoint, prune_checkpoints
+from pipeline.utils.drop_ledger import DropLedger
+
+
+def test_stage_and_extraction_roundtrip(tmp_path):
+    ckpt = RunCheckpoint(root=str(tmp_path))
+    assert ckpt.completed_stages() == []
+    ckpt.save("research", {"urls": ["https://a"], "text": "raw"})
+    ckpt.save_extraction("https://a", [{"startup_name": "A"}], "out")
+
+    again = RunCheckpoint.resume(ckpt.run_id, root=str(tmp_path))
+    assert again.load("research") == {"urls": ["https://a"], "text": "raw"}
+    assert again.load_extraction("https://a") == ([{"startup_name": "A"}], "out")
+    assert again.load_extraction("https://b") is None
+    assert again.completed_stages() == ["research"]
+
+
+def test_resume_unknown_run_id_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RunCheckpoint.resume("nope", root=str(tmp_path))
+
+
+def test_attempt_checkpoints_are_private_until_promoted(tmp_path):
+    run = RunCheckpoint(root=str(tmp_path))
+    run.save("research", {"urls": ["https://a"], "text": "raw"})
+    a, b = run.attempt("gemini/flash"), run.attempt("pro")
+    assert a.run_id == run.run_id and a.load("research") == run.load("research")
+
+    a.save_extraction("https://a", [{"startup_name": "A"}], "from a")
+    b.save_extraction("https://a", [{"startup_name": "B"}], "from b")
+    b.save("validated", {"validated_events": []})
+    assert run.load_extraction("https://a") is None and run.completed_stages() == ["research"]
+
+    assert b.promote() is run
+    assert run.load_extraction("https://a") == ([{"startup_name": "B"}], "from b")
+    assert run.completed_stages() == ["research", "validated"]
+    assert a.load_extraction("https://a") == ([{"startup_name": "A"}], "from a")
+
+
+def test_stale_run_directories_are_pruned(tmp_path):
+    old, fresh, current = (RunCheckpoint(root=str(tmp_path)) for _ in range(3))
+    for c in (old, fresh, current):
+        c.save_extraction("https://a", [], "out")
+    stale = time.time() - 30 * 86400
+    for c in (old, current):
+        for dirpath, _, files in os.walk(c.dir):
+            for name in files + [""]:
+                os.utime(os.path.join(dirpath, name), (stale, stale))
+
+    assert prune_checkpoints(str(tmp_path), retention_days=14, keep=(current.run_id,)) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([fresh.run_id, current.run_id])
+    assert prune_checkpoints(str(tmp_path), retention_days=0) == 0
+
+
+@pytest.fixture
+def _offline(tmp_path, monkeypatch):
+    # Keep last_result.txt, the drop ledger and run artifacts out of the source tree
+    monkeypatch.setattr(main, "__file__", str(tmp_path / "main.py"))
+    monkeypatch.setenv("DROP_LEDGER_DIR", str(tmp_path / "drops"))
+    monkeypatch.setenv("ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(main, "build_llm", lambda model=None: object())
+    monkeypatch.setattr(main, "load_known_url_index", lambda: None)
+    monkeypatch.setattr(main, "insert_run", lambda record: {"data": None, "error": None})
+
+
+def _event(url):
+    return {"startup_name": "Gridco", "source_url": url, "sub_sector": "Grid"}
+
+
+def test_resume_skips_research_and_finished_extractions(tmp_path, monkeypatch, _offline):
+    ckpt = RunCheckpoint(root=str(tmp_path))
+    ckpt.save("research", {"urls": ["https://n/1", "https://n/2"], "text": "raw"})
+    ckpt.save_extraction("https://n/1", [_event("https://n/1")], "out1")
+
+    verified = []
+    upserted = []
+    records = []
+    monkeypatch.setattr(main, "insert_run", lambda record: records.append(record))
+    monkeypatch.setattr(main, "run_research", lambda llm: pytest.fail("research should be restored"))
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: (verified.append(u) or ([_event(u)], "out2")))
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: (upserted.extend(rows) or {"data": [], "error": None}))
+
+    out = main.run_once_with_model("m", checkpoint=RunCheckpoint.resume(ckpt.run_id, root=str(tmp_path)))
+
+    assert verified == ["https://n/2"]
+    assert [r["source_url"] for r in upserted] == ["https://n/1", "https://n/2"]
+    assert out["run_id"] == ckpt.run_id and out["events_count"] == 2
+    # Completed: only the summary is kept
+    assert ckpt.completed_stages() == ["upserted"] and os.listdir(ckpt.dir) == ["upserted.json"]
+    stage_ms = records[0]["stage_ms"]
+    assert {"research", "verify", "verify/url", "validate", "upsert"} <= set(stage_ms)
+    assert records[0]["spans"]["name"] == "pipeline"
+
+
+def test_failed_upsert_resumes_at_upsert_stage(tmp_path, monkeypatch, _offline):
+    ckpt = RunCheckpoint(root=str(tmp_path))
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1"], "raw"))
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: ([_event(u)], "out"))
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: {"data": None, "error": "502 bad gateway"})
+
+    with pytest.raises(RuntimeError, match="upsert failed"):
+        main.run_once_with_model("m", checkpoint=ckpt)
+    assert ckpt.completed_stages() == ["research", "validated"]
+
+    monkeypatch.setattr(main, "run_research", lambda llm: pytest.fail("research should be restored"))
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: pytest.fail("extraction should be restored"))
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: {"data": [], "error": None})
+    out = main.run_once_with_model("m", checkpoint=RunCheckpoint.resume(ckpt.run_id, root=str(tmp_path)))
+    assert out["events_count"] == 1
+
+
+def test_streamed_rows_are_upserted_during_verification(tmp_path, monkeypatch, _offline):
+    from types import SimpleNamespace
+
+    from pipeline.llm import streaming as llm_streaming
+
+    upserts = []
+    records = []
+    monkeypatch.setenv("LLM_STREAM", "true")
+    monkeypatch.setattr(main, "insert_run", lambda record: records.append(record))
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1", "https://n/2"], "raw"))
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: (upserts.append([r["source_url"] for r in rows]) or {"data": [], "error": None}))
+
+    def _verify(llm, u):
+        text = '{"events": [%s]}' % json.dumps(_event(u))
+        for ch in text:
+            llm_streaming._on_chunk(None, SimpleNamespace(chunk=ch))
+        # The row is written before the crew returns
+        assert [u] in upserts
+        if u.endswith("/2"):
+            raise RuntimeError("503 service unavailable")
+        return [_event(u)], text
+
+    monkeypatch.setattr(main, "verify_url", _verify)
+    ckpt = RunCheckpoint(root=str(tmp_path))
+    out = main.run_once_with_model("m", checkpoint=ckpt)
+
+    # The failed URL's streamed row stays written; the batch upsert skips streamed rows
+    assert sorted(upserts) == [["https://n/1"], ["https://n/2"]]
+    assert out["events_count"] == 1
+    attrs = records[0]["spans"]["attrs"]
+    assert attrs["streamed_rows"] == 2 and attrs["first_row_ms"] >= 0
+
+
+def test_rows_rejected_by_database_become_drops(tmp_path, monkeypatch, _offline):
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1", "https://n/2"], "raw"))
+    monkeypatch.setattr(main, "verify_url", lambda llm, u: ([_event(u)], "out"))
+    rejected = [{"row": _event("https://n/2"), "error": "value too long"}]
+    monkeypatch.setattr(
+        main, "upsert_funding_events",
+        lambda rows: {"data": [], "error": "value too long", "rejected": rejected, "failed": [], "chunks": []},
+    )
+    out = main.run_once_with_model("m", checkpoint=RunCheckpoint(root=str(tmp_path)))
+    assert out["events_count"] == 1 and out["dropped_count"] == 1
+    dropped = list(DropLedger(str(tmp_path / "drops")).entries())
+    assert [(d["run_id"], d["reason"], d["error"]) for d in dropped] == [(out["run_id"], "upsert_rejected", "value too long")]
+    assert dropped[0]["record"]["source_url"] == "https://n/2"
+
+
+def test_duplicate_reports_are_merged_before_upsert(tmp_path, monkeypatch, _offline):
+    upserted = []
+    records = []
+    monkeypatch.setattr(main, "insert_run", lambda record: records.append(record))
+    monkeypatch.setattr(main, "run_research", lambda llm: (["https://n/1", "https://n/2"], "raw"))
+    monkeypatch.setattr(
+        main, "verify_url",
+        lambda llm, u: ([{**_event(u), "amount_raised_usd": 1e7, "funding_date": "2024-05-01"}], "out"),
+    )
+    monkeypatch.setattr(main, "upsert_funding_events", lambda rows: (upserted.extend(rows) or {"data": [], "error": None}))
+
+    out = main.run_once_with_model("m", checkpoint=RunCheckpoint(root=str(tmp_path)))
+
+    assert out["events_count"] == 1
+    assert [r["sources"] for r in upserted] == [["https://n/1", "https://n/2"]]
+    assert records[0]["merged_count"] == 1
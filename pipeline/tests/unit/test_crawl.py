@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from pipeline import seed_companies as sc
+from pipeline.utils.crawl import CRAWL_USER_AGENT, LIST, NEXT, Frontier, RobotsCache, discover_links
+from pipeline.utils.html_candidates import scan_candidates
+
+
+def _list_page(names: List[str], extra: str = "") -> str:
+    items = "".join(f"<li><a href='https://{n.lower()}.com'>{n}</a></li>" for n in names)
+    return f"<html><body><ul>{items}</ul>{extra}</body></html>"
+
+
+def test_discover_links_finds_pagination_and_same_site_lists():
+    html = """<html><head><link rel="next" href="/startups?page=2"></head><body>
+    <a href="/startups?page=3">3</a> <a href="/archive/2025">2025</a> <a href="/startups?page=2">Next &rsaquo;</a>
+    <a href="https://blog.list.example/category/solar">Solar</a> <a href="/about">About</a>
+    <a href="https://other.example/companies">Elsewhere</a> <a href="/directory/report.pdf">PDF</a>
+    <a href="#top">Top</a></body></html>"""
+    links = discover_links("https://www.list.example/startups", scan_candidates(html))
+    assert links == [
+        ("https://www.list.example/startups?page=2", NEXT),
+        ("https://www.list.example/startups?page=3", NEXT),
+        ("https://blog.list.example/category/solar", LIST),
+    ]
+
+
+def test_frontier_orders_by_depth_then_pagination_and_dedupes():
+    f = Frontier()
+    assert f.push("https://a.example/list", 0)
+    assert f.push("https://a.example/category/x", 1, LIST)
+    assert f.push("https://a.example/list?page=2", 1, NEXT)
+    assert not f.push("https://A.example/list#top", 0)
+    assert [f.pop() for _ in range(len(f))] == [
+        ("https://a.example/list", 0),
+        ("https://a.example/list?page=2", 1),
+        ("https://a.example/category/x", 1),
+    ]
+
+
+class _Robots:
+    def __init__(self, status: int, body: str = ""):
+        self.status_code = status
+        self.headers = {"content-type": "text/plain"}
+        self._body = body.encode()
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+    def close(self):
+        pass
+
+
+class _RobotsSession:
+    def __init__(self, responses: Dict[str, _Robots]):
+        self.responses = responses
+        self.calls: List[str] = []
+        self.agents: List[str] = []
+
+    def get(self, url, **kw):
+        self.calls.append(url)
+        self.agents.append((kw.get("headers") or {}).get("User-Agent"))
+        return self.responses[url]
+
+
+def test_robots_cache_rules_and_unreachable_hosts(monkeypatch):
+    monkeypatch.setenv("SCRAPE_CACHE_ENABLED", "false")
+    monkeypatch.delenv("CRAWL_USER_AGENT", raising=False)
+    session = _RobotsSession({
+        "https://a.example/robots.txt": _Robots(
+            200,
+            "User-agent: *\nDisallow: /private\nCrawl-delay: 3\n\n"
+            "User-agent: ClimateFundingIntel\nDisallow: /private\nDisallow: /no-bots\nCrawl-delay: 3\n",
+        ),
+        "https://b.example/robots.txt": _Robots(404),
+        "https://c.example/robots.txt": _Robots(503),
+    })
+    robots = RobotsCache(session)
+
+    assert robots.allowed("https://a.example/companies") and not robots.allowed("https://a.example/private/x")
+    assert not robots.allowed("https://a.example/no-bots")  # the group for our own agent applies
+    assert robots.crawl_delay("https://a.example/companies") == 3.0
+    assert robots.allowed("https://b.example/anything")
+    assert not robots.allowed("https://c.example/companies")
+    # One robots.txt request per host, made with the crawler's user agent
+    assert len(session.calls) == 3 and set(session.agents) == {CRAWL_USER_AGENT}
+
+
+def test_crawl_follows_pages_within_budget_and_streams_batches(tmp_path, monkeypatch):
+    from pipeline.utils import http_cache
+
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("FETCH_HOST_DELAY_MS", "0")
+    monkeypatch.delenv("CRAWL_USER_AGENT", raising=False)
+    monkeypatch.setattr(http_cache, "_EXTRACT_CACHE", None)
+    if sc.html_backend() is None:  # pragma: no cover
+        return
+    site = {
+        "https://list.example/startups": _list_page(
+            ["Gridco", "SolarX"],
+            "<a href='/startups?page=2'>Next</a> <a href='/category/solar'>Solar</a> <a href='/private/companies'>More</a>",
+        ),
+        "https://list.example/startups?page=2": _list_page(["Hydrovolt", "Gridco"], "<a href='/startups?page=3'>Next</a>"),
+        "https://list.example/startups?page=3": _list_page(["Ionflux"]),
+        "https://list.example/category/solar": _list_page(["Sunbeam", "SolarX"], "<a href='/category/wind'>Wind</a>"),
+        "https://list.example/category/wind": _list_page(["Windy"]),
+    }
+    fetched: List[str] = []
+    batches: List[List[str]] = []
+
+    class _Allow:
+        def __init__(self, *a, **kw):
+            pass
+
+        def allowed(self, url):
+            return "/private/" not in url
+
+        def crawl_delay(self, url):
+            return None
+
+    def _fetch(url, timeout=20, session=None, user_agent=None):
+        assert user_agent == CRAWL_USER_AGENT
+        fetched.append(url)
+        return site.get(url)
+
+    monkeypatch.setattr(sc, "RobotsCache", _Allow)
+    monkeypatch.setattr(sc, "_heuristic_fetch", _fetch)
+    monkeypatch.setattr(sc, "upsert_companies", lambda recs: batches.append([r["slug"] for r in recs]) or {"upserted": len(recs), "errors": {}})
+    monkeypatch.setenv("CRAWL_UPSERT_BATCH", "2")
+
+    out = sc.run_crawl(["https://list.example/startups"], max_depth=1, max_pages=4)
+
+    # Pagination keeps depth 0 and goes first; /category/wind is depth 2; /private is disallowed
+    assert fetched[0] == "https://list.example/startups"
+    assert sorted(fetched) == sorted(list(site)[:4])
+    assert out["robots_blocked"] == 1 and out["fetched"] == 4 and out["frontier_left"] == 0
+    assert sorted(s for b in batches for s in b) == ["gridco", "hydrovolt", "ionflux", "solarx", "sunbeam"]
+    assert out["unique"] == out["upserts"] == 5 and out["upsert_batches"] == len(batches) >= 2
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pipeline.utils.dedupe import EventIndex, dedupe_events, name_key
+
+
+def _ev(name, url, amount=None, day=None, stage=None, **extra):
+    return {
+        "startup_name": name,
+        "source_url": url,
+        "amount_raised_usd": amount,
+        "funding_date": day,
+        "funding_stage": stage,
+        **extra,
+    }
+
+
+def test_name_key_drops_legal_suffixes_and_punctuation():
+    assert name_key("Gridco, Inc.") == name_key("GridCo") == "gridco"
+    assert name_key("Volta GmbH") == "volta"
+    # A bare suffix is still a name
+    assert name_key("Inc") == "inc"
+
+
+def test_reports_from_several_outlets_merge_into_one_row():
+    events = [
+        _ev("Gridco Inc.", "https://techcrunch.com/a", 20_000_000, "2024-05-02", "Series A", lead_investor=None),
+        _ev("SolarX", "https://reuters.com/s", 5_000_000, "2024-05-03", "Seed"),
+        _ev("GridCo", "https://reuters.com/a", 20_500_000, "2024-05-06", "Series A", lead_investor="Breakthrough"),
+        _ev("Gridcoo", "https://gridco.com/press", None, "2024-05-01", None, geography="US"),
+    ]
+    rows, merged = dedupe_events(events)
+    assert merged == 2
+    assert [r["source_url"] for r in rows] == ["https://techcrunch.com/a", "https://reuters.com/s"]
+    grid = rows[0]
+    assert grid["sources"] == ["https://techcrunch.com/a", "https://reuters.com/a", "https://gridco.com/press"]
+    # Canonical fields kept, gaps filled from the other reports
+    assert grid["startup_name"] == "Gridco Inc." and grid["amount_raised_usd"] == 20_000_000
+    assert grid["lead_investor"] == "Breakthrough" and grid["geography"] == "US"
+    assert rows[1]["sources"] == ["https://reuters.com/s"]
+
+
+def test_conflicting_rounds_stay_separate():
+    index = EventIndex(date_window_days=14, amount_tolerance=0.1, name_threshold=0.88)
+    assert index.add(_ev("Gridco", "u1", 20_000_000, "2024-05-01", "Series A")) == (0, False)
+    # Different stage, amount far off, too late, or nothing to compare but the name
+    assert index.add(_ev("Gridco", "u2", 20_000_000, "2024-05-01", "Series B"))[1] is False
+    assert index.add(_ev("Gridco", "u3", 60_000_000, "2024-05-01", None))[1] is False
+    assert index.add(_ev("Gridco", "u4", None, "2024-08-01", None))[1] is False
+    assert index.add(_ev("Gridco", "u5"))[1] is False
+    assert index.add(_ev("Voltgrid", "u6", 20_000_000, "2024-05-01", "Series A"))[1] is False
+    assert len(index.clusters()) == 6
+
+
+def test_prefer_keeps_an_already_written_report_canonical():
+    events = [
+        _ev("Gridco", "https://a", 20_000_000, "2024-05-01"),
+        _ev("Gridco", "https://b", 20_000_000, "2024-05-02"),
+    ]
+    rows, merged = dedupe_events(events, prefer={"https://b"})
+    assert merged == 1 and rows[0]["source_url"] == "https://b"
+    assert rows[0]["sources"] == ["https://b", "https://a"]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pipeline.utils.domains import DomainSet, parse_psl, public_suffix_length, registrable_domain
+
+_RULES = """// ===BEGIN ICANN DOMAINS===
+com
+uk
+co.uk
+jp
+kawasaki.jp
+*.kawasaki.jp
+!city.kawasaki.jp
+// ===BEGIN PRIVATE DOMAINS===
+github.io
+"""
+
+
+def test_public_suffix_rules_normal_wildcard_and_exception():
+    trie = parse_psl(_RULES.splitlines())
+
+    def suffix(host):
+        labels = host.split(".")
+        return ".".join(labels[-public_suffix_length(labels, trie):])
+
+    assert suffix("shop.gridco.co.uk") == "co.uk"
+    assert suffix("gridco.com") == "com"
+    assert suffix("a.b.kawasaki.jp") == "b.kawasaki.jp"
+    assert suffix("www.city.kawasaki.jp") == "kawasaki.jp"
+    assert suffix("gridco.github.io") == "github.io"
+    # Unlisted TLDs still count as a one-label suffix
+    assert suffix("gridco.energy") == "energy"
+
+
+def test_registrable_domain_edge_cases():
+    assert registrable_domain("WWW.Gridco.com.") == "gridco.com"
+    assert registrable_domain("127.0.0.1") == "127.0.0.1"
+    assert registrable_domain("localhost") == "localhost"
+    assert registrable_domain("") is None
+
+
+def test_domain_set_matches_domain_and_subdomains_only():
+    banned = DomainSet(["twitter.com", "x.com", "angel.co"])
+    assert banned.contains("mobile.twitter.com") and banned.contains("X.COM")
+    assert not banned.contains("dropbox.com")
+    assert not banned.contains("notangel.co") and not banned.contains("com")
+    assert len(banned) == 3
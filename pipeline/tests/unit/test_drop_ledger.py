@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import date, datetime, timezone
+
+from pipeline.scripts import drops as drops_cli
+from pipeline.utils.drop_ledger import DropLedger, summarize_drops
+from pipeline.utils.event_sanitizer import (
+    REASON_INVALID_RECORD,
+    REASON_INVALID_SOURCE_URL,
+    REASON_MISSING_STARTUP_NAME,
+    REASON_NON_CLIMATE,
+    REASON_UPSERT_REJECTED,
+)
+
+
+def _at(day: int) -> datetime:
+    return datetime(2026, 10, day, 12, tzinfo=timezone.utc)
+
+
+def test_appends_accumulate_across_runs_and_rotate(tmp_path):
+    ledger = DropLedger(str(tmp_path), max_bytes=1, retention_days=0)
+    ledger.append([{"startup_name": "A", "__reason": REASON_INVALID_SOURCE_URL}], run_id="r1", model="m", now=_at(1))
+    ledger.append([{"startup_name": "B", "__reason": REASON_NON_CLIMATE}], run_id="r2", model="m", now=_at(1))
+    ledger.append(
+        [{"startup_name": "C", "__reason": REASON_UPSERT_REJECTED, "__error": "too long"}, {"__record": "junk", "__reason": REASON_INVALID_RECORD}],
+        run_id="r3",
+        model="m",
+        now=_at(2),
+    )
+    # One segment per day, a new one whenever the current one is over the size cap
+    assert sorted(os.listdir(tmp_path)) == [
+        ".lock", "drops-20261001-000.jsonl.gz", "drops-20261001-001.jsonl.gz", "drops-20261002-000.jsonl.gz",
+    ]
+
+    entries = list(ledger.entries())
+    assert [(e["run_id"], e["reason"]) for e in entries] == [
+        ("r1", REASON_INVALID_SOURCE_URL), ("r2", REASON_NON_CLIMATE), ("r3", REASON_UPSERT_REJECTED), ("r3", REASON_INVALID_RECORD),
+    ]
+    assert entries[2]["record"] == {"startup_name": "C"} and entries[2]["error"] == "too long"
+    assert entries[3]["record"] == "junk"
+    assert [e["run_id"] for e in ledger.entries(since=date(2026, 10, 2))] == ["r3", "r3"]
+
+
+def test_members_share_a_segment_and_old_segments_are_pruned(tmp_path):
+    ledger = DropLedger(str(tmp_path), retention_days=30)
+    ledger.append([{"__reason": "a"}], run_id="old", now=datetime(2026, 8, 1, tzinfo=timezone.utc))
+    path = ledger.append([{"__reason": "b"}], run_id="r1", now=_at(5))
+    ledger.append([{"__reason": "c"}], run_id="r2", now=_at(5))
+    assert sorted(p for p in os.listdir(tmp_path) if p.endswith(".gz")) == [os.path.basename(path)]
+    with gzip.open(path, "rt") as f:
+        assert [json.loads(line)["reason"] for line in f] == ["b", "c"]
+    # A crash mid-append leaves a truncated member; earlier runs stay readable
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"reason": "d"}\n')[:12])
+    assert [e["reason"] for e in ledger.entries()] == ["b", "c"]
+
+
+def test_cli_aggregates_reasons_over_a_date_range(tmp_path, capsys):
+    ledger = DropLedger(str(tmp_path))
+    ledger.append([{"__reason": REASON_NON_CLIMATE}, {"__reason": REASON_NON_CLIMATE}], run_id="r1", now=_at(1))
+    ledger.append([{"__reason": REASON_MISSING_STARTUP_NAME}], run_id="r2", now=_at(3))
+    ledger.append([{"__reason": REASON_NON_CLIMATE}], run_id="r3", now=_at(9))
+
+    assert drops_cli.main(["--dir", str(tmp_path), "--since", "2026-10-01", "--until", "2026-10-05"]) == 0
+    out = json.loads(capsys.readouterr().out)
+    assert out["total"] == 3 and out["runs"] == 2
+    assert out["by_reason"] == {REASON_NON_CLIMATE: 2, REASON_MISSING_STARTUP_NAME: 1}
+    assert out["by_day"] == {"2026-10-01": {REASON_NON_CLIMATE: 2}, "2026-10-03": {REASON_MISSING_STARTUP_NAME: 1}}
+    assert summarize_drops([])["total"] == 0
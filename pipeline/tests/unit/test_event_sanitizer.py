@@ -1,9 +1,21 @@
 from __future__ import annotations
 
-from pipeline.utils.event_sanitizer import sanitize_events
+import re
+from datetime import date, datetime
 
+import pytest
 
-def test_sanitize_events_valid_and_dropped():
+from pipeline.models import FundingEvent, ValidationError
+from pipeline.scripts.bench import synthetic_events
+from pipeline.utils.event_sanitizer import (
+    ClimateClassifier,
+    get_classifier,
+    reject_records,
+    validate_events,
+)
+
+
+def test_validate_events_valid_and_dropped():
     events = [
         {
             "startup_name": " Aetherflux ",
@@ -39,7 +51,8 @@ def test_sanitize_events_valid_and_dropped():
         },
     ]
 
-    valid, dropped = sanitize_events(events)
+    valid, rejects = validate_events(events)
+    dropped = reject_records(rejects)
 
     # We expect 2 valid entries (Aetherflux, Baz) and 3 dropped
     assert len(valid) == 2
@@ -64,3 +77,132 @@ def test_sanitize_events_valid_and_dropped():
     # Dropped reasons included
     reasons = {d.get("__reason") for d in dropped}
     assert {"missing_startup_name", "invalid_source_url"}.issubset(reasons)
+
+
+def test_validate_events_rows_match_funding_event_schema():
+    events = synthetic_events(2000, seed=7)
+    rows, rejects = validate_events(events)
+    assert len(rows) + len(rejects) == len(events)
+    for row in rows:
+        assert FundingEvent(**row).to_db_dict() == row
+
+
+_STR_FIELDS = ("startup_name", "geography", "funding_stage", "lead_investor", "sub_sector", "source_url")
+
+
+def _ref_str(v):
+    if v is None:
+        return None
+    s = str(v).strip()
+    return s if s else None
+
+
+def _ref_amount(v):
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        try:
+            return int(v)
+        except Exception:
+            return None
+    digits = re.sub(r"[^0-9]", "", str(v))
+    return int(digits) if digits else None
+
+
+def _ref_date(v):
+    if v is None:
+        return None
+    try:
+        return datetime.strptime(str(v).strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def _two_step(e):
+    # Reference: the pipeline before validate_events, field normalization then FundingEvent
+    norm = {k: _ref_str(e.get(k)) for k in _STR_FIELDS}
+    norm["amount_raised_usd"] = _ref_amount(e.get("amount_raised_usd"))
+    norm["funding_date"] = _ref_date(e.get("funding_date"))
+    if not norm["startup_name"]:
+        return "missing_startup_name"
+    if not norm["source_url"] or not norm["source_url"].lower().startswith("https"):
+        return "invalid_source_url"
+    if not get_classifier().classify(norm["sub_sector"], norm["startup_name"]).relevant:
+        return "non_climate"
+    try:
+        return FundingEvent(**norm).to_db_dict()
+    except ValidationError:
+        return "invalid_record"
+
+
+@pytest.mark.parametrize("fields", [
+    {"amount_raised_usd": 1.5e7}, {"amount_raised_usd": 2.9}, {"amount_raised_usd": float("nan")},
+    {"amount_raised_usd": float("inf")}, {"amount_raised_usd": True}, {"amount_raised_usd": "$1.5M"},
+    {"amount_raised_usd": "\uff11\uff12\uff13"}, {"amount_raised_usd": [1, 2]},
+    {"startup_name": 123}, {"startup_name": 0}, {"startup_name": "  "}, {"startup_name": ["A"]},
+    {"funding_date": "2024-02-30"}, {"funding_date": "2024-1-5"}, {"funding_date": " 2024-01-05 "},
+    {"funding_date": "null"}, {"funding_date": "0999-01-05"}, {"funding_date": ["2024-01-05"]},
+    {"funding_date": {"y": 2024}}, {"funding_date": date(2024, 1, 2)}, {"funding_date": datetime(2024, 1, 2, 3)},
+    {"funding_date": 20240105},
+    {"source_url": "http://x.example/a"}, {"source_url": " HTTPS://X.example/a "}, {"source_url": 123},
+    {"sub_sector": 123}, {"sub_sector": ""}, {"geography": 0}, {"lead_investor": ["a"]},
+])
+def test_validate_events_matches_normalize_then_funding_event(fields):
+    event = {"startup_name": "Gridco", "source_url": "https://x.example/a", "sub_sector": "Solar", **fields}
+    rows, rejects = validate_events([event, event])  # twice: the second hits the date cache
+    got = rows or [r.reason for r in rejects]
+    assert got == [_two_step(event)] * 2
+
+
+def test_validate_events_rejects_reference_originals():
+    bad = {"startup_name": "Coinbase", "source_url": "https://x.example/a", "sub_sector": "Crypto"}
+    events = [bad, "not a dict", {"startup_name": "Gridco", "source_url": "https://x.example/b", "funding_date": "2025-1-5"}]
+    rows, rejects = validate_events(events)
+
+    assert [(r.index, r.reason) for r in rejects] == [(0, "non_climate"), (1, "invalid_record")]
+    assert rejects[0].record is bad
+    assert rows[0]["funding_date"] == "2025-01-05"
+    assert reject_records(rejects)[0] == {**bad, "__reason": "non_climate"}
+    assert "__reason" not in bad
+
+
+def test_climate_classifier_matches_whole_words_and_returns_tags():
+    clf = get_classifier()
+    assert clf.classify("Software Development", "Devco").relevant is False  # "ev" inside a word
+    m = clf.classify("EV charging & smart meters", "Voltify")
+    assert m.relevant and {"mobility", "grid"} <= set(m.tags)
+    assert clf.classify("Long duration storage", None).tags == ("storage",)
+    assert clf.classify("Batteries", None).relevant
+    assert clf.classify(None, "Nameless").relevant  # no sub_sector: permissive
+    assert clf.classify("Energy", "Coinbase Energy").negative == ("name",)
+    assert clf.classify("Crypto mining with solar", "Sunco").negative == ("keyword",)
+
+
+def test_climate_classifier_matches_compound_sub_sectors():
+    clf = get_classifier()
+    assert clf.classify("climatetech", None).tags == ("climate",)
+    assert set(clf.classify("Bioenergy", None).tags) == {"bioenergy", "energy"}
+    assert clf.classify("EnergyTech", None).tags == ("energy",)
+    assert clf.classify("Solarpunk housing", None).relevant
+    assert clf.classify("Cleanenergy", None).relevant
+    assert not clf.classify("Biotech", None).relevant
+    assert not clf.classify("Climatetech fintech", None).relevant  # negatives still win
+
+
+def test_climate_classifier_rejects_compound_negatives():
+    clf = get_classifier()
+    # Substring matching used to reject these; whole-word matching must not let them through
+    for sub_sector in ("carbon credit crypto", "carbon credit cryptocurrency", "Cryptocurrencies for solar",
+                       "Crypto-mining energy", "Bitcoinmining power", "Energy fintechs", "Climatefintech"):
+        result = clf.classify(sub_sector, None)
+        assert not result.relevant, sub_sector
+        assert result.negative == ("keyword",)
+    assert not clf.classify("Solar", "SolarCrypto").relevant
+    assert clf.classify("Carbon capture", "Cryptic Labs").relevant  # not a compound of the stem
+
+
+def test_climate_classifier_is_pluggable():
+    clf = ClimateClassifier({"sectors": {"agrifood": ["vertical farming", "alt protein"]}, "negative": ["casino"]})
+    assert clf.classify("Vertical Farming", "Leafy").tags == ("agrifood",)
+    assert not clf.classify("Energy", "Leafy").relevant
+    assert not clf.classify("Alt protein casino", "Leafy").relevant
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from pipeline import seed_companies as sc
+from pipeline.utils.fetcher import FetchDeadlineExceeded, fetch_concurrently
+
+
+def test_pages_download_concurrently_across_hosts():
+    urls = [f"https://site{i}.example/list" for i in range(20)]
+
+    def _fetch(url, session, timeout):
+        time.sleep(0.1)
+        return url.upper()
+
+    t0 = time.monotonic()
+    out = list(fetch_concurrently(urls, _fetch, concurrency=20, per_host=2, host_delay_ms=0, deadline_s=10, session=object()))
+    elapsed = time.monotonic() - t0
+
+    assert sorted(o.url for o in out) == sorted(urls)
+    assert all(o.value == o.url.upper() and o.error is None for o in out)
+    # About one page's latency, not 20 x 0.1 s
+    assert elapsed < 1.0
+
+
+def test_per_host_cap_and_politeness_delay():
+    starts = []
+    active = {"n": 0, "max": 0}
+    lock = threading.Lock()
+
+    def _fetch(url, session, timeout):
+        with lock:
+            starts.append(time.monotonic())
+            active["n"] += 1
+            active["max"] = max(active["max"], active["n"])
+        time.sleep(0.05)
+        with lock:
+            active["n"] -= 1
+        return "ok"
+
+    urls = [f"https://one.example/p{i}" for i in range(4)]
+    out = list(fetch_concurrently(urls, _fetch, concurrency=8, per_host=1, host_delay_ms=100, deadline_s=10, session=object()))
+
+    assert len(out) == 4 and active["max"] == 1
+    gaps = [b - a for a, b in zip(sorted(starts), sorted(starts)[1:])]
+    assert min(gaps) >= 0.09
+
+
+def test_deadline_fails_unstarted_urls_and_errors_are_returned():
+    def _fetch(url, session, timeout):
+        if url.endswith("bad"):
+            raise ConnectionError("refused")
+        time.sleep(0.05)
+        return "ok"
+
+    urls = ["https://a.example/bad"] + [f"https://slow.example/{i}" for i in range(5)]
+    out = {o.url: o for o in fetch_concurrently(urls, _fetch, concurrency=4, per_host=1, host_delay_ms=200, deadline_s=0.5, session=object())}
+
+    assert isinstance(out["https://a.example/bad"].error, ConnectionError)
+    done = [u for u, o in out.items() if o.value == "ok"]
+    late = [u for u, o in out.items() if isinstance(o.error, FetchDeadlineExceeded)]
+    assert len(out) == 6 and done and late and len(done) + len(late) == 5
+
+
+def test_run_heuristic_merges_pages_in_input_order(tmp_path, monkeypatch):
+    from pipeline.utils import http_cache
+
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(http_cache, "_EXTRACT_CACHE", None)
+    pages = {
+        "https://b.example/list": "<a href='https://gridco.com'>Gridco</a>",
+        "https://a.example/list": "<a href='https://gridco.io'>Gridco</a><a href='https://solarx.io'>SolarX</a>",
+    }
+    delays = {"https://b.example/list": 0.0, "https://a.example/list": 0.1}
+
+    def _fake_fetch(url, timeout=20, session=None):
+        time.sleep(delays[url])
+        return pages[url]
+
+    captured = {}
+
+    def _upsert(records):
+        captured["records"] = records
+        return {"upserted": len(records), "errors": {}}
+
+    monkeypatch.setattr(sc, "_heuristic_fetch", _fake_fetch)
+    monkeypatch.setattr(sc, "upsert_companies", _upsert)
+    if sc.html_backend() is None:  # pragma: no cover
+        return
+    out = sc.run_heuristic(["https://a.example/list", "https://b.example/list"])
+
+    # a.example finishes last but is listed first, so its link for Gridco wins
+    sites = {r["slug"]: r.get("website") for r in captured["records"]}
+    assert sites["gridco"] == "https://gridco.io" and sites["solarx"] == "https://solarx.io"
+    assert out["fetched"] == 2
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 import os
+from types import SimpleNamespace
 
+import pytest
+
+from pipeline.llm import cache as llm_cache
 from pipeline.llm import gemini_client as gc
+from pipeline.llm import streaming as llm_streaming
+from pipeline.utils.disk_cache import DiskCache
 
 
 def test_provider_model_prefix_plain():
@@ -43,3 +49,109 @@ def test_build_llm_uses_env_model(monkeypatch):
     assert captured["timeout"] == 123
     assert captured["max_tokens"] == 5678
     assert captured["seed"] == 7
+
+
+def test_built_llm_throttles_before_each_call(monkeypatch):
+    calls = []
+
+    class StubLLM:  # noqa: N801 - mimic external class name
+        def __init__(self, model, temperature, timeout, max_tokens, seed):  # type: ignore[no-untyped-def]
+            self.model = model
+
+        def call(self, messages, *args, **kwargs):  # type: ignore[no-untyped-def]
+            calls.append(("call", self.model))
+            return "ok"
+
+    monkeypatch.setattr(gc, "LLM", StubLLM)
+    monkeypatch.setattr(gc, "throttle", lambda key, tokens=0: calls.append(("throttle", key, tokens)))
+
+    llm = gc.build_llm(model="gemini-2.0-flash")
+    assert isinstance(llm, StubLLM)
+    assert llm.call([{"role": "user", "content": "x" * 40}]) == "ok"
+    assert calls == [("throttle", "gemini/gemini-2.0-flash", 11), ("call", "gemini/gemini-2.0-flash")]
+
+
+def _counting_llm(monkeypatch, tmp_path):
+    calls = []
+
+    class StubLLM:  # noqa: N801 - mimic external class name
+        def __init__(self, model, temperature, timeout, max_tokens, seed):  # type: ignore[no-untyped-def]
+            self.model, self.temperature, self.max_tokens, self.seed = model, temperature, max_tokens, seed
+
+        def call(self, messages, *args, **kwargs):  # type: ignore[no-untyped-def]
+            calls.append(messages)
+            return f"answer {len(calls)}"
+
+    monkeypatch.setattr(gc, "LLM", StubLLM)
+    monkeypatch.setattr(gc, "throttle", lambda key, tokens=0: 0.0)
+    monkeypatch.setattr(llm_cache, "_CACHE", DiskCache(str(tmp_path / "llm.sqlite3")))
+    return calls
+
+
+def test_llm_cache_record_then_replay(monkeypatch, tmp_path):
+    calls = _counting_llm(monkeypatch, tmp_path)
+    msgs = [{"role": "user", "content": "list funding rounds"}]
+
+    monkeypatch.setenv("LLM_CACHE_MODE", "record")
+    llm = gc.build_llm(model="gemini-2.0-flash", seed=7)
+    assert llm.call(msgs) == "answer 1"
+    assert llm.call(msgs) == "answer 2"  # record always calls and overwrites
+
+    monkeypatch.setenv("LLM_CACHE_MODE", "replay")
+    assert llm.call(msgs) == "answer 2"
+    assert len(calls) == 2
+
+    # Any key component change is a miss; replay never reaches the provider
+    other_seed = gc.build_llm(model="gemini-2.0-flash", seed=8)
+    with pytest.raises(llm_cache.LLMCacheMiss):
+        other_seed.call(msgs)
+    assert len(calls) == 2
+
+
+def test_llm_cache_read_through(monkeypatch, tmp_path):
+    calls = _counting_llm(monkeypatch, tmp_path)
+    monkeypatch.setenv("LLM_CACHE_MODE", "read-through")
+    llm = gc.build_llm(model="gemini-2.0-flash")
+    assert llm.call("hello") == "answer 1"
+    assert llm.call("hello") == "answer 1"
+    assert llm.call("other") == "answer 2"
+    assert len(calls) == 2
+
+
+def test_streamed_chunks_reach_event_sink(monkeypatch, tmp_path):
+    payload = 'Final Answer: {"events": [{"startup_name": "A"}, {"startup_name": "B"}]}'
+    seen = []
+
+    class StubLLM:  # noqa: N801 - mimic external class name
+        def __init__(self, model, temperature, timeout, max_tokens, seed, stream=False):  # type: ignore[no-untyped-def]
+            self.model, self.stream = model, stream
+
+        def call(self, messages, *args, **kwargs):  # type: ignore[no-untyped-def]
+            # CrewAI emits one event per chunk from the calling thread
+            for i in range(0, len(payload), 5):
+                llm_streaming._on_chunk(self, SimpleNamespace(chunk=payload[i : i + 5]))
+                seen.append(("chunk", i))
+            return payload
+
+    monkeypatch.setattr(gc, "LLM", StubLLM)
+    monkeypatch.setattr(gc, "throttle", lambda key, tokens=0: 0.0)
+    monkeypatch.setattr(llm_cache, "_CACHE", DiskCache(str(tmp_path / "llm.sqlite3")))
+    monkeypatch.setenv("LLM_STREAM", "true")
+    monkeypatch.setenv("LLM_CACHE_MODE", "read-through")
+    llm = gc.build_llm(model="gemini-2.0-flash")
+    assert llm.stream is True
+
+    with llm_streaming.stream_events(lambda e: seen.append(("event", e["startup_name"]))):
+        llm.call("verify")
+    events = [x for x in seen if x[0] == "event"]
+    assert events == [("event", "A"), ("event", "B")]
+    # Each element arrives before the stream ends
+    assert seen.index(("event", "A")) < len(seen) - 1
+
+    # A cached replay has no chunks; its full response is parsed instead
+    seen.clear()
+    with llm_streaming.stream_events(lambda e: seen.append(("event", e["startup_name"]))):
+        llm.call("verify")
+    assert seen == [("event", "A"), ("event", "B")]
+    llm.call("verify")  # no active sink: nothing is delivered
+    assert len(seen) == 2
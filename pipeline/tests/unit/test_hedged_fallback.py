@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from pipeline import main
+
+
+@pytest.fixture(autouse=True)
+def _no_telemetry(monkeypatch):
+    monkeypatch.setattr(main, "insert_run", lambda record: {"data": None, "error": None})
+    monkeypatch.setattr(main, "fetch_duration_p95", lambda model: None)
+    monkeypatch.setenv("LLM_HEDGE_DELAY_MS", "50")
+
+
+def test_slow_primary_is_hedged_and_cancelled(monkeypatch):
+    primary_stopped = threading.Event()
+
+    def fake_run_once(model_id, hedge=None, checkpoint=None):
+        if model_id == "primary":
+            # Simulate a stuck model: loop on stage boundaries until the hedge cancels us
+            try:
+                while True:
+                    hedge.check()
+                    time.sleep(0.01)
+            finally:
+                primary_stopped.set()
+        assert hedge.claim(model_id)
+        return {"events_count": 1, "dropped_count": 0, "model": model_id}
+
+    monkeypatch.setattr(main, "run_once_with_model", fake_run_once)
+    out = main.run_hedged(["primary", "fallback"])
+
+    assert out["model"] == "fallback"
+    assert out["hedge"]["winner"] == "fallback"
+    assert out["hedge"]["candidates"] == ["primary", "fallback"]
+    assert out["hedge"]["delay_source"] == "env"
+    assert primary_stopped.wait(2)
+
+
+def test_fast_primary_never_starts_fallback(monkeypatch):
+    started = []
+
+    def fake_run_once(model_id, hedge=None, checkpoint=None):
+        started.append(model_id)
+        assert hedge.claim(model_id)
+        return {"events_count": 0, "dropped_count": 0, "model": model_id}
+
+    monkeypatch.setenv("LLM_HEDGE_DELAY_MS", "5000")
+    monkeypatch.setattr(main, "run_once_with_model", fake_run_once)
+    assert main.run_hedged(["primary", "fallback"])["model"] == "primary"
+    assert started == ["primary"]
+
+
+def test_rate_limited_primary_starts_fallback_immediately(monkeypatch):
+    def fake_run_once(model_id, hedge=None, checkpoint=None):
+        if model_id == "primary":
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        assert hedge.claim(model_id)
+        return {"events_count": 2, "dropped_count": 0, "model": model_id}
+
+    monkeypatch.setenv("LLM_HEDGE_DELAY_MS", "60000")
+    monkeypatch.setattr(main, "run_once_with_model", fake_run_once)
+    t0 = time.time()
+    assert main.run_hedged(["primary", "fallback"])["model"] == "fallback"
+    assert time.time() - t0 < 5
+
+
+def test_hedge_token_allows_single_winner():
+    token = main.HedgeToken(10, "env")
+    assert token.claim("a") is True
+    assert token.claim("b") is False
+    with pytest.raises(main.RunCancelled):
+        token.check()
+
+
+def test_attempts_get_private_checkpoints_and_losers_stop_before_llm_calls(tmp_path, monkeypatch):
+    from pipeline.checkpoint import RunCheckpoint
+
+    dirs = {}
+    kickoffs = []
+    primary_outcome = []
+
+    class _Crew:
+        def kickoff(self):
+            kickoffs.append(1)
+            return "{}"
+
+    def fake_run_once(model_id, hedge=None, checkpoint=None):
+        dirs[model_id] = checkpoint.dir
+        if model_id == "primary":
+            time.sleep(0.2)  # the fallback claims the run meanwhile
+            token = main._HEDGE.set(hedge)
+            try:
+                main.kickoff_with_retry(_Crew())
+            except main.RunCancelled as e:
+                primary_outcome.append(e)
+                raise
+            finally:
+                main._HEDGE.reset(token)
+        assert hedge.claim(model_id)
+        return {"events_count": 0, "dropped_count": 0, "model": model_id}
+
+    monkeypatch.setattr(main, "run_once_with_model", fake_run_once)
+    ckpt = RunCheckpoint(root=str(tmp_path))
+    assert main.run_hedged(["primary", "fallback"], checkpoint=ckpt)["model"] == "fallback"
+    deadline = time.time() + 2
+    while not primary_outcome and time.time() < deadline:
+        time.sleep(0.01)
+    assert primary_outcome and kickoffs == []
+    assert len(set(dirs.values())) == 2
+    assert all(d.startswith(ckpt.dir + "/attempts/") for d in dirs.values())
+
+
+def test_percentile_nearest_rank():
+    from pipeline.telemetry import _percentile
+
+    assert _percentile(list(range(1, 101)), 95) == 95
+    assert _percentile([10, 20, 30, 40, 50], 95) == 50
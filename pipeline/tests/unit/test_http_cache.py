@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from pipeline.utils.disk_cache import DiskCache
+from pipeline.utils.http_cache import BodyTooLarge, ReadDeadlineExceeded, cached_get
+from pipeline.utils.url_utils import normalize_url
+
+
+class _Resp:
+    def __init__(self, status: int, text: str = "", headers: Dict[str, str] | None = None):
+        self.status_code = status
+        self.text = text
+        self.headers = headers or {}
+        self.encoding = None
+        self.apparent_encoding = "utf-8"
+
+
+class _StreamResp:
+    def __init__(self, status: int, chunks: List[bytes], headers: Dict[str, str], delay: float = 0.0):
+        self.status_code = status
+        self.headers = headers
+        self.chunks = chunks
+        self.delay = delay
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for c in self.chunks:
+            time.sleep(self.delay)
+            self.read += 1
+            yield c
+
+    def close(self):
+        self.closed = True
+
+
+class _Session:
+    def __init__(self, responses: List[Any]):
+        self.responses = list(responses)
+        self.calls: List[Dict[str, Any]] = []
+
+    def get(self, url, headers=None, cookies=None, timeout=None, allow_redirects=True, **kw):
+        self.calls.append({"url": url, "headers": dict(headers or {}), **kw})
+        return self.responses.pop(0)
+
+
+def test_normalize_url_drops_tracking_fragment_and_default_port():
+    a = normalize_url("HTTPS://Example.com:443/a?utm_source=x&b=2&a=1#top")
+    assert a == "https://example.com/a?a=1&b=2"
+    assert normalize_url("https://example.com") == "https://example.com/"
+
+
+def test_fresh_entry_served_without_network(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    html = "<html>hello</html>"
+    session = _Session([_Resp(200, html, {"content-type": "text/html; charset=utf-8", "etag": '"v1"'})])
+
+    first = cached_get("https://example.com/a", session=session, cache=cache, ttl=3600)
+    second = cached_get("https://example.com/a#frag", session=session, cache=cache, ttl=3600)
+
+    assert first.text == second.text == html
+    assert not first.from_cache and second.from_cache
+    assert len(session.calls) == 1
+
+
+def test_stale_entry_revalidates_with_validators(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    headers = {"content-type": "text/html", "etag": '"v1"', "last-modified": "Mon, 01 Sep 2025 00:00:00 GMT"}
+    session = _Session([_Resp(200, "<p>body</p>", headers), _Resp(304)])
+
+    cached_get("https://example.com/b", session=session, cache=cache, ttl=0)
+    out = cached_get("https://example.com/b", session=session, cache=cache, ttl=0)
+
+    sent = session.calls[1]["headers"]
+    assert sent["If-None-Match"] == '"v1"'
+    assert sent["If-Modified-Since"] == headers["last-modified"]
+    assert out.revalidated and out.text == "<p>body</p>" and out.status == 200
+
+
+def test_error_responses_are_not_cached(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    session = _Session([_Resp(503, "down"), _Resp(200, "up", {"content-type": "text/html"})])
+
+    assert cached_get("https://example.com/c", session=session, cache=cache).status == 503
+    assert cached_get("https://example.com/c", session=session, cache=cache).text == "up"
+    assert len(session.calls) == 2
+
+
+def test_bounded_get_rejects_non_html_from_headers(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    pdf = _StreamResp(200, [b"%PDF-1.7"] * 1000, {"content-type": "application/pdf"})
+    session = _Session([pdf])
+
+    out = cached_get("https://example.com/report.pdf", session=session, cache=cache, accept=("text/html",))
+
+    assert out.status == 200 and out.text == "" and out.content_type == "application/pdf"
+    assert session.calls[0]["stream"] is True
+    assert pdf.read == 0 and pdf.closed
+    assert cache.get(normalize_url("https://example.com/report.pdf")) is None
+
+
+def test_bounded_get_aborts_oversized_and_slow_bodies(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    html = {"content-type": "text/html"}
+    declared = _StreamResp(200, [b"x"], {**html, "content-length": "50000000"})
+    chunked = _StreamResp(200, [b"x" * 1000] * 100, html)
+    slow = _StreamResp(200, [b"<p>x</p>"] * 100, html, delay=0.01)
+    session = _Session([declared, chunked, slow])
+
+    with pytest.raises(BodyTooLarge):
+        cached_get("https://example.com/a", session=session, cache=cache, max_bytes=10_000)
+    with pytest.raises(BodyTooLarge):
+        cached_get("https://example.com/b", session=session, cache=cache, max_bytes=10_000)
+    with pytest.raises(ReadDeadlineExceeded):
+        cached_get("https://example.com/c", session=session, cache=cache, read_deadline=0.1)
+
+    assert declared.read == 0 and chunked.read == 11 and slow.read < 100
+    assert declared.closed and chunked.closed and slow.closed
+    assert all(cache.get(normalize_url(f"https://example.com/{p}")) is None for p in "abc")
+
+
+def test_bounded_get_decodes_incrementally_with_sniffed_charset(tmp_path):
+    cache = DiskCache(str(tmp_path / "http.sqlite3"))
+    latin = '<html><head><meta charset="windows-1252"></head><body>Caf\u00e9 \u00dcber</body></html>'.encode("cp1252")
+    utf8 = "<p>Caf\u00e9 \u00dcber \u2014 ok</p>".encode("utf-8")
+    session = _Session([
+        _StreamResp(200, [latin[:60], latin[60:]], {"content-type": "text/html"}),
+        # Multi-byte characters split across chunk boundaries
+        _StreamResp(200, [utf8[i:i + 3] for i in range(0, len(utf8), 3)], {"content-type": "text/html; charset=UTF-8"}),
+    ])
+
+    first = cached_get("https://example.com/latin", session=session, cache=cache, max_bytes=1_000_000)
+    second = cached_get("https://example.com/utf8", session=session, cache=cache, max_bytes=1_000_000)
+
+    assert "Caf\u00e9 \u00dcber" in first.text
+    assert second.text == "<p>Caf\u00e9 \u00dcber \u2014 ok</p>"
+    assert cached_get("https://example.com/latin", session=session, cache=cache).from_cache
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    import os
+
+    cache = DiskCache(str(tmp_path / "kv.sqlite3"), max_bytes=3000)
+    cache.set("a", os.urandom(1200))
+    cache.set("b", os.urandom(1200))
+    assert cache.get("a") is not None  # refresh 'a' so 'b' becomes the LRU entry
+    cache.set("c", os.urandom(1200))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.total_bytes() <= 3000
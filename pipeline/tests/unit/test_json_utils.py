@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pytest
 
-from pipeline.utils.json_utils import extract_json
+from pipeline.utils.json_utils import EventStreamParser, extract_json
 
 
 def test_extract_json_direct():
@@ -32,3 +32,78 @@ def test_extract_json_greedy_braces():
 def test_extract_json_failure():
     with pytest.raises(ValueError):
         extract_json("not a json payload")
+
+
+def test_extract_json_empty_list_is_an_empty_payload():
+    assert extract_json("[]") == {"events": []}
+    assert extract_json("Final Answer:\n```json\n[]\n```") == {"events": []}
+    assert extract_json("```\n[ ]\n```") == {"events": []}
+
+
+def test_extract_json_last_fenced_payload_wins():
+    src = (
+        '```json\n{"events": [{"startup_name": "old"}]}\n```\n'
+        'Action Input: {"query": "x"}\n'
+        'Final Answer: ```json\n{"events": [{"startup_name": "new"}]}\n```'
+    )
+    assert extract_json(src)["events"][0]["startup_name"] == "new"
+    # A fenced block that fits no schema does not short-circuit the ranking
+    src = 'Final Answer: {"events": [{"startup_name": "H"}]}\n```json\n{"query": "x"}\n```'
+    assert extract_json(src)["events"][0]["startup_name"] == "H"
+    src = 'Action Input: {"companies": [{"name": "x"}]}\nFinal Answer: {"events": [{"startup_name": "I"}]}\n'
+    assert extract_json(src)["events"][0]["startup_name"] == "I"
+
+
+def test_extract_json_braces_inside_strings():
+    src = 'Final Answer: {"events": [{"startup_name": "A } { \\" ]", "amount": "1"}]}'
+    out = extract_json(src)
+    assert out["events"][0]["startup_name"] == 'A } { " ]'
+
+
+def test_extract_json_prefers_payload_over_tool_input():
+    src = (
+        'Action Input: {"website_url": "https://x.example/a"}\n'
+        'Observation: the "events": list [1] follows {per filings}\n'
+        'Final Answer: {"events": [{"startup_name": "D"}]}\n'
+        'Action Input: {"query": "more"}'
+    )
+    out = extract_json(src)
+    assert out["events"][0]["startup_name"] == "D"
+
+
+def test_extract_json_unclosed_prose_brace():
+    src = 'note { this never closes, but {"companies": [{"name": "E"}]} does'
+    assert extract_json(src)["companies"][0]["name"] == "E"
+
+
+def test_extract_json_nested_value_in_invalid_wrapper():
+    src = '{ result: {"events": [{"startup_name": "F"}]} }'
+    assert extract_json(src)["events"][0]["startup_name"] == "F"
+
+
+def test_extract_json_custom_keys():
+    src = '{"events": []} {"slug": "g", "website_url": "https://g.example"}'
+    out = extract_json(src, keys={"slug": 1.0, "website_url": 2.0})
+    assert out["slug"] == "g"
+
+
+def test_event_stream_parser_emits_elements_as_they_complete():
+    text = (
+        'Thought: the "events": list\nAction Input: {"query": "x"}\n'
+        'Final Answer: ```json\n{"events": [{"startup_name": "A } \\" {", "tags": [1, {"x": 2}]},'
+        ' {"startup_name": "B"}, 3]}\n```'
+    )
+    parser = EventStreamParser()
+    got = []
+    for ch in text:  # worst case: one character per chunk
+        for e in parser.feed(ch):
+            got.append((e["startup_name"], len(got)))
+    assert got == [('A } " {', 0), ("B", 1)]
+
+
+def test_event_stream_parser_skips_invalid_element_and_resets():
+    parser = EventStreamParser()
+    assert parser.feed('"events": [{"startup_name": "A", }, {"startup_name": "B"}]') == [{"startup_name": "B"}]
+    parser.feed('"events": [{"startup_name": "C"')
+    parser.reset()
+    assert parser.feed('}]') == []
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from pipeline.utils.known_urls import KnownUrlIndex
+
+
+def test_partition_drops_known_urls_after_normalization(tmp_path):
+    idx = KnownUrlIndex(str(tmp_path / "known.idx"))
+    idx.add(["https://example.com/news/a?utm_source=feed"])
+
+    new, known = idx.partition(["https://EXAMPLE.com/news/a#top", "https://example.com/news/b"])
+    assert known == ["https://EXAMPLE.com/news/a#top"]
+    assert new == ["https://example.com/news/b"]
+
+
+def test_refresh_is_incremental_and_persists_watermark(tmp_path):
+    path = str(tmp_path / "known.idx")
+    calls = []
+
+    def fetch(since):
+        calls.append(since)
+        if since is None:
+            return [("https://x.com/1", "2025-01-01T00:00:00+00:00"), ("https://x.com/2", "2025-01-02T00:00:00+00:00")]
+        return [("https://x.com/3", "2025-01-03T00:00:00+00:00")]
+
+    idx = KnownUrlIndex(path)
+    assert idx.refresh(fetch) == 2
+    idx.save()
+
+    reloaded = KnownUrlIndex(path).load()
+    assert len(reloaded) == 2
+    assert reloaded.watermark == "2025-01-02T00:00:00+00:00"
+    reloaded.refresh(fetch)
+
+    assert calls == [None, "2025-01-02T00:00:00+00:00"]
+    assert "https://x.com/3" in reloaded and "https://x.com/1" in reloaded
+
+
+def test_load_missing_file_is_empty(tmp_path):
+    idx = KnownUrlIndex(str(tmp_path / "missing.idx")).load()
+    assert len(idx) == 0 and idx.watermark is None
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from pipeline.utils.rate_limit import Limit, RateLimiter, RateLimitTimeout, limit_for, parse_limits
+
+
+def test_parse_limits_and_provider_prefix_lookup():
+    limits = parse_limits("gemini-2.0-flash:rpm=15,tpm=1000000; tavily:rpm=60 ;bogus;x:rpm=abc")
+    assert limits == {
+        "gemini-2.0-flash": Limit(rpm=15.0, tpm=1000000.0),
+        "tavily": Limit(rpm=60.0, tpm=None),
+    }
+    assert limit_for("gemini/gemini-2.0-flash", limits) == limits["gemini-2.0-flash"]
+    assert limit_for("gemini-1.5-pro", limits) is None
+
+
+def test_burst_is_queued_at_precise_intervals(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rl.sqlite3"))
+    limit = Limit(rpm=60)  # one request per second, bucket holds 60
+    waits = [limiter.reserve("m", limit) for _ in range(62)]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0, abs=0.05)
+    assert waits[61] == pytest.approx(2.0, abs=0.05)
+
+
+def test_budget_is_shared_between_limiter_instances(tmp_path):
+    path = str(tmp_path / "rl.sqlite3")
+    a, b = RateLimiter(path), RateLimiter(path)
+    limit = Limit(rpm=2)
+    assert a.reserve("tavily", limit) == 0.0
+    assert b.reserve("tavily", limit) == 0.0
+    assert a.reserve("tavily", limit) == pytest.approx(30.0, abs=0.5)
+
+
+def test_token_budget_and_max_wait(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rl.sqlite3"))
+    limit = Limit(tpm=1000)
+    assert limiter.reserve("m", limit, tokens=1000) == 0.0
+    assert limiter.reserve("m", limit, tokens=500) == pytest.approx(30.0, abs=0.5)
+    with pytest.raises(RateLimitTimeout):
+        limiter.reserve("m", limit, tokens=500, max_wait=5)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import pytest
+
+from pipeline import seed_companies as sc
+from pipeline.utils.html_candidates import available_backends, html_backend, scan_candidates
+
+_LIST_PAGE = """<html><head><script>var x = "<a href='https://evil.example'>Evil</a>";</script></head><body>
+<nav><a href="/about">About us</a> <a href="https://twitter.com/list">Twitter</a></nav>
+<ul>
+  <li><strong>Gridco</strong> <a href="https://gridco.com/" title="Gridco">website</a></li>
+  <li><a href="//solarx.io"><span>Solar</span>X<!-- sponsored --></a></li>
+</ul>
+<dl><dt>Hydro <em>Volt</em> Inc.</dt><dd><a href="https://hydrovolt.energy">site</a></dd></dl>
+<h2>Ion Flux <a href="https://ionflux.io/about"><![CDATA[ ]]></a></h2>
+<a href="mailto:hi@list.example">Contact</a>
+<a href="https://blog.list.example/2025">Our blog</a> <a href="https://mobile.twitter.com/gridco">@gridco</a>
+<a href="https://www.gridco.co.uk/">Read more</a> <a href="https://shop.gridco.co.uk/">Gridco UK shop</a>
+</body></html>"""
+
+
+def test_merge_companies_prefers_row_with_website():
+    rows = [
+        sc.company_record("gridco", None, "Gridco", "t"),
+        sc.company_record("solarx", "https://solarx.io", "SolarX", "t"),
+        sc.company_record("gridco", "https://gridco.com", "GridCo Inc", "t"),
+        sc.company_record("solarx", None, "Solar X", "t"),
+    ]
+    merged = sc.merge_companies(rows)
+    assert [r["slug"] for r in merged] == ["gridco", "solarx"]
+    assert merged[0]["website"] == "https://gridco.com" and merged[0]["name"] == "GridCo Inc"
+    assert merged[1] == {"slug": "solarx", "updated_at": "t", "website": "https://solarx.io", "name": "SolarX"}
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_heuristic_extract_one_company_per_site(backend):
+    items = sc.heuristic_extract(_LIST_PAGE, "https://list.example/climate", backend=backend)
+    assert items == [
+        {"name": "gridco", "website": "https://gridco.com/"},
+        {"name": "SolarX", "website": "https://solarx.io"},
+        {"name": "site", "website": "https://hydrovolt.energy"},
+        {"name": "ionflux", "website": "https://ionflux.io/about"},
+        {"name": "Gridco UK shop", "website": "https://shop.gridco.co.uk/"},
+    ]
+    assert sc.heuristic_extract(_LIST_PAGE, "https://list.example/climate", max_items=2, backend=backend) == items[:2]
+
+
+_UNCLOSED_ITEMS = """<ul><li>Gridco <a href="https://gridco.com">Visit site</a><li>SolarX <a href="https://solarx.io">Visit site</a></ul>
+<dl><dt>Hydrovolt<dd><a href="https://hydrovolt.com">Website</a></dl>"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_unclosed_list_items(backend):
+    headings = scan_candidates(_UNCLOSED_ITEMS, backend=backend).headings
+    if backend == "bs4":
+        # html.parser (the legacy output): each open item swallows the ones after it
+        assert headings == [
+            ("Gridco Visit site SolarX Visit site", "https://gridco.com"),
+            ("SolarX Visit site", "https://solarx.io"),
+            ("Hydrovolt Website", "https://hydrovolt.com"),
+        ]
+    else:
+        # libxml2 closes items like a browser; the <dd> link is no longer inside the <dt>
+        assert headings == [
+            ("Gridco Visit site", "https://gridco.com"),
+            ("SolarX Visit site", "https://solarx.io"),
+            ("Hydrovolt", None),
+        ]
+    websites = [c["website"] for c in sc.heuristic_extract(_UNCLOSED_ITEMS, "https://list.example/x", backend=backend)]
+    assert websites == ["https://gridco.com", "https://solarx.io", "https://hydrovolt.com"]
+
+
+def test_bs4_scan_matches_get_text_and_find():
+    if "bs4" not in available_backends():
+        pytest.skip("beautifulsoup4 not installed")
+    from bs4 import BeautifulSoup
+
+    html = (
+        "<h2><!-- c --> Gridco <script>x()</script><a href='https://gridco.com' title='G'>Grid"
+        "<b>co</b></a><a href='https://other.com'>o</a></h2><ul><li>A<li>B <a href=''>e</a></ul>"
+        "<a rel='nofollow next' href='/p2'>more</a>"
+    )
+    soup = BeautifulSoup(html, "html.parser")
+    found = scan_candidates(html, backend="bs4")
+    assert found.anchors == [(a.get("href"), a.get_text(strip=True), a.get("title", "")) for a in soup.find_all("a")]
+    expected = []
+    for tag in soup.find_all(["h2", "li"]):
+        link = tag.find("a", href=True)
+        expected.append((tag.get_text(" ", strip=True), link.get("href") if link is not None else None))
+    assert found.headings == expected
+    assert found.rel_next == ["/p2"]
+
+
+def test_auto_backend_is_bs4(monkeypatch):
+    monkeypatch.delenv("HTML_PARSER_BACKEND", raising=False)
+    if "bs4" in available_backends():
+        assert html_backend() == "bs4"
+
+
+def test_merge_companies_groups_by_registrable_domain():
+    rows = [
+        sc.company_record("gridco", "https://gridco.co.uk", "Gridco", "t"),
+        sc.company_record("gridco-energy", "https://www.gridco.co.uk/about", "Gridco Energy", "t"),
+        sc.company_record("ecoflow", "https://eco.co.uk", "EcoFlow", "t"),
+        sc.company_record("solarx", None, "SolarX", "t"),
+    ]
+    merged = sc.merge_companies(rows)
+    assert [(r["slug"], r.get("website")) for r in merged] == [
+        ("gridco", "https://gridco.co.uk"),
+        ("ecoflow", "https://eco.co.uk"),
+        ("solarx", None),
+    ]
+
+
+def test_upsert_companies_batches_by_column_set_and_reports_row_errors(monkeypatch):
+    calls = []
+
+    def _upsert_rows(table, rows, *, on_conflict):
+        calls.append((table, on_conflict, [r["slug"] for r in rows]))
+        rejected = [{"row": r, "error": "value too long"} for r in rows if r["slug"] == "bad"]
+        return {"data": [], "error": "value too long" if rejected else None, "rejected": rejected, "failed": [], "chunks": []}
+
+    monkeypatch.setattr(sc, "upsert_rows", _upsert_rows)
+    records = [sc.company_record(f"c{i}", f"https://c{i}.com" if i % 2 else None, f"C{i}", "t") for i in range(300)]
+    records.append(sc.company_record("bad", "https://bad.com", "Bad", "t"))
+    resp = sc.upsert_companies(records)
+
+    # Two round trips (with / without website) instead of 301
+    assert len(calls) == 2 and all(c[:2] == ("companies", "slug") for c in calls)
+    assert sorted(len(c[2]) for c in calls) == [150, 151]
+    assert resp["upserted"] == 300 and resp["errors"] == {"bad": "value too long"}
+
+
+def test_unchanged_page_skips_reparsing(tmp_path, monkeypatch):
+    from pipeline.utils import http_cache
+
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(http_cache, "_EXTRACT_CACHE", None)
+    if sc.html_backend() is None:  # pragma: no cover
+        return
+    parses = []
+    real_extract = sc.heuristic_extract
+    monkeypatch.setattr(sc, "heuristic_extract", lambda html, url: parses.append(url) or real_extract(html, url))
+    page = {"html": "<a href='https://gridco.com'>Gridco</a>"}
+    # As served by cached_get after a 304: same body as last time
+    monkeypatch.setattr(sc, "_heuristic_fetch", lambda url, timeout=20, session=None: page["html"])
+    monkeypatch.setattr(sc, "upsert_companies", lambda records: {"upserted": len(records), "errors": {}})
+
+    first = sc.run_heuristic(["https://list.example/a"])
+    second = sc.run_heuristic(["https://list.example/a"])
+    page["html"] += "<a href='https://solarx.io'>SolarX</a>"
+    third = sc.run_heuristic(["https://list.example/a"])
+
+    assert parses == ["https://list.example/a", "https://list.example/a"]
+    assert (first["parse_skipped"], second["parse_skipped"], third["parse_skipped"]) == (0, 1, 0)
+    assert second["unique"] == 1 and third["unique"] == 2
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pipeline.utils.spans import bind_context, current_span, span, trace
+
+
+def test_nested_spans_and_flatten():
+    with trace("pipeline", model="m") as root:
+        with span("research", urls=2):
+            with span("llm"):
+                pass
+            with span("llm"):
+                pass
+        with span("upsert"):
+            pass
+    assert current_span() is None
+
+    tree = root.to_dict()
+    assert tree["name"] == "pipeline" and tree["attrs"] == {"model": "m"}
+    assert [c["name"] for c in tree["children"]] == ["research", "upsert"]
+    assert len(tree["children"][0]["children"]) == 2
+
+    flat = root.flatten()
+    assert set(flat) == {"research", "research/llm", "upsert"}
+    assert flat["research/llm"] <= flat["research"] + 0.1
+
+
+def test_bound_thread_pool_jobs_nest_under_caller():
+    def job(i):
+        with span("url", i=i):
+            with span("llm"):
+                return i
+
+    with trace("pipeline") as root:
+        with span("verify"):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                assert sorted(pool.map(bind_context(job), range(8))) == list(range(8))
+
+    verify = root.to_dict()["children"][0]
+    assert len(verify["children"]) == 8
+    assert all(c["children"][0]["name"] == "llm" for c in verify["children"])
+
+
+def test_error_is_recorded_and_span_outside_trace_is_detached():
+    with trace("pipeline") as root:
+        with pytest.raises(ValueError):
+            with span("parse"):
+                raise ValueError("bad")
+    assert root.to_dict()["children"][0]["error"] == "ValueError"
+
+    with span("orphan") as s:
+        pass
+    assert s.duration_ms >= 0 and current_span() is None
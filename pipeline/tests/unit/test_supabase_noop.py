@@ -1,9 +1,128 @@
 from __future__ import annotations
 
-from pipeline.supabase_client import upsert_funding_events
+import threading
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+from pipeline.supabase_client import upsert_funding_events, upsert_rows
 
 
 def test_upsert_no_events_returns_empty():
     resp = upsert_funding_events([])
     assert resp["data"] == []
     assert resp["error"] is None
+
+
+class _FakeTable:
+    def __init__(self, client, name):
+        self.client, self.name = client, name
+
+    def upsert(self, rows, **kwargs):
+        self.client.kwargs = kwargs
+        self.rows = list(rows)
+        return self
+
+    def execute(self):
+        with self.client.lock:
+            self.client.requests.append([r["id"] for r in self.rows])
+        error = self.client.fail(self.rows)
+        if error is not None:
+            raise error
+        with self.client.lock:
+            self.client.written.extend(r["id"] for r in self.rows)
+        return SimpleNamespace(data=[], error=None)
+
+
+class _FakeClient:
+    def __init__(self, fail=lambda rows: None):
+        self.fail = fail
+        self.requests = []
+        self.written = []
+        self.kwargs = {}
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return _FakeTable(self, name)
+
+
+def test_upsert_rows_chunks_in_parallel_with_minimal_return():
+    client = _FakeClient()
+    rows = [{"id": i} for i in range(10)]
+    resp = upsert_rows("t", rows, on_conflict="id", client=client, chunk_size=3, concurrency=3)
+    assert resp["error"] is None and resp["rejected"] == [] and resp["failed"] == []
+    assert sorted(client.written) == list(range(10))
+    assert sorted(len(r) for r in client.requests) == [1, 3, 3, 3]
+    assert [c["rows"] for c in resp["chunks"]] == [3, 3, 3, 1]
+    assert all(c["attempts"] == 1 and c["ms"] >= 0 for c in resp["chunks"])
+    assert client.kwargs["on_conflict"] == "id"
+    assert getattr(client.kwargs["returning"], "value", None) == "minimal"
+
+
+def test_upsert_rows_bisects_to_the_bad_row():
+    def _fail(rows):
+        if any(r["id"] == 5 for r in rows):
+            return APIError({"code": "23502", "message": "null value in column startup_name"})
+        return None
+
+    client = _FakeClient(_fail)
+    rows = [{"id": i} for i in range(8)]
+    resp = upsert_rows("t", rows, on_conflict="id", client=client, chunk_size=8, concurrency=1)
+    assert sorted(client.written) == [0, 1, 2, 3, 4, 6, 7]
+    assert [r["row"]["id"] for r in resp["rejected"]] == [5]
+    assert resp["failed"] == [] and "null value" in resp["error"]
+    # 8 -> 4+4 -> 2+2 -> 1+1: log2(8) extra levels, not one request per row
+    assert len(client.requests) == 7
+
+
+def test_upsert_rows_retries_transient_errors(monkeypatch):
+    monkeypatch.setenv("SUPABASE_UPSERT_RETRY_BASE_DELAY", "0")
+    monkeypatch.setenv("SUPABASE_UPSERT_RETRIES", "2")
+    errors = [APIError({"code": "57014", "message": "canceling statement due to statement timeout"})]
+    client = _FakeClient(lambda rows: errors.pop() if errors else None)
+    resp = upsert_rows("t", [{"id": 1}, {"id": 2}], on_conflict="id", client=client)
+    assert resp["error"] is None and client.written == [1, 2]
+    assert [c["attempts"] for c in resp["chunks"]] == [1, 2]
+
+    always = _FakeClient(lambda rows: TimeoutError("read timed out"))
+    resp = upsert_rows("t", [{"id": 1}, {"id": 2}], on_conflict="id", client=always)
+    assert [f["row"]["id"] for f in resp["failed"]] == [1, 2] and resp["rejected"] == []
+    assert len(always.requests) == 3  # no bisection on transient errors
+
+
+def test_upsert_rows_fails_whole_chunk_on_schema_errors():
+    error = APIError({"code": "PGRST204", "message": "Could not find the 'amount' column of 'funding_events' in the schema cache"})
+    client = _FakeClient(lambda rows: error)
+    rows = [{"id": i} for i in range(8)]
+    resp = upsert_rows("t", rows, on_conflict="id", client=client, chunk_size=4, concurrency=1)
+    assert len(client.requests) == 2  # one per chunk, no bisection
+    assert [f["row"]["id"] for f in resp["failed"]] == list(range(8)) and resp["rejected"] == []
+    assert "schema cache" in resp["error"] and client.written == []
+
+
+def test_get_client_is_shared_pooled_and_closable(monkeypatch):
+    from pipeline import supabase_client as sc
+
+    created = []
+    monkeypatch.setattr(sc, "create_client", lambda url, key, options=None: created.append((url, options)) or object())
+    monkeypatch.setattr(sc, "_CLIENT", None)
+    monkeypatch.setenv("SUPABASE_URL", "https://a.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "k")
+    monkeypatch.setenv("SUPABASE_POOL_SIZE", "3")
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(sc.get_client())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1 and all(c is clients[0] for c in clients)
+    http = created[0][1].httpx_client
+    assert http._transport._pool._max_connections == 3
+
+    monkeypatch.setenv("SUPABASE_URL", "https://b.supabase.co")
+    other = sc.get_client()
+    assert other is not clients[0] and http.is_closed
+
+    sc.close_client()
+    assert sc._CLIENT is None and created[1][1].httpx_client.is_closed
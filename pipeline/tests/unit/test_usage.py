@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pipeline.llm import gemini_client as gc
+from pipeline.llm import usage as u
+from pipeline.utils.spans import span, trace
+
+
+def test_agent_key_maps_repo_roles():
+    assert u.agent_key("Expert Climate Tech Investment Researcher") == "researcher"
+    assert u.agent_key("Data Verification and Structuring Specialist") == "verifier"
+    assert u.agent_key("Company Profile Enricher") == "enricher"
+    assert u.agent_key("Climate Tech Company List Extractor") == "extractor"
+    assert u.agent_key(None) == "unknown"
+
+
+def test_summarize_usage_per_stage_agent_model(monkeypatch):
+    monkeypatch.setenv("LLM_PRICING", "gemini-2.0-flash:input=1,output=2")
+    with trace("pipeline") as root:
+        with span("research"):
+            with span("llm", model="gemini/gemini-2.0-flash", agent="researcher") as s:
+                s.set(prompt_tokens=1000, completion_tokens=500)
+        with span("verify"):
+            with span("url"):
+                with span("llm", model="gemini/gemini-2.0-flash", agent="verifier") as s:
+                    s.set(prompt_tokens=3000, completion_tokens=500)
+                with span("llm", model="gemini/gemini-2.0-flash", agent="verifier", cached=True):
+                    pass
+
+    out = u.summarize_usage(root, validated_count=4)
+    assert out["total_tokens"] == 5000 and out["calls"] == 3 and out["cached_calls"] == 1
+    assert out["tokens_per_validated_event"] == 1250.0
+    assert out["cost_usd"] == round((4000 * 1 + 1000 * 2) / 1_000_000, 6)
+    assert out["by_stage"]["research"]["total_tokens"] == 1500
+    assert out["by_stage"]["verify"]["total_tokens"] == 3500
+    assert out["by_agent"]["verifier"]["calls"] == 2
+    assert out["by_model"]["gemini/gemini-2.0-flash"]["prompt_tokens"] == 4000
+
+
+def test_unpriced_model_reports_unknown_cost(monkeypatch):
+    monkeypatch.setenv("LLM_PRICING", "")
+    monkeypatch.setattr(u, "litellm", None)
+    with trace("pipeline") as root:
+        with span("llm", model="local/mystery") as s:
+            s.set(prompt_tokens=10, completion_tokens=10)
+    out = u.summarize_usage(root)
+    assert out["cost_usd"] is None and out["tokens_per_validated_event"] is None
+
+
+def test_built_llm_attaches_provider_usage_to_span(monkeypatch):
+    class Agent:
+        role = "Data Verification and Structuring Specialist"
+
+    class StubLLM:  # noqa: N801 - mimic external class name
+        def __init__(self, model, temperature, timeout, max_tokens, seed):  # type: ignore[no-untyped-def]
+            self.model = model
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):  # type: ignore[no-untyped-def]
+            # CrewAI reports usage to each callback after the completion
+            for cb in callbacks or []:
+                cb.log_success_event(kwargs={}, response_obj={"usage": {"prompt_tokens": 7, "completion_tokens": 3}}, start_time=0, end_time=0)
+            return "ok"
+
+    monkeypatch.setattr(gc, "LLM", StubLLM)
+    monkeypatch.setattr(gc, "throttle", lambda key, tokens=0: 0.0)
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+
+    llm = gc.build_llm(model="gemini-2.0-flash")
+    with trace("pipeline") as root:
+        assert llm.call("hi", None, [], None, None, Agent()) == "ok"
+    attrs = root.to_dict()["children"][0]["attrs"]
+    assert attrs["agent"] == "verifier"
+    assert (attrs["prompt_tokens"], attrs["completion_tokens"]) == (7, 3)
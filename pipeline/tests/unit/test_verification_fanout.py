@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from pipeline.main import verify_urls
+from pipeline.utils.url_utils import extract_urls
+
+
+def test_extract_urls_tolerates_bullets_and_markdown():
+    text = (
+        "Here are the URLs:\n"
+        "1. https://techcrunch.com/2025/01/02/grid-co-raises/\n"
+        "- [Reuters](https://www.reuters.com/a/b).\n"
+        "https://techcrunch.com/2025/01/02/grid-co-raises/\n"
+        "not a url\n"
+    )
+    assert extract_urls(text) == [
+        "https://techcrunch.com/2025/01/02/grid-co-raises/",
+        "https://www.reuters.com/a/b",
+    ]
+
+
+def test_verify_urls_runs_jobs_concurrently_and_merges_in_url_order():
+    urls = ["https://a.example/1", "https://b.example/2", "https://c.example/3"]
+    # All three jobs must be in flight at once for the barrier to release.
+    barrier = threading.Barrier(len(urls), timeout=5)
+
+    def verify(url):
+        barrier.wait()
+        return [{"startup_name": url[-1], "source_url": url}], f"raw {url}"
+
+    events, outputs, errors = verify_urls(urls, verify, max_workers=3)
+    assert [e["startup_name"] for e in events] == ["1", "2", "3"]
+    assert set(outputs) == set(urls)
+    assert errors == {}
+
+
+def test_verify_urls_keeps_partial_results_on_transient_failure():
+    def verify(url):
+        if url.endswith("bad"):
+            raise RuntimeError("429 rate limit")
+        return [{"startup_name": "Ok", "source_url": url}], "raw"
+
+    events, _, errors = verify_urls(["https://x/ok", "https://x/bad"], verify, max_workers=2)
+    assert len(events) == 1
+    assert list(errors) == ["https://x/bad"]
+
+
+def test_verify_urls_raises_when_every_job_fails():
+    def verify(url):
+        raise RuntimeError("429 rate limit")
+
+    with pytest.raises(RuntimeError, match="429"):
+        verify_urls(["https://x/1", "https://x/2"], verify, max_workers=2)
+
+
+def test_verify_urls_propagates_non_retryable_error():
+    def verify(url):
+        if url.endswith("1"):
+            raise RuntimeError("Invalid API key")
+        return [], "raw"
+
+    with pytest.raises(RuntimeError, match="Invalid API key"):
+        verify_urls(["https://x/1", "https://x/2"], verify, max_workers=1)
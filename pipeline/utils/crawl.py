@@ -0,0 +1,200 @@
+"""
+Building blocks for crawling paginated list sites (`seed_companies --crawl`).
+
+- `Frontier`: priority queue of URLs still to fetch. Shallower pages come first, and
+  at equal depth the next page of a list comes before a category page. Each URL is
+  queued once (compared by `normalize_url`).
+- `discover_links(page_url, candidates)`: pagination links (`rel="next"`, "Next"/"›"
+  or page-number anchors pointing at `?page=N`, `/page/N` style URLs) and same-site
+  list links (paths like /companies, /category/..., /directory/...) on a parsed page.
+- `RobotsCache`: robots.txt per host, fetched once through the HTTP cache. A 4xx
+  means no restrictions. An unreachable robots.txt (5xx, network error) blocks the
+  host for the crawl, as RFC 9309 asks. Crawl-delay is reported to the caller.
+
+Crawled pages and robots.txt are requested with `crawl_user_agent()`, and robots.txt
+rules are evaluated for its product token, so sites see the same agent they address.
+
+Environment:
+- CRAWL_USER_AGENT (default: CRAWL_USER_AGENT below)
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from pipeline.utils.domains import registrable_domain
+from pipeline.utils.html_candidates import Candidates
+from pipeline.utils.http_cache import cached_get
+from pipeline.utils.url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+NEXT = "next"
+LIST = "list"
+_KIND_RANK = {NEXT: 0, LIST: 1}
+
+ROBOTS_AGENT = "ClimateFundingIntel"
+CRAWL_USER_AGENT = f"{ROBOTS_AGENT}/1.0 (+https://github.com/Valbows/Climate-Funding-Intel)"
+_ROBOTS_MAX_BYTES = 512 * 1024
+
+_NEXT_TEXT = re.compile(r"^(next( page)?|more|load more|older( posts| entries)?|next\s*[›»>→]+|[›»>→]+)$", re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r"^\d{1,4}$")
+_PAGE_URL = re.compile(r"([?&](page|p|pg|paged|offset|start)=\d+)|(/page/\d+/?$)", re.IGNORECASE)
+_LIST_PATH = re.compile(
+    r"/(companies|startups|directory|list|lists|category|categories|sector|sectors|portfolio|"
+    r"industries|industry|topics?|tags?|members|landscape)(/|$|\?|-)",
+    re.IGNORECASE,
+)
+_SKIP_EXT = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".gz",
+    ".mp3", ".mp4", ".css", ".js", ".json", ".xml", ".rss", ".ics", ".csv", ".xlsx",
+)
+
+
+def crawl_user_agent() -> str:
+    return os.getenv("CRAWL_USER_AGENT", "").strip().strip('"') or CRAWL_USER_AGENT
+
+
+def robots_agent(user_agent: str) -> str:
+    """Product token robots.txt groups are matched against ("Name/1.0 (...)" -> "Name")."""
+    return user_agent.split("/", 1)[0].split(" ", 1)[0] or ROBOTS_AGENT
+
+
+def _site(host: str) -> str:
+    return registrable_domain(host) or host
+
+
+def _crawlable(url: str) -> Optional[Any]:
+    try:
+        p = urlparse(url)
+    except ValueError:
+        return None
+    if p.scheme not in ("http", "https") or not p.hostname:
+        return None
+    if p.path.lower().endswith(_SKIP_EXT):
+        return None
+    return p
+
+
+def discover_links(page_url: str, candidates: Candidates) -> List[Tuple[str, str]]:
+    """[(absolute URL, NEXT | LIST)] worth crawling from a page, in document order.
+
+    Only links on the page's own site (registrable domain) are returned; fragments are
+    dropped. Number-only anchors count as pagination only when the URL looks paged, so
+    "2025" linking to an archive is not followed.
+    """
+    page = urlparse(page_url)
+    site = _site(page.hostname or "")
+    out: List[Tuple[str, str]] = []
+    seen = {page_url.split("#", 1)[0]}
+
+    def _add(href: str, kind: str) -> None:
+        url = urljoin(page_url, href).split("#", 1)[0]
+        p = _crawlable(url)
+        if p is None or url in seen or _site(p.hostname) != site:
+            return
+        seen.add(url)
+        out.append((url, kind))
+
+    for href in candidates.rel_next:
+        _add(href, NEXT)
+    for href, text, title in candidates.anchors:
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+            continue
+        label = (text or title).strip()
+        if _NEXT_TEXT.match(label) or (_PAGE_NUMBER.match(label) and _PAGE_URL.search(href)):
+            _add(href, NEXT)
+        elif _LIST_PATH.search(urlparse(urljoin(page_url, href)).path + "/"):
+            _add(href, LIST)
+    return out
+
+
+class Frontier:
+    """URLs to crawl, popped by (depth, kind, discovery order)."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._seen: set[str] = set()
+        self._seq = itertools.count()
+
+    def push(self, url: str, depth: int, kind: str = LIST) -> bool:
+        """Queue `url` unless it was queued before; returns whether it was added."""
+        try:
+            key = normalize_url(url)
+        except ValueError:
+            return False
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (depth, _KIND_RANK.get(kind, 1), next(self._seq), url))
+        return True
+
+    def pop(self) -> Tuple[str, int]:
+        depth, _, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class RobotsCache:
+    """robots.txt rules per scheme+host, fetched on first use."""
+
+    def __init__(self, session: Any = None, timeout: float = 20, user_agent: Optional[str] = None):
+        self.session = session
+        self.timeout = timeout
+        self.user_agent = user_agent or crawl_user_agent()
+        self.agent = robots_agent(self.user_agent)
+        self._lock = threading.Lock()
+        self._parsers: Dict[str, Optional[RobotFileParser]] = {}
+
+    def _load(self, origin: str) -> Optional[RobotFileParser]:
+        # None means the host is blocked for this crawl
+        url = f"{origin}/robots.txt"
+        parser = RobotFileParser(url)
+        try:
+            resp = cached_get(
+                url,
+                headers={"User-Agent": self.user_agent},
+                timeout=self.timeout,
+                session=self.session,
+                max_bytes=_ROBOTS_MAX_BYTES,
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.warning("robots.txt unreachable at %s (%s); skipping host", url, e)
+            return None
+        if resp.status >= 500:
+            logger.warning("robots.txt at %s returned %s; skipping host", url, resp.status)
+            return None
+        if resp.status >= 400:
+            parser.allow_all = True
+        parser.parse(resp.text.splitlines() if resp.status < 400 else [])
+        return parser
+
+    def _parser(self, url: str) -> Optional[RobotFileParser]:
+        p = urlparse(url)
+        origin = f"{p.scheme}://{p.netloc.lower()}"
+        with self._lock:
+            if origin in self._parsers:
+                return self._parsers[origin]
+        parser = self._load(origin)
+        with self._lock:
+            return self._parsers.setdefault(origin, parser)
+
+    def allowed(self, url: str) -> bool:
+        parser = self._parser(url)
+        return parser is not None and parser.can_fetch(self.agent, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        parser = self._parser(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.agent)
+        return float(delay) if delay is not None else None
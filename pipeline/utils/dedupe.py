@@ -0,0 +1,262 @@
+"""
+Entity resolution for funding events: one funding round reported by several outlets
+(TechCrunch, Reuters, the press release) collapses into a single row.
+
+`funding_events` is unique on `source_url` only, so without this each article becomes
+its own row. Events are indexed under blocking keys built from the normalized startup
+name (`slugify`, legal suffixes dropped; first and last four characters), a
+logarithmic amount bucket and a funding-date window. Fuzzy comparison only runs
+against events in neighbouring blocks, so a batch costs roughly O(n * block size)
+instead of O(n^2). Matches are joined with union-find.
+
+Two events match when their names are equal or similar (difflib ratio), no field
+present on both disagrees (amount within tolerance, dates within the window, same
+funding stage), and at least one of amount/date is present on both to compare.
+
+The merged row keeps the canonical event's fields, fills gaps from the other
+reports, and lists every report's URL in `sources`
+(migration `supabase/sql/012_funding_events_sources.sql`).
+
+Environment:
+- EVENT_DEDUPE (default: true)
+- DEDUPE_DATE_WINDOW_DAYS (default: 14)
+- DEDUPE_AMOUNT_TOLERANCE (relative, default: 0.1)
+- DEDUPE_NAME_THRESHOLD (difflib ratio, default: 0.88)
+"""
+from __future__ import annotations
+
+import math
+import os
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from pipeline.utils.event_sanitizer import DB_FIELDS
+from pipeline.utils.slug import slugify
+
+# Trailing name tokens that do not distinguish companies ("Gridco Inc." == "Gridco")
+_LEGAL_SUFFIXES = frozenset(
+    ("inc", "llc", "ltd", "limited", "gmbh", "corp", "corporation",
+     "sa", "sas", "ag", "bv", "nv", "plc", "oy", "ab", "pbc")
+)
+_KEY_CHARS = 4
+
+
+def dedupe_enabled() -> bool:
+    return os.getenv("EVENT_DEDUPE", "true").strip().strip('"').lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)).strip().strip('"'))
+    except ValueError:
+        return default
+
+
+def name_key(name: Any) -> str:
+    """Compact comparison key: slug without hyphens and trailing legal suffixes."""
+    tokens = slugify(str(name or "")).split("-")
+    while len(tokens) > 1 and tokens[-1] in _LEGAL_SUFFIXES:
+        tokens.pop()
+    return "".join(tokens)
+
+
+def _day(value: Any) -> Optional[int]:
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+def _amount(value: Any) -> Optional[float]:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if v > 0 else None
+
+
+class _Features(NamedTuple):
+    name: str
+    bigrams: frozenset
+    amount: Optional[float]
+    day: Optional[int]
+    stage: Optional[str]
+
+
+class EventIndex:
+    """Incremental blocking index over funding events.
+
+    `add(event)` returns (cluster id, matched) where `matched` is True when the event
+    joined an existing cluster; `clusters()` lists member positions in insertion order.
+    """
+
+    def __init__(
+        self,
+        *,
+        date_window_days: Optional[int] = None,
+        amount_tolerance: Optional[float] = None,
+        name_threshold: Optional[float] = None,
+    ):
+        self.window = int(date_window_days if date_window_days is not None else _env_float("DEDUPE_DATE_WINDOW_DAYS", 14))
+        self.window = max(1, self.window)
+        self.tolerance = amount_tolerance if amount_tolerance is not None else _env_float("DEDUPE_AMOUNT_TOLERANCE", 0.1)
+        self.threshold = name_threshold if name_threshold is not None else _env_float("DEDUPE_NAME_THRESHOLD", 0.88)
+        # Bucket width matches the tolerance, so matching amounts are at most one bucket apart
+        self._log_base = -math.log1p(-min(max(self.tolerance, 0.01), 0.9))
+        self._features: List[_Features] = []
+        self._parent: List[int] = []
+        # (name block, amount bucket, date window) -> entry ids
+        self._blocks: Dict[Tuple[str, Optional[int], Optional[int]], List[int]] = {}
+        # name block -> keys in use, for probes with a missing amount or date
+        self._keys_by_name: Dict[str, Set[Tuple[str, Optional[int], Optional[int]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _name_blocks(self, key: str) -> Tuple[str, ...]:
+        if len(key) <= _KEY_CHARS:
+            return ("=" + key,)
+        # A typo at one end of the name still shares the block of the other end
+        return ("^" + key[:_KEY_CHARS], "$" + key[-_KEY_CHARS:])
+
+    def _buckets(self, f: _Features) -> Tuple[Optional[int], Optional[int]]:
+        ab = int(math.log(f.amount) / self._log_base) if f.amount is not None else None
+        dw = f.day // self.window if f.day is not None else None
+        return ab, dw
+
+    def _probe(self, block: str, ab: Optional[int], dw: Optional[int]) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        # Keys of neighbouring blocks; a missing amount/date on either side matches any
+        keys = self._keys_by_name.get(block)
+        if not keys:
+            return []
+        if ab is not None and dw is not None and len(keys) > 16:
+            probes = [(block, a, d) for a in (ab - 1, ab, ab + 1, None) for d in (dw - 1, dw, dw + 1, None)]
+            return [k for k in probes if k in keys]
+        return [
+            k
+            for k in keys
+            if (ab is None or k[1] is None or -1 <= k[1] - ab <= 1)
+            and (dw is None or k[2] is None or -1 <= k[2] - dw <= 1)
+        ]
+
+    def _similar(self, a: _Features, b: _Features) -> bool:
+        if a.name == b.name:
+            return True
+        if not a.name or not b.name:
+            return False
+        shorter, longer = sorted((len(a.name), len(b.name)))
+        if 2.0 * shorter / (shorter + longer) < self.threshold:
+            return False
+        # Cheap character-bigram overlap first; difflib only for plausible pairs
+        if 2.0 * len(a.bigrams & b.bigrams) < (self.threshold - 0.2) * (len(a.bigrams) + len(b.bigrams)):
+            return False
+        return SequenceMatcher(None, a.name, b.name, autojunk=False).ratio() >= self.threshold
+
+    def _matches(self, a: _Features, b: _Features) -> bool:
+        if a.stage and b.stage and a.stage != b.stage:
+            return False
+        evidence = False
+        if a.amount is not None and b.amount is not None:
+            if abs(a.amount - b.amount) > self.tolerance * max(a.amount, b.amount):
+                return False
+            evidence = True
+        if a.day is not None and b.day is not None:
+            if abs(a.day - b.day) > self.window:
+                return False
+            evidence = True
+        return evidence and self._similar(a, b)
+
+    def add(self, event: Dict[str, Any]) -> Tuple[int, bool]:
+        stage = event.get("funding_stage")
+        key = name_key(event.get("startup_name"))
+        f = _Features(
+            key,
+            frozenset(key[i : i + 2] for i in range(len(key) - 1)),
+            _amount(event.get("amount_raised_usd")),
+            _day(event.get("funding_date")),
+            str(stage).strip().lower() if stage else None,
+        )
+        idx = len(self._features)
+        self._features.append(f)
+        self._parent.append(idx)
+        ab, dw = self._buckets(f)
+        blocks = self._name_blocks(f.name)
+
+        candidates: Set[int] = set()
+        for block in blocks:
+            for key in self._probe(block, ab, dw):
+                candidates.update(self._blocks[key])
+
+        matched = False
+        features = self._features
+        for other in sorted(candidates):
+            root = self._find(other)
+            mine = self._find(idx)
+            if root == mine or not self._matches(f, features[other]):
+                continue
+            # Union: the older cluster root stays canonical
+            lo, hi = (root, mine) if root < mine else (mine, root)
+            self._parent[hi] = lo
+            matched = True
+
+        for block in blocks:
+            key = (block, ab, dw)
+            self._blocks.setdefault(key, []).append(idx)
+            self._keys_by_name.setdefault(block, set()).add(key)
+        return self._find(idx), matched
+
+    def clusters(self) -> List[List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(self._features)):
+            groups.setdefault(self._find(i), []).append(i)
+        return sorted(groups.values(), key=lambda members: members[0])
+
+
+def with_sources(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Row as written to `funding_events`: `sources` lists every report's URL."""
+    if row.get("sources"):
+        return row
+    return {**row, "sources": [row["source_url"]]}
+
+
+def merge_events(members: List[Dict[str, Any]], prefer: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Merge reports of one round. The canonical report is the first one whose URL is in
+    `prefer` (e.g. already written), else the first; gaps are filled from the others."""
+    canonical = next((m for m in members if prefer and m.get("source_url") in prefer), members[0])
+    merged = dict(canonical)
+    for field in DB_FIELDS:
+        if merged.get(field) is None:
+            merged[field] = next((m.get(field) for m in members if m.get(field) is not None), None)
+    sources: List[str] = []
+    for m in [canonical] + members:
+        for url in [m.get("source_url")] + list(m.get("sources") or []):
+            if url and url not in sources:
+                sources.append(url)
+    merged["sources"] = sources
+    return merged
+
+
+def dedupe_events(
+    events: List[Dict[str, Any]],
+    *,
+    prefer: Optional[Set[str]] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Collapse reports of the same funding round. Returns (rows, merged_count), where
+    rows are in first-report order and merged_count is how many reports were folded in."""
+    index = EventIndex()
+    for e in events:
+        index.add(e)
+    rows = [merge_events([events[i] for i in members], prefer) for members in index.clusters()]
+    return rows, len(events) - len(rows)
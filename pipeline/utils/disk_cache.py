@@ -0,0 +1,135 @@
+"""
+SQLite-backed key/value cache shared across processes on one host.
+
+- Values are zlib-compressed blobs with a small JSON metadata dict
+- Entries carry `stored_at` (for TTL decisions by callers) and `accessed_at` (for LRU)
+- Total stored bytes are capped; least-recently-used entries are evicted first
+
+SQLite gives us cross-process locking for free, so the pipeline cron, the enrichment
+runner spawned by the web route and seeding can all point at the same file.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache")
+
+
+def cache_dir() -> str:
+    """Directory holding on-disk caches (CACHE_DIR, default pipeline/.cache)."""
+    return os.getenv("CACHE_DIR", "").strip() or DEFAULT_CACHE_DIR
+
+
+class CacheEntry(NamedTuple):
+    value: bytes
+    meta: Dict[str, Any]
+    stored_at: float
+
+
+_SCHEMA = """
+create table if not exists entries (
+  key text primary key,
+  value blob not null,
+  meta text not null,
+  stored_at real not null,
+  accessed_at real not null,
+  size integer not null
+);
+create index if not exists idx_entries_accessed on entries (accessed_at);
+"""
+
+
+class DiskCache:
+    """Byte-bounded LRU cache persisted in a single SQLite file."""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One autocommit connection per thread; sqlite3 connections must not cross threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("pragma synchronous=normal")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        conn = self._conn()
+        row = conn.execute(
+            "select value, meta, stored_at from entries where key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("update entries set accessed_at = ? where key = ?", (time.time(), key))
+        try:
+            return CacheEntry(zlib.decompress(row[0]), json.loads(row[1]), float(row[2]))
+        except Exception as e:  # corrupt entry: drop it and treat as a miss
+            logger.debug("Dropping unreadable cache entry %s: %s", key, e)
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: bytes, meta: Optional[Dict[str, Any]] = None) -> None:
+        blob = zlib.compress(value, 6)
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "insert or replace into entries (key, value, meta, stored_at, accessed_at, size) "
+            "values (?, ?, ?, ?, ?, ?)",
+            (key, blob, json.dumps(meta or {}), now, now, len(blob)),
+        )
+        self.evict()
+
+    def touch(self, key: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Mark an entry fresh again (e.g. after a 304) without rewriting the value."""
+        now = time.time()
+        conn = self._conn()
+        if meta is None:
+            conn.execute(
+                "update entries set stored_at = ?, accessed_at = ? where key = ?", (now, now, key)
+            )
+        else:
+            conn.execute(
+                "update entries set stored_at = ?, accessed_at = ?, meta = ? where key = ?",
+                (now, now, json.dumps(meta), key),
+            )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("delete from entries where key = ?", (key,))
+
+    def total_bytes(self) -> int:
+        return int(self._conn().execute("select coalesce(sum(size), 0) from entries").fetchone()[0])
+
+    def evict(self) -> int:
+        """Delete least-recently-used entries until under `max_bytes`. Returns rows removed."""
+        if not self.max_bytes:
+            return 0
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        conn = self._conn()
+        rows = conn.execute("select key, size from entries order by accessed_at asc").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("delete from entries where key = ?", (key,))
+            total -= int(size)
+            removed += 1
+        logger.debug("Evicted %s cache entries from %s", removed, self.path)
+        return removed
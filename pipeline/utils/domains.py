@@ -0,0 +1,205 @@
+"""
+Registrable domains (eTLD+1) and domain-list membership for seeding.
+
+Hosts are matched label by label, right to left, against suffix tries, so each
+lookup costs O(number of labels) whatever the size of the list:
+
+- `registrable_domain("shop.gridco.co.uk")` -> "gridco.co.uk" using the Public Suffix
+  List (normal, wildcard `*.` and exception `!` rules; ICANN and private sections)
+- `DomainSet(["twitter.com", ...]).contains("mobile.twitter.com")` -> True; matches the
+  domain itself and its subdomains only (`x.com` does not match `dropbox.com`)
+
+The list is read once per process from PUBLIC_SUFFIX_LIST_PATH, else the system copy
+(`/usr/share/publicsuffix/public_suffix_list.dat`, Debian package `publicsuffix`).
+Without either, a small built-in set of common multi-label suffixes is used, and
+other hosts fall back to the last label as the suffix.
+
+Environment:
+- PUBLIC_SUFFIX_LIST_PATH (optional)
+"""
+from __future__ import annotations
+
+import ipaddress
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PSL_PATHS = (
+    "/usr/share/publicsuffix/public_suffix_list.dat",
+    "/etc/ssl/public_suffix_list.dat",
+)
+
+# Used only when no list file is available
+_FALLBACK_SUFFIXES = (
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk",
+    "com.au", "net.au", "org.au", "co.nz", "org.nz", "co.jp", "ne.jp", "or.jp",
+    "co.in", "net.in", "org.in", "co.za", "com.br", "com.cn", "com.hk", "com.sg",
+    "com.mx", "com.tr", "co.il", "co.kr", "com.tw", "com.ar", "co.id", "com.my",
+    "github.io", "gitlab.io", "herokuapp.com", "vercel.app", "netlify.app", "pages.dev",
+)
+
+# Terminal markers stored under this key in a trie node (labels are never empty)
+_END = ""
+_RULE = 1
+_EXCEPTION = 2
+
+
+class SuffixTrie:
+    """Domains stored as reversed label paths: com -> twitter -> {END}."""
+
+    __slots__ = ("root", "size")
+
+    def __init__(self) -> None:
+        self.root: Dict[str, dict] = {}
+        self.size = 0
+
+    def add(self, domain: str, kind: int = _RULE) -> None:
+        node = self.root
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = kind
+
+
+def _labels(host: str) -> List[str]:
+    return host.lower().strip(". ").split(".")
+
+
+def _ascii(domain: str) -> Optional[str]:
+    # Punycode form of a rule with non-ASCII labels, so "xn--" hosts match too
+    try:
+        return ".".join(
+            label if label == "*" or label.isascii() else label.encode("idna").decode("ascii")
+            for label in domain.split(".")
+        )
+    except UnicodeError:
+        return None
+
+
+def parse_psl(lines: Iterable[str]) -> SuffixTrie:
+    trie = SuffixTrie()
+    for line in lines:
+        rule = line.strip().split(" ", 1)[0]
+        if not rule or rule.startswith("//"):
+            continue
+        kind = _RULE
+        if rule.startswith("!"):
+            rule, kind = rule[1:], _EXCEPTION
+        trie.add(rule, kind)
+        if not rule.isascii():
+            encoded = _ascii(rule)
+            if encoded:
+                trie.add(encoded, kind)
+    return trie
+
+
+def psl_path() -> Optional[str]:
+    configured = os.getenv("PUBLIC_SUFFIX_LIST_PATH", "").strip().strip('"')
+    if configured:
+        return configured
+    return next((p for p in SYSTEM_PSL_PATHS if os.path.exists(p)), None)
+
+
+_PSL: Optional[SuffixTrie] = None
+_PSL_LOCK = threading.Lock()
+
+
+def public_suffixes() -> SuffixTrie:
+    """Process-wide Public Suffix List trie, loaded on first use."""
+    global _PSL
+    if _PSL is None:
+        with _PSL_LOCK:
+            if _PSL is None:
+                path = psl_path()
+                if path:
+                    with open(path, "r", encoding="utf-8") as f:
+                        _PSL = parse_psl(f)
+                else:
+                    logger.warning("No public suffix list found; using a built-in subset (set PUBLIC_SUFFIX_LIST_PATH)")
+                    _PSL = parse_psl(_FALLBACK_SUFFIXES)
+    return _PSL
+
+
+def public_suffix_length(labels: List[str], trie: Optional[SuffixTrie] = None) -> int:
+    """Number of trailing `labels` that form the public suffix (at least 1: unlisted TLDs count)."""
+    node = (trie or public_suffixes()).root
+    best = 1
+    depth = 0
+    for label in reversed(labels):
+        depth += 1
+        exact = node.get(label)
+        if exact is not None and exact.get(_END) == _EXCEPTION:
+            # "!city.kawasaki.jp": the parent is the suffix, this label is registrable
+            return depth - 1
+        wild = node.get("*")
+        if (exact is not None and exact.get(_END) == _RULE) or (wild is not None and wild.get(_END) == _RULE):
+            best = depth
+        node = exact if exact is not None else wild
+        if node is None:
+            break
+    return best
+
+
+def _is_ip(host: str) -> bool:
+    # Domain names never end in a digit (TLDs are alphabetic), so skip the parse for them
+    if not host[-1:].isdigit() and ":" not in host:
+        return False
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=65536)
+def registrable_domain(host: str) -> Optional[str]:
+    """eTLD+1 of `host` ("a.b.gridco.co.uk" -> "gridco.co.uk"); the host itself for IPs
+    and single labels, None when the host is a public suffix."""
+    if not host:
+        return None
+    if _is_ip(host):
+        return host.strip("[]")
+    labels = _labels(host)
+    if len(labels) < 2:
+        return labels[0] if labels else None
+    n = public_suffix_length(labels)
+    if n >= len(labels):
+        return None
+    return ".".join(labels[-(n + 1):])
+
+
+def domain_label(host: str) -> str:
+    """The label just left of the public suffix ("gridco" for "www.gridco.co.uk")."""
+    reg = registrable_domain(host)
+    if not reg or _is_ip(reg):
+        return host
+    return reg.split(".", 1)[0]
+
+
+class DomainSet:
+    """Membership test for a list of domains, matching each domain and its subdomains."""
+
+    def __init__(self, domains: Iterable[str]):
+        self._trie = SuffixTrie()
+        for d in domains:
+            self._trie.add(d)
+
+    def __len__(self) -> int:
+        return self._trie.size
+
+    def contains(self, host: str) -> bool:
+        node = self._trie.root
+        for label in reversed(_labels(host)):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    __contains__ = contains
@@ -0,0 +1,216 @@
+"""
+Append-only ledger of events dropped by the pipeline (sanitizer, schema validation,
+database rejects), kept across runs for drop-rate trends.
+
+Entries are JSON lines `{"ts", "run_id", "model", "reason", "error"?, "record"}` in
+gzip segments under DROP_LEDGER_DIR:
+
+    drops-20261016-000.jsonl.gz
+    drops-20261016-001.jsonl.gz   (after the first passed DROP_LEDGER_MAX_BYTES)
+
+A new segment starts each UTC day or when the current one reaches the size cap.
+Each run appends its drops as one gzip member, written in a single call under an
+exclusive lock, so concurrent runs never interleave or clobber each other. Readers
+see a segment as one continuous JSONL stream. Segments older than
+DROP_LEDGER_RETENTION_DAYS are deleted on append.
+
+Query with `python -m pipeline.scripts.drops --since 2026-10-01`.
+
+Environment:
+- DROP_LEDGER_DIR (default: pipeline/.drops)
+- DROP_LEDGER_MAX_BYTES (default: 67108864)
+- DROP_LEDGER_RETENTION_DAYS (default: 365; 0 keeps everything)
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".drops")
+
+_SEGMENT = re.compile(r"^drops-(\d{8})-(\d{3})\.jsonl\.gz$")
+
+
+def ledger_dir() -> str:
+    return os.getenv("DROP_LEDGER_DIR", "").strip().strip('"') or DEFAULT_LEDGER_DIR
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip().strip('"'))
+    except ValueError:
+        return default
+
+
+def _segments(root: str) -> List[Tuple[date, int, str]]:
+    """(day, sequence, path) for every segment in `root`, oldest first."""
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    out: List[Tuple[date, int, str]] = []
+    for name in names:
+        m = _SEGMENT.match(name)
+        if m:
+            day = datetime.strptime(m.group(1), "%Y%m%d").date()
+            out.append((day, int(m.group(2)), os.path.join(root, name)))
+    return sorted(out)
+
+
+def _segment_path(root: str, day: date, seq: int) -> str:
+    return os.path.join(root, f"drops-{day:%Y%m%d}-{seq:03d}.jsonl.gz")
+
+
+@contextmanager
+def _locked(root: str) -> Iterator[None]:
+    # Serializes segment choice + append across processes; best effort without fcntl
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(root, ".lock"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def ledger_entry(dropped: Dict[str, Any], *, run_id: Optional[str], model: Optional[str], ts: str) -> Dict[str, Any]:
+    """Ledger line for one `reject_records`-style drop (`{**record, "__reason": ...}`)."""
+    record = {k: v for k, v in dropped.items() if k not in ("__reason", "__error")}
+    if set(record) == {"__record"}:
+        record = record["__record"]
+    entry: Dict[str, Any] = {
+        "ts": ts,
+        "run_id": run_id,
+        "model": model,
+        "reason": dropped.get("__reason") or "unknown",
+    }
+    if dropped.get("__error"):
+        entry["error"] = str(dropped["__error"])
+    entry["record"] = record
+    return entry
+
+
+class DropLedger:
+    """Rotated, gzip-compressed, append-only JSONL ledger of dropped events."""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        *,
+        max_bytes: Optional[int] = None,
+        retention_days: Optional[int] = None,
+    ):
+        self.root = root or ledger_dir()
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("DROP_LEDGER_MAX_BYTES", 64 * 1024 * 1024)
+        self.retention_days = (
+            retention_days if retention_days is not None else _env_int("DROP_LEDGER_RETENTION_DAYS", 365)
+        )
+
+    def append(
+        self,
+        dropped: Iterable[Dict[str, Any]],
+        *,
+        run_id: Optional[str] = None,
+        model: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> Optional[str]:
+        """Append one run's drops; returns the segment written, or None when there were none."""
+        now = now or datetime.now(timezone.utc)
+        ts = now.isoformat()
+        lines = [
+            json.dumps(ledger_entry(d, run_id=run_id, model=model, ts=ts), ensure_ascii=False, default=str)
+            for d in dropped
+        ]
+        if not lines:
+            return None
+        member = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+        os.makedirs(self.root, exist_ok=True)
+        with _locked(self.root):
+            today = now.date()
+            seq = 0
+            for day, s, path in _segments(self.root):
+                if day == today:
+                    seq = s + 1 if os.path.getsize(path) >= self.max_bytes else s
+            path = _segment_path(self.root, today, seq)
+            # One write per run: gzip readers treat consecutive members as one stream
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, member)
+            finally:
+                os.close(fd)
+            self._prune(today)
+        return path
+
+    def _prune(self, today: date) -> None:
+        if self.retention_days <= 0:
+            return
+        cutoff = today - timedelta(days=self.retention_days)
+        for day, _, path in _segments(self.root):
+            if day >= cutoff:
+                break
+            try:
+                os.unlink(path)
+            except OSError as e:  # pragma: no cover
+                logger.debug("Could not prune drop ledger segment %s: %s", path, e)
+
+    def entries(self, since: Optional[date] = None, until: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Entries with a UTC date in [since, until] (inclusive), oldest first.
+
+        Segments outside the range are skipped by name. A segment cut short by a crash
+        mid-append yields everything before the damaged member.
+        """
+        for day, _, path in _segments(self.root):
+            if (since and day < since) or (until and day > until):
+                continue
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        yield entry
+            except (EOFError, OSError, zlib.error) as e:
+                logger.warning("Drop ledger segment %s is damaged; read up to the error: %s", path, e)
+
+
+def summarize_drops(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop counts in total, per reason, per UTC day and reason, and per run."""
+    total = 0
+    by_reason: Dict[str, int] = {}
+    by_day: Dict[str, Dict[str, int]] = {}
+    by_run: Dict[str, int] = {}
+    for e in entries:
+        total += 1
+        reason = str(e.get("reason") or "unknown")
+        day = str(e.get("ts") or "")[:10]
+        by_reason[reason] = by_reason.get(reason, 0) + 1
+        bucket = by_day.setdefault(day, {})
+        bucket[reason] = bucket.get(reason, 0) + 1
+        run = str(e.get("run_id") or "unknown")
+        by_run[run] = by_run.get(run, 0) + 1
+    return {
+        "total": total,
+        "runs": len(by_run),
+        "by_reason": dict(sorted(by_reason.items(), key=lambda kv: (-kv[1], kv[0]))),
+        "by_day": dict(sorted(by_day.items())),
+        "by_run": dict(sorted(by_run.items())),
+    }
@@ -1,120 +1,158 @@
 from __future__ import annotations
 
+import json
+import os
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from datetime import date, datetime
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
 
-STR_FIELDS = [
-    "startup_name",
-    "geography",
-    "funding_stage",
-    "lead_investor",
-    "sub_sector",
-    "source_url",
-]
-
-# Simple heuristics to keep only climate-tech Energy/Grid related entries
-# and drop obvious non-climate sectors (e.g., fintech, crypto, brokerage).
-CLIMATE_POSITIVE = [
-    "energy",
-    "grid",
-    "storage",
-    "battery",
-    "ev",
-    "charging",
-    "renewable",
-    "solar",
-    "wind",
-    "geothermal",
-    "transmission",
-    "smart",
-    "meter",
-    "microgrid",
-    "hydrogen",
-    "carbon",
-    "ccus",
-    "cleantech",
-    "climate",
-    "heat pump",
-    "hvac",
-    "inverter",
-    "photovoltaic",
-    "biomass",
-    "biofuel",
-    "demand response",
-]
-
-CLIMATE_NEGATIVE = [
-    "fintech",
-    "trading",
-    "brokerage",
-    "crypto",
-    "bitcoin",
-    "wallet",
-    "payment",
-    "payments",
-    "bank",
-    "banking",
-    "neobank",
-]
-
-# Known non-climate company names often returned by generic crawls
-CLIMATE_NEGATIVE_NAMES = [
-    "robinhood",
-    "coinbase",
-]
-
-
-def _to_str(v: Any) -> str | None:
-    if v is None:
-        return None
-    s = str(v).strip()
-    return s if s else None
+# Climate-relevance keywords live in a taxonomy file (sector tag -> terms, plus
+# negative terms and known non-climate company names); CLIMATE_TAXONOMY_PATH overrides.
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "climate_taxonomy.json")
 
+# Internal tags marking negative keyword / negative company name hits
+NEGATIVE_TAG = "__negative__"
+NEGATIVE_NAME_TAG = "__negative_name__"
+_MARKERS = frozenset({NEGATIVE_TAG, NEGATIVE_NAME_TAG})
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
 
-def _parse_amount_usd(v: Any) -> int | None:
-    if v is None:
-        return None
-    if isinstance(v, (int, float)):
-        try:
-            return int(v)
-        except Exception:
-            return None
-    s = str(v)
-    # keep digits only
-    digits = re.sub(r"[^0-9]", "", s)
-    if not digits:
-        return None
-    try:
-        return int(digits)
-    except Exception:
-        return None
 
+class ClimateMatch(NamedTuple):
+    relevant: bool
+    tags: Tuple[str, ...]
+    negative: Tuple[str, ...]
 
-def _is_climate_relevant(e: Dict[str, Any]) -> bool:
-    """Best-effort keyword-based filter for climate-tech relevance.
 
-    Checks `sub_sector` first, then falls back to `startup_name` if needed.
-    Any negative keyword present -> reject. Otherwise require at least one
-    positive keyword.
+class ClimateClassifier:
+    """Keyword climate-relevance filter compiled from a taxonomy.
+
+    Terms are tokenized once into a phrase -> tags table. Classifying a text is one
+    dict lookup per word (plus a phrase lookup where a word starts a multi-word term),
+    so cost depends on the text length, not on how many sectors or terms the taxonomy
+    holds. Matching is on whole words, so "ev" no longer matches inside "development".
+    The few positive `stems` also match at the start or end of a longer word, so
+    compounds such as "climatetech", "energytech" or "bioenergy" are tagged; the
+    `negative_stems` do the same for "cryptocurrency" or "cryptomining".
     """
-    sub = e.get("sub_sector")
-    name = e.get("startup_name")
-    sub_l = str(sub).lower().strip() if isinstance(sub, str) else ""
-    name_l = str(name).lower().strip() if isinstance(name, str) else ""
 
-    # Block obvious non-climate
-    if any(neg in (sub_l + " " + name_l) for neg in CLIMATE_NEGATIVE):
-        return False
-    if any(bad in name_l for bad in CLIMATE_NEGATIVE_NAMES):
-        return False
+    def __init__(self, taxonomy: Dict[str, Any]):
+        table: Dict[str, Set[str]] = {}
+        for tag, terms in (taxonomy.get("sectors") or {}).items():
+            for term in terms:
+                self._add(table, term, str(tag))
+        for term in taxonomy.get("negative") or []:
+            self._add(table, term, NEGATIVE_TAG)
+        for term in taxonomy.get("negative_names") or []:
+            self._add(table, term, NEGATIVE_NAME_TAG)
+        self._table: Dict[str, FrozenSet[str]] = {k: frozenset(v) for k, v in table.items()}
+        # First word -> phrase lengths starting with it, so most words need a single lookup
+        self._phrases: Dict[str, Tuple[int, ...]] = {}
+        for phrase in self._table:
+            words = phrase.split(" ")
+            if len(words) > 1:
+                lens = set(self._phrases.get(words[0], ())) | {len(words)}
+                self._phrases[words[0]] = tuple(sorted(lens))
+        stem_table = self._stem_table(taxonomy.get("stems") or {})
+        for word in taxonomy.get("negative_stems") or []:
+            for tok in _tokens(str(word)):
+                stem_table.setdefault(tok, set()).add(NEGATIVE_TAG)
+        self._stems: Tuple[Tuple[str, FrozenSet[str]], ...] = tuple(
+            (stem, frozenset(tags)) for stem, tags in stem_table.items()
+        )
+        self._sub_cache: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def _add(table: Dict[str, Set[str]], term: str, tag: str) -> None:
+        toks = _tokens(str(term))
+        if not toks:
+            return
+        phrase = " ".join(toks)
+        table.setdefault(phrase, set()).add(tag)
+        # Accept a plain plural of the last word ("meters", "evs")
+        table.setdefault(phrase + "s", set()).add(tag)
+
+    @staticmethod
+    def _stem_table(stems: Dict[str, Any]) -> Dict[str, Set[str]]:
+        table: Dict[str, Set[str]] = {}
+        for tag, words in stems.items():
+            for word in words:
+                for tok in _tokens(str(word)):
+                    table.setdefault(tok, set()).add(str(tag))
+        return table
+
+    def match(self, text: Optional[str]) -> FrozenSet[str]:
+        """All tags (including the negative markers) whose terms occur in `text`."""
+        if not text:
+            return frozenset()
+        toks = _WORD.findall(text.lower())
+        table = self._table
+        phrases = self._phrases
+        stems = self._stems
+        found: Set[str] = set()
+        for i, tok in enumerate(toks):
+            hit = table.get(tok)
+            if hit:
+                found |= hit
+            for stem, tags in stems:
+                if len(tok) > len(stem) and (tok.startswith(stem) or tok.endswith(stem)):
+                    found |= tags
+            lens = phrases.get(tok)
+            if lens:
+                for n in lens:
+                    hit = table.get(" ".join(toks[i : i + n]))
+                    if hit:
+                        found |= hit
+        return frozenset(found)
+
+    def _match_sub(self, text: str) -> FrozenSet[str]:
+        # Sub-sectors repeat heavily across a batch; names are unique and not cached
+        hit = self._sub_cache.get(text)
+        if hit is None:
+            hit = self.match(text)
+            if len(self._sub_cache) < 65536:
+                self._sub_cache[text] = hit
+        return hit
+
+    def classify(self, sub_sector: Optional[str], startup_name: Optional[str]) -> ClimateMatch:
+        """Tag an event from its sub_sector and name.
+
+        Any negative keyword (in either field) or a known non-climate company name
+        rejects. Otherwise a non-empty sub_sector must carry at least one sector tag;
+        without a sub_sector the event is allowed.
+        """
+        sub_tags = self._match_sub(sub_sector) if sub_sector else frozenset()
+        name_tags = self.match(startup_name) if startup_name else frozenset()
+        tags = tuple(sorted((sub_tags | name_tags) - _MARKERS))
+        if NEGATIVE_TAG in sub_tags or NEGATIVE_TAG in name_tags:
+            return ClimateMatch(False, tags, ("keyword",))
+        if NEGATIVE_NAME_TAG in name_tags:
+            return ClimateMatch(False, tags, ("name",))
+        if sub_sector and sub_sector.strip():
+            return ClimateMatch(bool(sub_tags - _MARKERS), tags, ())
+        return ClimateMatch(True, tags, ())
+
+
+def load_taxonomy(path: Optional[str] = None) -> Dict[str, Any]:
+    """Read the taxonomy JSON (CLIMATE_TAXONOMY_PATH, default: climate_taxonomy.json here)."""
+    path = path or os.getenv("CLIMATE_TAXONOMY_PATH", "").strip().strip('"') or DEFAULT_TAXONOMY_PATH
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    # If sub_sector provided, require a positive signal in sub_sector
-    if sub_l:
-        return any(pos in sub_l for pos in CLIMATE_POSITIVE)
 
-    # If no sub_sector info, be permissive (allow) unless explicitly negative
-    return True
+_CLASSIFIER: Optional[ClimateClassifier] = None
+
+
+def get_classifier() -> ClimateClassifier:
+    """Process-wide classifier, compiled on first use."""
+    global _CLASSIFIER
+    if _CLASSIFIER is None:
+        _CLASSIFIER = ClimateClassifier(load_taxonomy())
+    return _CLASSIFIER
 
 
 def _normalize_date(v: Any) -> str | None:
@@ -129,43 +167,159 @@ def _normalize_date(v: Any) -> str | None:
         return None
 
 
-def sanitize_events(events: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    """Return (valid, dropped) after normalizing fields and enforcing required columns.
+# Column order of `FundingEvent.to_db_dict()`; validated rows are emitted in this shape
+DB_FIELDS = (
+    "startup_name",
+    "geography",
+    "funding_stage",
+    "amount_raised_usd",
+    "lead_investor",
+    "funding_date",
+    "source_url",
+    "sub_sector",
+)
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+_ISO_DATE = re.compile(r"[12][0-9]{3}-[0-9]{2}-[0-9]{2}")
+_BAD_DATE: Any = object()  # date that parses but FundingEvent refuses
+
+
+# Reject reason codes; also the `reason` of drop ledger entries (see drop_ledger.py)
+REASON_INVALID_RECORD = "invalid_record"
+REASON_MISSING_STARTUP_NAME = "missing_startup_name"
+REASON_INVALID_SOURCE_URL = "invalid_source_url"
+REASON_NON_CLIMATE = "non_climate"
+# Set by main.py for single rows the database refused at upsert time
+REASON_UPSERT_REJECTED = "upsert_rejected"
+DROP_REASONS = (
+    REASON_INVALID_RECORD,
+    REASON_MISSING_STARTUP_NAME,
+    REASON_INVALID_SOURCE_URL,
+    REASON_NON_CLIMATE,
+    REASON_UPSERT_REJECTED,
+)
+
+
+class Reject(NamedTuple):
+    """A dropped input row: position in the batch, reason code and the untouched record."""
+
+    index: int
+    reason: str
+    record: Any
 
-    Rules:
-    - startup_name: required, non-empty
-    - source_url: required, must start with http
-    - amount_raised_usd: int or None (extract digits from strings)
-    - funding_date: YYYY-MM-DD or None
-    - Trim whitespace on string fields
+
+def validate_events(events: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Reject]]:
+    """Normalize and validate a batch in one pass.
+
+    Returns (rows, rejects). Rows are DB-ready dicts identical to
+    `FundingEvent(**sanitized).to_db_dict()`; rejects reference the original
+    records instead of copying them. Rules: startup_name required; source_url must
+    be https; string fields trimmed; amount_raised_usd keeps the digits of strings;
+    funding_date YYYY-MM-DD or None. The `FundingEvent` schema is applied too, so
+    callers need no second validation step.
+
+    Reject reasons: invalid_record (not an object, or a date FundingEvent refuses),
+    missing_startup_name, invalid_source_url, non_climate.
     """
-    valid: List[Dict[str, Any]] = []
-    dropped: List[Dict[str, Any]] = []
-
-    for e in events or []:
-        norm: Dict[str, Any] = {}
-        # strings
-        for key in STR_FIELDS:
-            norm[key] = _to_str(e.get(key))
-        # amount
-        norm["amount_raised_usd"] = _parse_amount_usd(e.get("amount_raised_usd"))
-        # date
-        norm["funding_date"] = _normalize_date(e.get("funding_date"))
-
-        # required checks
-        if not norm.get("startup_name"):
-            dropped.append({**e, "__reason": "missing_startup_name"})
+    rows: List[Dict[str, Any]] = []
+    rejects: List[Reject] = []
+    # Backfills repeat the same few dates many times; parse each distinct value once
+    dates: Dict[Any, Optional[str]] = {}
+    classify = get_classifier().classify
+    iso_match = _ISO_DATE.fullmatch
+    digits_sub = _NON_DIGITS.sub
+
+    for i, e in enumerate(events or []):
+        if not isinstance(e, dict):
+            rejects.append(Reject(i, REASON_INVALID_RECORD, e))
             continue
-        src = norm.get("source_url")
-        if not src or not str(src).lower().startswith("https"):
-            dropped.append({**e, "__reason": "invalid_source_url"})
+        get = e.get
+
+        v = get("startup_name")
+        name = (v if type(v) is str else str(v)).strip() if v is not None else None
+        if not name:
+            rejects.append(Reject(i, REASON_MISSING_STARTUP_NAME, e))
+            continue
+        v = get("source_url")
+        src = (v if type(v) is str else str(v)).strip() if v is not None else None
+        if not src or not src.lower().startswith("https"):
+            rejects.append(Reject(i, REASON_INVALID_SOURCE_URL, e))
             continue
 
-        # climate-tech relevance filter
-        if not _is_climate_relevant(norm):
-            dropped.append({**e, "__reason": "non_climate"})
+        v = get("sub_sector")
+        sub = ((v if type(v) is str else str(v)).strip() or None) if v is not None else None
+        v = get("geography")
+        geo = ((v if type(v) is str else str(v)).strip() or None) if v is not None else None
+        v = get("funding_stage")
+        stage = ((v if type(v) is str else str(v)).strip() or None) if v is not None else None
+        v = get("lead_investor")
+        lead = ((v if type(v) is str else str(v)).strip() or None) if v is not None else None
+
+        if not classify(sub, name).relevant:
+            rejects.append(Reject(i, REASON_NON_CLIMATE, e))
             continue
 
-        valid.append(norm)
+        v = get("amount_raised_usd")
+        if v is None:
+            amount = None
+        elif isinstance(v, (int, float)):
+            try:
+                amount = int(v)
+            except Exception:
+                amount = None
+        else:
+            d = digits_sub("", str(v))
+            amount = int(d) if d else None
+
+        v = get("funding_date")
+        if v is None:
+            fdate = None
+        else:
+            try:
+                fdate = dates[v]
+            except KeyError:
+                ds = str(v).strip()
+                fdate = None
+                if iso_match(ds):
+                    try:
+                        date.fromisoformat(ds)
+                        fdate = ds
+                    except ValueError:
+                        pass
+                else:
+                    fdate = _normalize_date(ds)
+                    if fdate is not None and not iso_match(fdate):
+                        # strftime does not zero-pad years before 1000 and FundingEvent
+                        # refuses the result, which drops the record
+                        fdate = _BAD_DATE
+                dates[v] = fdate
+            except TypeError:  # unhashable value
+                fdate = _normalize_date(v)
+        if fdate is _BAD_DATE:
+            rejects.append(Reject(i, REASON_INVALID_RECORD, e))
+            continue
+
+        rows.append(
+            {
+                "startup_name": name,
+                "geography": geo,
+                "funding_stage": stage,
+                "amount_raised_usd": amount,
+                "lead_investor": lead,
+                "funding_date": fdate,
+                "source_url": src,
+                "sub_sector": sub,
+            }
+        )
+
+    return rows, rejects
+
+
+def reject_records(rejects: List[Reject]) -> List[Dict[str, Any]]:
+    """Materialize rejects as `{**record, "__reason": reason}` dicts for logs and drop files."""
+    out: List[Dict[str, Any]] = []
+    for r in rejects:
+        base = r.record if isinstance(r.record, dict) else {"__record": r.record}
+        out.append({**base, "__reason": r.reason})
+    return out
 
-    return valid, dropped
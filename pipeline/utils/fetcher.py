@@ -0,0 +1,219 @@
+"""
+Concurrent page fetching with global and per-host limits.
+
+`fetch_concurrently(urls, fetch_one)` runs `fetch_one(url, session, timeout)` on a
+thread pool and yields `FetchOutcome`s in completion order, so callers can parse one
+page while others are still downloading. A batch of pages takes about as long as
+its slowest page (or slowest host queue), not the sum.
+
+- One `requests.Session` with a connection pool sized to the concurrency is shared
+  by all workers, so repeated hosts reuse keep-alive connections.
+- At most FETCH_CONCURRENCY requests run at once, and at most FETCH_PER_HOST per host.
+- Successive requests to one host start at least FETCH_HOST_DELAY_MS apart.
+- FETCH_DEADLINE bounds the whole batch: per-request timeouts shrink to the time
+  left, and URLs not started by the deadline fail with `FetchDeadlineExceeded`.
+- `body_limits()` gives the per-page bounds for `http_cache.cached_get`: bodies over
+  FETCH_MAX_BYTES or still downloading after FETCH_READ_DEADLINE are aborted. Peak
+  body memory is about FETCH_CONCURRENCY x FETCH_MAX_BYTES.
+
+Environment:
+- FETCH_CONCURRENCY (default: 16)
+- FETCH_PER_HOST (default: 2)
+- FETCH_HOST_DELAY_MS (default: 500)
+- FETCH_TIMEOUT (seconds per request, default: 20)
+- FETCH_DEADLINE (seconds per batch, default: 120; 0 for none)
+- FETCH_MAX_BYTES (decoded body bytes per page, default: 16777216; 0 for no cap)
+- FETCH_READ_DEADLINE (seconds to download one body, default: 60; 0 for none)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+from pipeline.utils.spans import bind_context, span
+
+try:
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+except Exception:  # pragma: no cover
+    requests = None  # type: ignore
+    HTTPAdapter = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FetchDeadlineExceeded(TimeoutError):
+    """The batch deadline passed before this URL could be fetched."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)).strip().strip('"'))
+    except ValueError:
+        return default
+
+
+def body_limits() -> Dict[str, Any]:
+    """`max_bytes` / `read_deadline` keyword arguments for `cached_get`, from the environment."""
+    return {
+        "max_bytes": int(_env_float("FETCH_MAX_BYTES", 16 * 1024 * 1024)) or None,
+        "read_deadline": _env_float("FETCH_READ_DEADLINE", 60) or None,
+    }
+
+
+@dataclass
+class FetchOutcome(Generic[T]):
+    url: str
+    value: Optional[T] = None
+    error: Optional[BaseException] = None
+    ms: float = 0.0
+
+
+def new_session(pool_size: int) -> Any:
+    """Keep-alive session whose connection pool fits `pool_size` concurrent requests."""
+    if requests is None:
+        raise RuntimeError("requests not installed; cannot fetch URLs")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostGate:
+    """Per-host concurrency cap plus a minimum gap between request starts.
+
+    Pass one gate to several `fetch_concurrently` calls (e.g. crawl waves) to keep the
+    per-host spacing across them.
+    """
+
+    def __init__(self, per_host: int, delay_s: float):
+        self.per_host = max(1, per_host)
+        self.delay_s = max(0.0, delay_s)
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._delays: Dict[str, float] = {}
+
+    def set_delay(self, host: str, delay_s: float) -> None:
+        """Longer gap for one host (robots.txt Crawl-delay); never below the default."""
+        with self._lock:
+            self._delays[host] = max(self.delay_s, delay_s)
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    def acquire(self, host: str, deadline: Optional[float]) -> None:
+        """Wait for a slot and this host's next start time; raises past `deadline`."""
+        sem = self._slot(host)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not sem.acquire(timeout=timeout):
+            raise FetchDeadlineExceeded(f"no slot for {host} before the deadline")
+        # Reserve a start time under the lock, then sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self._delays.get(host, self.delay_s)
+        if deadline is not None and start >= deadline:
+            sem.release()
+            raise FetchDeadlineExceeded(f"politeness queue for {host} runs past the deadline")
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host: str) -> None:
+        self._slot(host).release()
+
+
+def concurrency_limit() -> int:
+    return max(1, int(_env_float("FETCH_CONCURRENCY", 16)))
+
+
+def host_gate() -> HostGate:
+    """Gate configured from FETCH_PER_HOST / FETCH_HOST_DELAY_MS."""
+    return HostGate(int(_env_float("FETCH_PER_HOST", 2)), _env_float("FETCH_HOST_DELAY_MS", 500) / 1000.0)
+
+
+def fetch_concurrently(
+    urls: List[str],
+    fetch_one: Callable[[str, Any, float], T],
+    *,
+    concurrency: Optional[int] = None,
+    per_host: Optional[int] = None,
+    host_delay_ms: Optional[float] = None,
+    timeout: Optional[float] = None,
+    deadline_s: Optional[float] = None,
+    session: Any = None,
+    gate: Optional[HostGate] = None,
+) -> Iterator[FetchOutcome[T]]:
+    """Fetch `urls` concurrently; yields one outcome per URL as each completes.
+
+    `fetch_one(url, session, timeout)` does the request (and anything else that should
+    run off the caller's thread). Errors are returned on the outcome, never raised.
+    Duplicate URLs are fetched once.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return
+    workers = max(1, int(concurrency)) if concurrency is not None else concurrency_limit()
+    workers = min(workers, len(urls))
+    if gate is None:
+        gate = host_gate()
+        if per_host is not None:
+            gate.per_host = max(1, int(per_host))
+        if host_delay_ms is not None:
+            gate.delay_s = max(0.0, host_delay_ms / 1000.0)
+    req_timeout = timeout if timeout is not None else _env_float("FETCH_TIMEOUT", 20)
+    budget = deadline_s if deadline_s is not None else _env_float("FETCH_DEADLINE", 120)
+    deadline = time.monotonic() + budget if budget and budget > 0 else None
+    own_session = session is None
+    sess = new_session(workers) if own_session else session
+
+    def _job(url: str) -> FetchOutcome[T]:
+        host = (urlparse(url).hostname or "").lower()
+        t0 = time.perf_counter()
+        try:
+            gate.acquire(host, deadline)
+        except FetchDeadlineExceeded as e:
+            return FetchOutcome(url, error=e)
+        try:
+            left = req_timeout if deadline is None else min(req_timeout, deadline - time.monotonic())
+            if left <= 0:
+                raise FetchDeadlineExceeded(f"deadline passed before fetching {url}")
+            with span("fetch", url=url, host=host):
+                return FetchOutcome(url, value=fetch_one(url, sess, left), ms=(time.perf_counter() - t0) * 1000.0)
+        except Exception as e:  # noqa: BLE001
+            return FetchOutcome(url, error=e, ms=(time.perf_counter() - t0) * 1000.0)
+        finally:
+            gate.release(host)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+    try:
+        pending = {pool.submit(bind_context(_job), u): u for u in urls}
+        while pending:
+            wait_s = None if deadline is None else max(0.0, deadline - time.monotonic()) + 1.0
+            done, _ = wait(list(pending), timeout=wait_s, return_when=FIRST_COMPLETED)
+            if not done:
+                # Requests still in flight overran their timeout; give up on them
+                for fut, url in pending.items():
+                    fut.cancel()
+                    yield FetchOutcome(url, error=FetchDeadlineExceeded(f"{url} still running at the deadline"))
+                return
+            for fut in done:
+                pending.pop(fut)
+                yield fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if own_session:
+            sess.close()
@@ -0,0 +1,251 @@
+"""
+Single-pass collection of company-link candidates from list pages.
+
+`scan_candidates(html)` walks the document once and returns, in document order:
+- anchors:  every `<a href>` as (href, text, title)
+- headings: every h1-h4 / li / dt as (text, href of its first descendant `<a href>`)
+- rel_next: hrefs of `<a rel="next">` / `<link rel="next">` (pagination, for crawling)
+
+Texts follow BeautifulSoup's `get_text(sep, strip=True)`: stripped strings joined
+with "" for anchors and " " for headings. Strings inside script, style, template,
+rt and rp are skipped, as in bs4. `seed_companies.heuristic_extract` turns the
+candidates into companies.
+
+Backends (HTML_PARSER_BACKEND, default `auto`):
+- `bs4`: BeautifulSoup with `html.parser`, the original parser and the default. The
+  tree is walked once; building it dominates time and memory.
+- `lxml`: opt-in, and an optional install (`pip install lxml`). libxml2 via
+  `lxml.etree.iterparse`, streamed. Elements are freed as soon as no open candidate
+  needs them, so memory stays flat on 10-50 MB pages; used by `auto` only when bs4 is
+  not installed.
+
+The backends agree on markup where every `<li>`/`<dt>`/`<dd>` is closed. They differ
+on ordinary HTML that leaves them open (`<ul><li>A <a>x</a><li>B ...</ul>`):
+html.parser nests each following item inside the open one, so a heading's text runs
+on to the end of the list, while libxml2 closes the item like a browser does. `<dd>`
+content also stays inside the preceding `<dt>` with html.parser, so its link becomes
+the `<dt>` heading's href; with libxml2 the `<dt>` has no link.
+"""
+from __future__ import annotations
+
+import io
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from lxml import etree  # type: ignore
+except Exception:  # pragma: no cover - optional; bs4 is the fallback
+    etree = None  # type: ignore
+
+try:
+    from bs4 import BeautifulSoup, NavigableString  # type: ignore
+    from bs4.element import CData  # type: ignore
+
+    _MAIN_STRING_TYPES = (NavigableString, CData)
+except Exception:  # pragma: no cover
+    BeautifulSoup = None  # type: ignore
+
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "li", "dt"))
+# Tags whose strings bs4 does not count as text (Script, Stylesheet, TemplateString, Ruby*)
+_HIDDEN_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+
+
+class Candidates(NamedTuple):
+    anchors: List[Tuple[str, str, str]]
+    headings: List[Tuple[str, Optional[str]]]
+    rel_next: List[str]
+
+
+def _is_next(rel: object) -> bool:
+    # bs4 gives rel as a list of tokens, lxml as the raw attribute string
+    tokens = rel.split() if isinstance(rel, str) else (rel or [])
+    return any(t.lower() == "next" for t in tokens)  # type: ignore[union-attr]
+
+
+def _lxml_text(el, sep: str) -> str:
+    # get_text(sep, strip=True) over the subtree of `el`, without recursion
+    parts: List[str] = []
+    hidden = 0
+    stack = [(el, False)]
+    while stack:
+        node, leaving = stack.pop()
+        tag = node.tag
+        if leaving:
+            if tag in _HIDDEN_TAGS:
+                hidden -= 1
+            if node is not el and not hidden and node.tail:
+                s = node.tail.strip()
+                if s:
+                    parts.append(s)
+            continue
+        if not isinstance(tag, str):
+            # Comment or processing instruction; libxml2 keeps <![CDATA[..]]> as a comment
+            text = node.text or ""
+            if not hidden and tag is etree.Comment and text.startswith("[CDATA[") and text.endswith("]]"):
+                s = text[7:-2].strip()
+                if s:
+                    parts.append(s)
+            stack.append((node, True))
+            continue
+        if tag in _HIDDEN_TAGS:
+            hidden += 1
+        if not hidden and node.text:
+            s = node.text.strip()
+            if s:
+                parts.append(s)
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(node))
+    return sep.join(parts)
+
+
+def scan_lxml(html: str) -> Candidates:
+    anchors: List[Tuple[str, str, str]] = []
+    headings: List[Tuple[str, Optional[str]]] = []
+    rel_next: List[str] = []
+    # Open candidates: element -> (kind, slot); headings still looking for their first link
+    open_slots: Dict[object, Tuple[str, int]] = {}
+    linkless: List[int] = []
+    hidden = 0
+    events = etree.iterparse(
+        io.BytesIO(html.encode("utf-8")),
+        events=("start", "end"),
+        html=True,
+        encoding="utf-8",
+        huge_tree=True,
+        remove_blank_text=False,
+    )
+    for event, el in events:
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        if event == "start":
+            if tag in _HIDDEN_TAGS:
+                hidden += 1
+            if tag in ("a", "link") and el.get("href") and _is_next(el.get("rel")):
+                rel_next.append(el.get("href"))
+            if tag == "a":
+                href = el.get("href")
+                if href is not None:
+                    for slot in linkless:
+                        headings[slot] = ("", href)
+                    linkless.clear()
+                    anchors.append((href, "", el.get("title", "")))
+                    open_slots[el] = ("a", len(anchors) - 1) if not hidden else ("a-hidden", len(anchors) - 1)
+            if tag in HEADING_TAGS:
+                headings.append(("", None))
+                slot = len(headings) - 1
+                linkless.append(slot)
+                open_slots[el] = ("h", slot) if not hidden else ("h-hidden", slot)
+            continue
+
+        # end
+        kind_slot = open_slots.pop(el, None)
+        if kind_slot is not None:
+            kind, slot = kind_slot
+            if kind == "a":
+                href, _, title = anchors[slot]
+                anchors[slot] = (href, _lxml_text(el, ""), title)
+            elif kind == "a-hidden":
+                pass
+            else:
+                if slot in linkless:
+                    linkless.remove(slot)
+                text = _lxml_text(el, " ") if kind == "h" else ""
+                headings[slot] = (text, headings[slot][1])
+        if tag in _HIDDEN_TAGS:
+            hidden -= 1
+        if not open_slots:
+            # Nothing open needs this subtree's text any more: free it (and finished siblings)
+            el.clear(keep_tail=True)
+            parent = el.getparent()
+            if parent is not None:
+                while el.getprevious() is not None:
+                    del parent[0]
+    return Candidates(anchors, headings, rel_next)
+
+
+def _counts_as_text(tag, string) -> bool:
+    # Same filter as get_text(): NavigableString/CData, not Comment, Script, Stylesheet...
+    types = tag.interesting_string_types or _MAIN_STRING_TYPES
+    return type(string) is types if isinstance(types, type) else type(string) in types
+
+
+def scan_bs4(html: str) -> Candidates:
+    soup = BeautifulSoup(html, "html.parser")
+    anchors: List[Tuple[str, str, str]] = []
+    headings: List[Tuple[str, Optional[str]]] = []
+    rel_next: List[str] = []
+    # One walk over the tree: open candidates collect their text as the walk passes
+    # through them (element, kind, slot, parts), instead of get_text()/find() per tag
+    open_cands: List[Tuple[object, str, int, List[str]]] = []
+    linkless: List[int] = []
+    stack = [(soup, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if leaving:
+            if open_cands and open_cands[-1][0] is node:
+                _, kind, slot, parts = open_cands.pop()
+                if kind == "a":
+                    href, _, title = anchors[slot]
+                    anchors[slot] = (href, "".join(parts), title)
+                else:
+                    if slot in linkless:
+                        linkless.remove(slot)
+                    headings[slot] = (" ".join(parts), headings[slot][1])
+            continue
+        if isinstance(node, NavigableString):
+            if open_cands:
+                s = node.strip()
+                if s:
+                    # Same filter as get_text(): NavigableString/CData, not Comment/Script/...
+                    for tag, _, _, parts in open_cands:
+                        if _counts_as_text(tag, node):
+                            parts.append(s)
+            continue
+        name = node.name
+        if name in ("a", "link") and node.get("href") and _is_next(node.get("rel")):
+            rel_next.append(node.get("href"))
+        if name == "a" and node.get("href") is not None:
+            href = node.get("href")
+            for slot in linkless:
+                headings[slot] = ("", href)
+            linkless.clear()
+            anchors.append((href, "", node.get("title", "")))
+            open_cands.append((node, "a", len(anchors) - 1, []))
+        elif name in HEADING_TAGS:
+            headings.append(("", None))
+            linkless.append(len(headings) - 1)
+            open_cands.append((node, "h", len(headings) - 1, []))
+        if open_cands and open_cands[-1][0] is node:
+            stack.append((node, True))
+        stack.extend((child, False) for child in reversed(node.contents))
+    return Candidates(anchors, headings, rel_next)
+
+
+BACKENDS: Dict[str, Callable[[str], Candidates]] = {"lxml": scan_lxml, "bs4": scan_bs4}
+
+
+def available_backends() -> List[str]:
+    out = []
+    if etree is not None:
+        out.append("lxml")
+    if BeautifulSoup is not None:
+        out.append("bs4")
+    return out
+
+
+def html_backend(name: Optional[str] = None) -> Optional[str]:
+    """Backend to use: `name`, else HTML_PARSER_BACKEND, else bs4, else lxml."""
+    wanted = (name or os.getenv("HTML_PARSER_BACKEND", "auto")).strip().strip('"').lower()
+    available = available_backends()
+    if wanted in available:
+        return wanted
+    # lxml is opt-in: its tree repair changes output on unclosed <li>/<dt>/<dd>
+    return "bs4" if "bs4" in available else (available[0] if available else None)
+
+
+def scan_candidates(html: str, backend: Optional[str] = None) -> Candidates:
+    name = html_backend(backend)
+    if name is None:
+        raise RuntimeError("Neither lxml nor beautifulsoup4 is installed")
+    return BACKENDS[name](html)
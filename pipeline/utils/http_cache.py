@@ -0,0 +1,307 @@
+"""
+Cached HTTP GET shared by the scraping tool and heuristic seeding.
+
+- Keyed by normalized URL (see `url_utils.normalize_url`)
+- Fresh entries (younger than SCRAPE_CACHE_TTL seconds) are served without network
+- Stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+  refreshes the entry and serves the cached body
+- Only successful (200) responses are stored
+- `get_extraction_cache()` memoizes results parsed from a page body (keyed by the
+  caller on body digest), so a 304 or unchanged page skips re-parsing as well
+- Bounded mode (`max_bytes`, `read_deadline`, `accept`): the body is streamed and
+  checked against the headers first. Unwanted content types and error statuses are
+  closed unread, and oversized or slow bodies are aborted mid-download. Text is
+  decoded chunk by chunk, so a fetch never holds more than `max_bytes` of body
+
+Environment:
+- SCRAPE_CACHE_ENABLED (default: true)
+- SCRAPE_CACHE_TTL (seconds, default: 86400)
+- SCRAPE_CACHE_MAX_MB (LRU byte cap for stored bodies, default: 256)
+- EXTRACT_CACHE_MAX_MB (LRU byte cap for memoized extractions, default: 64)
+- CACHE_DIR (default: pipeline/.cache)
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+from pipeline.utils.disk_cache import DiskCache, cache_dir
+from pipeline.utils.url_utils import normalize_url
+
+try:
+    import requests  # type: ignore
+    from requests.compat import chardet  # type: ignore  # charset_normalizer or chardet
+except Exception:  # pragma: no cover
+    requests = None  # type: ignore
+    chardet = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class BodyTooLarge(ValueError):
+    """The response body exceeds the caller's `max_bytes`."""
+
+
+class ReadDeadlineExceeded(TimeoutError):
+    """The response body did not finish downloading within `read_deadline` seconds."""
+
+
+@dataclass
+class HttpResult:
+    url: str
+    status: int
+    content_type: str
+    text: str
+    from_cache: bool = False
+    revalidated: bool = False
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip().strip('"').strip("'"))
+    except ValueError:
+        return default
+
+
+def cache_enabled() -> bool:
+    return os.getenv("SCRAPE_CACHE_ENABLED", "true").strip().strip('"').lower() not in ("0", "false", "no", "off")
+
+
+_CACHE: Optional[DiskCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_http_cache() -> DiskCache:
+    """Process-wide cache instance backed by `<CACHE_DIR>/http.sqlite3`."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = DiskCache(
+                    os.path.join(cache_dir(), "http.sqlite3"),
+                    max_bytes=_env_int("SCRAPE_CACHE_MAX_MB", 256) * 1024 * 1024,
+                )
+    return _CACHE
+
+
+_EXTRACT_CACHE: Optional[DiskCache] = None
+
+
+def get_extraction_cache() -> Optional[DiskCache]:
+    """Process-wide memo of parse results in `<CACHE_DIR>/extract.sqlite3`, or None
+    when SCRAPE_CACHE_ENABLED is off."""
+    global _EXTRACT_CACHE
+    if not cache_enabled():
+        return None
+    if _EXTRACT_CACHE is None:
+        with _CACHE_LOCK:
+            if _EXTRACT_CACHE is None:
+                _EXTRACT_CACHE = DiskCache(
+                    os.path.join(cache_dir(), "extract.sqlite3"),
+                    max_bytes=_env_int("EXTRACT_CACHE_MAX_MB", 64) * 1024 * 1024,
+                )
+    return _EXTRACT_CACHE
+
+
+def body_digest(namespace: str, url: str, text: str) -> str:
+    """Memo key for a result parsed from `text`; `namespace` should carry a parser version."""
+    h = hashlib.sha256(f"{namespace}\0{normalize_url(url)}\0".encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _decode(resp: Any) -> str:
+    # Mirror ScrapeWebsiteTool: fall back to sniffed encoding when the server sends no charset.
+    ct = resp.headers.get("content-type", "").lower()
+    if "charset=" not in ct:
+        try:
+            resp.encoding = resp.apparent_encoding
+        except Exception:  # pragma: no cover - best effort only
+            pass
+    return resp.text
+
+
+_CHUNK_BYTES = 64 * 1024
+# Bytes looked at for a BOM, <meta charset> or statistical detection when the header has no charset
+_SNIFF_BYTES = 16 * 1024
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().strip("'\"")).name
+    except LookupError:
+        return None
+
+
+def _header_charset(content_type: str) -> Optional[str]:
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            return _codec(value)
+    return None
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Encoding of a body without a header charset, from its first bytes: BOM, then
+    `<meta charset>`, then statistical detection, then UTF-8."""
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    m = _META_CHARSET.search(head[:4096])
+    if m:
+        found = _codec(m.group(1).decode("ascii", "ignore"))
+        if found:
+            return found
+    if chardet is not None and head:
+        try:
+            found = _codec(chardet.detect(head).get("encoding"))
+        except Exception:  # pragma: no cover - detection is best effort
+            found = None
+        if found:
+            return found
+    return "utf-8"
+
+
+def _read_bounded(resp: Any, max_bytes: Optional[int], deadline: Optional[float]) -> str:
+    # Stream the body through an incremental decoder, enforcing the size cap and deadline
+    declared = resp.headers.get("content-length")
+    if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+        raise BodyTooLarge(f"Content-Length {declared} exceeds {max_bytes} bytes")
+    charset = _header_charset(resp.headers.get("content-type", ""))
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace") if charset else None
+    head = bytearray()
+    parts = []
+    read = 0
+    # iter_content yields decompressed bytes, so a gzip bomb hits the cap as well
+    for chunk in resp.iter_content(chunk_size=_CHUNK_BYTES):
+        read += len(chunk)
+        if max_bytes and read > max_bytes:
+            raise BodyTooLarge(f"body exceeds {max_bytes} bytes")
+        if deadline is not None and time.monotonic() > deadline:
+            raise ReadDeadlineExceeded(f"body not read within the deadline ({read} bytes so far)")
+        if decoder is None:
+            head += chunk
+            if len(head) < _SNIFF_BYTES:
+                continue
+            decoder = codecs.getincrementaldecoder(sniff_encoding(bytes(head)))(errors="replace")
+            chunk, head = bytes(head), bytearray()
+        parts.append(decoder.decode(chunk))
+    if decoder is None:
+        decoder = codecs.getincrementaldecoder(sniff_encoding(bytes(head)))(errors="replace")
+        parts.append(decoder.decode(bytes(head)))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _accepted(content_type: str, accept: Optional[Sequence[str]]) -> bool:
+    ct = content_type.lower()
+    return not accept or any(a in ct for a in accept)
+
+
+def cached_get(
+    url: str,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 20,
+    cookies: Optional[Dict[str, str]] = None,
+    session: Any = None,
+    ttl: Optional[int] = None,
+    cache: Optional[DiskCache] = None,
+    max_bytes: Optional[int] = None,
+    read_deadline: Optional[float] = None,
+    accept: Optional[Sequence[str]] = None,
+) -> HttpResult:
+    """GET `url` through the shared on-disk cache.
+
+    With any of `max_bytes`, `read_deadline` (seconds for the whole body) or `accept`
+    (content-type substrings, e.g. ("text/html",)), the response is streamed. An
+    error status or a content type outside `accept` returns an empty `text` without
+    downloading the body. A body over `max_bytes` raises `BodyTooLarge`, and one
+    still downloading at the deadline raises `ReadDeadlineExceeded`.
+
+    Network errors propagate to the caller, as with a plain `requests.get`.
+    """
+    client = session if session is not None else requests
+    if client is None:
+        raise RuntimeError("requests not installed; cannot fetch URLs")
+    bounded = bool(max_bytes or read_deadline or accept)
+    deadline = time.monotonic() + read_deadline if read_deadline else None
+
+    def _get(req_headers: Optional[Dict[str, str]]) -> Any:
+        if bounded:
+            return client.get(url, headers=req_headers, cookies=cookies, timeout=timeout, allow_redirects=True, stream=True)
+        return client.get(url, headers=req_headers, cookies=cookies, timeout=timeout, allow_redirects=True)
+
+    def _body(resp: Any) -> str:
+        if not bounded:
+            return _decode(resp)
+        try:
+            if resp.status_code >= 400 or not _accepted(resp.headers.get("content-type", ""), accept):
+                return ""
+            return _read_bounded(resp, max_bytes, deadline)
+        finally:
+            resp.close()
+
+    if not cache_enabled() and cache is None:
+        resp = _get(headers)
+        return HttpResult(url, resp.status_code, resp.headers.get("content-type", ""), _body(resp))
+
+    store = cache if cache is not None else get_http_cache()
+    ttl_s = _env_int("SCRAPE_CACHE_TTL", 86400) if ttl is None else ttl
+    key = normalize_url(url)
+    entry = store.get(key)
+
+    if entry is not None and max_bytes and len(entry.value) > max_bytes:
+        # Stored by a caller without a cap; refetching would not make it smaller
+        raise BodyTooLarge(f"cached body exceeds {max_bytes} bytes")
+    if entry is not None and time.time() - entry.stored_at < ttl_s:
+        logger.debug("HTTP cache hit (fresh): %s", url)
+        return HttpResult(url, 200, entry.meta.get("content_type", ""), entry.value.decode("utf-8"), from_cache=True)
+
+    req_headers = dict(headers or {})
+    if entry is not None:
+        if entry.meta.get("etag"):
+            req_headers["If-None-Match"] = entry.meta["etag"]
+        if entry.meta.get("last_modified"):
+            req_headers["If-Modified-Since"] = entry.meta["last_modified"]
+
+    resp = _get(req_headers)
+
+    if resp.status_code == 304 and entry is not None:
+        logger.debug("HTTP cache revalidated (304): %s", url)
+        if bounded:
+            resp.close()
+        store.touch(key)
+        return HttpResult(
+            url,
+            200,
+            entry.meta.get("content_type", ""),
+            entry.value.decode("utf-8"),
+            from_cache=True,
+            revalidated=True,
+        )
+
+    content_type = resp.headers.get("content-type", "")
+    text = _body(resp)
+    if resp.status_code == 200 and _accepted(content_type, accept):
+        store.set(
+            key,
+            text.encode("utf-8"),
+            {
+                "content_type": content_type,
+                "etag": resp.headers.get("etag"),
+                "last_modified": resp.headers.get("last-modified"),
+            },
+        )
+    return HttpResult(url, resp.status_code, content_type, text)
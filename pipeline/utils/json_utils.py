@@ -2,83 +2,384 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any, Dict, Iterable
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+# Keys we expect from our agents, weighted by how strongly they identify a payload:
+# verification ("events"), seeding ("companies") and enrichment (slug/website_url/bio/sources)
+SCHEMA_KEYS: Dict[str, float] = {
+    "events": 4.0,
+    "companies": 4.0,
+    "website_url": 2.0,
+    "bio": 2.0,
+    "slug": 1.0,
+    "sources": 1.0,
+}
+# Keys of a single event/company, used to score bare top-level lists
+ITEM_KEYS = ("startup_name", "source_url", "name", "website")
 
-def extract_json(text: str) -> Dict[str, Any]:
-    """Best-effort JSON extraction from LLM output or free text.
+# Nested values are kept as fallback candidates only this deep (for unparseable wrappers)
+_MAX_NODE_DEPTH = 3
+
+_OUTSIDE = re.compile(r"[{\[]")
+_INSIDE = re.compile(r'[{}\[\]"]')
+_IN_STRING = re.compile(r'["\\\n]')
+_CLOSER = {"}": "{", "]": "["}
+# What may follow an opener in valid JSON; anything else is prose and skips the decoder
+_VALUE_AFTER = {"{": re.compile(r'\s*["}]'), "[": re.compile(r'\s*["\-0-9\[{tfn\]]')}
+# First decoder window; grows while a failure looks like truncation at the window edge
+_DECODE_WINDOW = 4096
+
+
+_UNPARSED = object()
+_FENCE = "```"
+_FINAL_ANSWER = "Final Answer:"
+
+
+def _decode_at(decode: Callable[[str], Tuple[Any, int]], text: str, i: int) -> Optional[Tuple[Any, int]]:
+    # Decode the value starting at text[i] from a growing slice. Decoding in place would
+    # make every failure cost O(i) (JSONDecodeError counts lines from the start of the
+    # document), which turns a transcript full of prose brackets quadratic.
+    n = len(text)
+    window = _DECODE_WINDOW
+    while True:
+        limit = min(n, i + window)
+        chunk = text[i:limit]
+        try:
+            value, end = decode(chunk)
+            return value, i + end
+        except json.JSONDecodeError as e:
+            truncated = e.pos >= len(chunk) - 8 or e.msg.startswith("Unterminated string")
+            if limit >= n or not truncated:
+                return None
+        window *= 4
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "children")
+
+    def __init__(self, start: int, end: int, value: Any, children: List["_Node"]):
+        self.start = start
+        self.end = end
+        self.value = value  # parsed JSON, or _UNPARSED for a balanced but invalid span
+        self.children = children
+
+
+def scan_json_candidates(text: str) -> List[_Node]:
+    """Single left-to-right sweep collecting balanced top-level {...} / [...] spans.
+
+    At each opener that could start valid JSON the C decoder is tried first; a valid
+    value is taken whole and skipped. Otherwise the span is walked by hand: string literals (with escapes)
+    are tracked so braces inside strings never unbalance it, and regex jumps go
+    straight to the next interesting character. A value that never closes (a stray
+    "{" in prose) or a string that runs into a newline (not valid JSON) abandons the
+    open brackets, and balanced values found inside them are promoted to top level.
+    Decoder attempts are limited to the first few nesting levels, which keeps the
+    whole scan linear in the text length.
+    """
+    decode = json.JSONDecoder().raw_decode
+    top: List[_Node] = []
+    # Open brackets being walked by hand: (opener, start, child nodes)
+    stack: List[Tuple[str, int, List[_Node]]] = []
+    n = len(text)
+    pos = 0
 
-    Strategy (in order):
-    1) direct json.loads on whole text
-    2) iterate ALL fenced blocks (```json and ```), return first valid JSON
-    3) locate a JSON object containing an "events" key via balanced-brace scan
-    4) greedy braces from first '{' to last '}' as final fallback
+    def _abandon(keep: int) -> None:
+        # Pop frames above `keep`, promoting their completed children one level up
+        while len(stack) > keep:
+            _, _, children = stack.pop()
+            (stack[-1][2] if stack else top).extend(children)
+
+    def _open(ch: str, i: int) -> int:
+        depth = len(stack)
+        if depth < _MAX_NODE_DEPTH and _VALUE_AFTER[ch].match(text, i + 1):
+            decoded = _decode_at(decode, text, i)
+            if decoded is not None:
+                value, end = decoded
+                (stack[-1][2] if stack else top).append(_Node(i, end, value, []))
+                return end
+        stack.append((ch, i, []))
+        return i + 1
+
+    while pos < n:
+        if not stack:
+            m = _OUTSIDE.search(text, pos)
+            if m is None:
+                break
+            pos = _open(m.group(), m.start())
+            continue
+
+        m = _INSIDE.search(text, pos)
+        if m is None:
+            break
+        ch = m.group()
+        i = m.start()
+        pos = m.end()
+        if ch == '"':
+            # Skip to the end of the string literal
+            while True:
+                sm = _IN_STRING.search(text, pos)
+                if sm is None:
+                    pos = n
+                    break
+                sc = sm.group()
+                if sc == "\\":
+                    pos = sm.end() + 1
+                    continue
+                pos = sm.end()
+                if sc == "\n":
+                    # Raw newline inside a JSON string: these brackets were prose
+                    _abandon(0)
+                break
+            continue
+        if ch in "{[":
+            pos = _open(ch, i)
+            continue
+        # Closing bracket: match it with the nearest compatible opener
+        opener = _CLOSER[ch]
+        k = len(stack) - 1
+        while k >= 0 and stack[k][0] != opener:
+            k -= 1
+        if k < 0:
+            continue  # stray closer; ignore
+        _abandon(k + 1)
+        _, start, children = stack.pop()
+        depth = len(stack)
+        if depth < _MAX_NODE_DEPTH:
+            (stack[-1][2] if stack else top).append(_Node(start, i + 1, _UNPARSED, children))
+        else:
+            stack[-1][2].extend(children)
+
+    _abandon(0)
+    top.sort(key=lambda node: node.start)
+    return top
+
+
+def _normalize(obj: Any) -> Dict[str, Any]:
+    # If the model returned a top-level list, treat it as events
+    if isinstance(obj, list):
+        return {"events": obj}
+    if isinstance(obj, dict):
+        return obj
+    raise ValueError("Parsed JSON is neither object nor list")
+
+
+def schema_score(obj: Any, keys: Optional[Dict[str, float]] = None) -> float:
+    """How well a parsed value fits one of our agent output schemas (higher is better).
+
+    Returns a negative score for values that can never be a payload (scalars, lists
+    of non-objects). An empty list is a valid, empty payload and scores 0.
     """
-    text = (text or "").strip()
+    weights = SCHEMA_KEYS if keys is None else keys
+    if isinstance(obj, dict):
+        score = sum(weights.get(k, 0.0) for k in obj)
+        for k in ("events", "companies"):
+            if isinstance(obj.get(k), list) and k in weights:
+                score += 1.0
+        return score
+    if isinstance(obj, list):
+        if not obj:
+            return 0.0
+        dicts = [x for x in obj[:20] if isinstance(x, dict)]
+        if not dicts:
+            return -1.0
+        if any(k in d for d in dicts for k in ITEM_KEYS):
+            return 3.0
+        return 0.5
+    return -1.0
+
 
-    def _normalize(obj: Any) -> Dict[str, Any]:
-        # If the model returned a top-level list, treat it as events
-        if isinstance(obj, list):
-            return {"events": obj}
-        if isinstance(obj, dict):
-            return obj
-        raise ValueError("Parsed JSON is neither object nor list")
+def iter_json_values(text: str) -> Iterable[Tuple[int, int, Any]]:
+    """Yield (start, end, value) for every parseable JSON object/array candidate.
 
-    def _try_load(s: str) -> Dict[str, Any] | None:
+    Top-level candidates come first in text order; in place of a balanced span that
+    is not valid JSON, its parseable nested values (up to a small depth) are yielded.
+    """
+
+    def _visit(node: _Node) -> Iterable[Tuple[int, int, Any]]:
+        if node.value is not _UNPARSED:
+            yield node.start, node.end, node.value
+            return
+        for child in node.children:
+            yield from _visit(child)
+
+    for node in scan_json_candidates(text):
+        yield from _visit(node)
+
+
+def _fast_path(text: str, keys: Optional[Dict[str, float]]) -> Any:
+    # The usual answers: the whole text is JSON, or the payload closes the transcript
+    # after "Final Answer:" or sits in the last fenced block. Each costs one parse
+    # instead of a scan of the whole transcript.
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            value = json.loads(stripped)
+        except ValueError:
+            pass
+        else:
+            # The whole text is the only candidate the scan could find
+            if schema_score(value, keys) >= 0:
+                return value
+    # Unfenced "Final Answer: {...}" closing the transcript
+    marker = text.rfind(_FINAL_ANSWER)
+    m = _OUTSIDE.search(text, marker) if marker >= 0 else None
+    if m is not None:
         try:
-            return _normalize(json.loads(s))
-        except Exception:
-            return None
-
-    def _iter_fenced_blocks(pattern: str) -> Iterable[str]:
-        for m in re.finditer(pattern, text, re.DOTALL | re.IGNORECASE):
-            yield m.group(1).strip()
-
-    # 1) direct
-    direct = _try_load(text)
-    if direct is not None:
-        return direct
-
-    # 2) fenced blocks (json first, then any)
-    for block in _iter_fenced_blocks(r"```json\s*(.*?)```"):
-        parsed = _try_load(block)
-        if parsed is not None:
-            return parsed
-    for block in _iter_fenced_blocks(r"```\s*(.*?)```"):
-        parsed = _try_load(block)
-        if parsed is not None:
-            return parsed
-
-    # 3) Search for an object containing an "events" key using balanced braces
-    for ev_match in re.finditer(r'"events"\s*:', text, re.IGNORECASE):
-        # Find nearest preceding '{'
-        start_idx = text.rfind('{', 0, ev_match.start())
-        if start_idx == -1:
+            value, end = json.JSONDecoder().raw_decode(text, m.start())
+        except ValueError:
+            pass
+        else:
+            if not text[end:].strip(" \t\r\n`") and schema_score(value, keys) > 0:
+                return value
+    end = text.rfind(_FENCE)
+    start = text.rfind(_FENCE, 0, end) if end > 0 else -1
+    if start >= 0:
+        body = text[start + len(_FENCE) : end]
+        if body[:4].lower() == "json":
+            body = body[4:]
+        body = body.strip()
+        if body[:1] in ("{", "["):
+            try:
+                value = json.loads(body)
+            except ValueError:
+                return _UNPARSED
+            # Only a payload that matches a schema; anything weaker goes through ranking
+            if schema_score(value, keys) > 0:
+                return value
+    return _UNPARSED
+
+
+def extract_json(text: str, keys: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Best-effort JSON extraction from LLM output or free text.
+
+    One linear scan collects every balanced JSON object/array (string- and
+    escape-aware, so fenced blocks, prose and `Final Answer:` wrappers need no
+    special cases). Parseable candidates are ranked by schema fit (`SCHEMA_KEYS`,
+    or `keys` to override), then by size, then by position (later wins, as agents
+    put the final answer last). A top-level list is returned as {"events": [...]}.
+
+    Whole-text JSON, and a schema-matching payload that ends the text after
+    "Final Answer:" or in the last fenced block, are returned before the scan, so
+    well-formed answers cost a single parse.
+    """
+    text = text or ""
+    fast = _fast_path(text, keys)
+    if fast is not _UNPARSED:
+        return _normalize(fast)
+    best: Optional[Tuple[Tuple[float, int, int], Any]] = None
+    for start, end, value in iter_json_values(text):
+        score = schema_score(value, keys)
+        if score < 0:
             continue
-        depth = 0
-        end_idx = -1
-        for i in range(start_idx, len(text)):
-            ch = text[i]
-            if ch == '{':
-                depth += 1
-            elif ch == '}':
-                depth -= 1
-                if depth == 0:
-                    end_idx = i
+        rank = (score, end - start, start)
+        if best is None or rank > best[0]:
+            best = (rank, value)
+    if best is None:
+        raise ValueError("Could not parse JSON from text")
+    return _normalize(best[1])
+
+
+_NEXT_ELEMENT = re.compile(r"[^\s,]")
+
+
+class EventStreamParser:
+    """Incremental parser for streamed LLM output.
+
+    Feed text chunks as they arrive; each call returns the objects of the `"events": [...]`
+    array that completed within that chunk, so rows can be processed before the model
+    finishes. Surrounding prose, Thought/Action lines and fences are skipped. Elements are
+    tracked string- and escape-aware; an element that is not a valid JSON object is dropped
+    and scanning resumes at the next `"events": [`. Memory is bounded by the largest
+    single element, not the whole response.
+    """
+
+    def __init__(self, key: str = "events"):
+        self._array = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget buffered text, e.g. when a new LLM call starts."""
+        self._buf = ""
+        self._pos = 0
+        self._in_array = False
+        self._elem_start = -1
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buf += chunk or ""
+        buf = self._buf
+        out: List[Dict[str, Any]] = []
+        while True:
+            if not self._in_array:
+                m = self._array.search(buf, self._pos)
+                if m is None:
+                    # Keep a tail so a key split across chunks still matches
+                    self._pos = max(self._pos, len(buf) - 64)
                     break
-        if end_idx != -1:
-            candidate = text[start_idx : end_idx + 1]
-            parsed = _try_load(candidate)
-            if parsed is not None:
-                return parsed
-
-    # 4) greedy braces
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        candidate = text[start : end + 1]
-        parsed = _try_load(candidate)
-        if parsed is not None:
-            return parsed
-
-    raise ValueError("Could not parse JSON from text")
+                self._in_array = True
+                self._pos = m.end()
+                continue
+
+            if self._elem_start < 0:
+                m = _NEXT_ELEMENT.search(buf, self._pos)
+                if m is None:
+                    self._pos = len(buf)
+                    break
+                self._pos = m.end()
+                if m.group() == "{":
+                    self._elem_start = m.start()
+                    self._depth = 1
+                else:
+                    # End of the array, or not an array of objects
+                    self._in_array = False
+                continue
+
+            if self._in_string:
+                m = _IN_STRING.search(buf, self._pos)
+                if m is None:
+                    # May already be past the end when the chunk ended on a backslash
+                    self._pos = max(self._pos, len(buf))
+                    break
+                ch = m.group()
+                if ch == "\\":
+                    self._pos = m.end() + 1
+                    continue
+                self._pos = m.end()
+                self._in_string = False
+                if ch == "\n":
+                    # Raw newline inside a string: not JSON after all
+                    self._elem_start = -1
+                    self._in_array = False
+                continue
+
+            m = _INSIDE.search(buf, self._pos)
+            if m is None:
+                self._pos = len(buf)
+                break
+            ch = m.group()
+            self._pos = m.end()
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    text = buf[self._elem_start : self._pos]
+                    self._elem_start = -1
+                    try:
+                        value = json.loads(text)
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        out.append(value)
+
+        # Drop consumed text; keep an unfinished element from its first brace
+        cut = self._elem_start if self._elem_start >= 0 else min(self._pos, len(buf))
+        if cut:
+            self._buf = buf[cut:]
+            self._pos -= cut
+            if self._elem_start >= 0:
+                self._elem_start = 0
+        return out
@@ -0,0 +1,104 @@
+"""
+Local index of source URLs already stored in `funding_events`.
+
+The index holds 64-bit blake2b digests of normalized URLs (8 bytes per URL) plus a
+`created_at` watermark, persisted under CACHE_DIR. Each run refreshes it with only
+the rows created since the watermark, then drops known URLs from research output
+before any scraping or LLM extraction is spent on them.
+
+Environment:
+- SKIP_KNOWN_URLS (default: true)
+- CACHE_DIR (default: pipeline/.cache)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from pipeline.utils.disk_cache import cache_dir
+from pipeline.utils.url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_SIZE = 8
+
+
+def _digest(url: str) -> int:
+    h = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=_DIGEST_SIZE)
+    return int.from_bytes(h.digest(), "big")
+
+
+def skip_known_enabled() -> bool:
+    return os.getenv("SKIP_KNOWN_URLS", "true").strip().strip('"').lower() not in ("0", "false", "no", "off")
+
+
+class KnownUrlIndex:
+    """Compact, incrementally refreshed set of already-ingested source URLs."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), "known_urls.idx")
+        self.watermark: Optional[str] = None
+        self._digests: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and _digest(url) in self._digests
+
+    def add(self, urls: Iterable[str]) -> None:
+        for u in urls:
+            if u:
+                self._digests.add(_digest(u))
+
+    def load(self) -> "KnownUrlIndex":
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                body = f.read()
+        except FileNotFoundError:
+            return self
+        except Exception as e:
+            logger.warning("Ignoring unreadable known-URL index %s: %s", self.path, e)
+            return self
+        self.watermark = header.get("watermark")
+        self._digests = {
+            int.from_bytes(body[i : i + _DIGEST_SIZE], "big") for i in range(0, len(body), _DIGEST_SIZE)
+        }
+        return self
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        header = json.dumps({"watermark": self.watermark, "count": len(self._digests)}).encode("utf-8")
+        body = b"".join(d.to_bytes(_DIGEST_SIZE, "big") for d in sorted(self._digests))
+        # Write-then-rename so concurrent runs never read a half-written file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header + b"\n" + body)
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def refresh(self, fetch: Callable[[Optional[str]], List[Tuple[str, str]]]) -> int:
+        """Pull rows created since the watermark via `fetch(since)`; returns rows seen."""
+        rows = fetch(self.watermark)
+        for url, created_at in rows:
+            self._digests.add(_digest(url))
+            if created_at and (self.watermark is None or created_at > self.watermark):
+                self.watermark = created_at
+        return len(rows)
+
+    def partition(self, urls: List[str]) -> Tuple[List[str], List[str]]:
+        """Split `urls` into (new, known), preserving order."""
+        new: List[str] = []
+        known: List[str] = []
+        for u in urls:
+            (known if u in self else new).append(u)
+        return new, known
@@ -0,0 +1,196 @@
+"""
+Cross-process token-bucket rate limiter for LLM and search calls.
+
+Buckets live in a SQLite file under CACHE_DIR so every runner on the host (cron
+pipeline, enrichment spawned by the web route, seeding) draws from one budget.
+Callers reserve a slot inside a write transaction: the bucket may go into debt,
+and the caller sleeps exactly until its reservation is covered. Calls therefore
+queue for a precise start time instead of failing with 429 and backing off blindly.
+
+Environment:
+- RATE_LIMITS: semicolon-separated `key:rpm=N,tpm=M` entries, e.g.
+  "gemini-2.0-flash:rpm=15,tpm=1000000;tavily:rpm=60". Keys are model ids
+  (provider prefix optional) or tool names. Keys without an entry are unlimited.
+- RATE_LIMIT_MAX_WAIT (seconds, default: 300): reservations needing a longer
+  wait raise `RateLimitTimeout` instead of sleeping.
+- CACHE_DIR (default: pipeline/.cache)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from pipeline.utils.disk_cache import cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a reservation would wait longer than allowed."""
+
+
+@dataclass(frozen=True)
+class Limit:
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """Parse a RATE_LIMITS string into {key: Limit}. Malformed entries are skipped."""
+    out: Dict[str, Limit] = {}
+    for entry in (spec or "").strip().strip('"').strip("'").split(";"):
+        if ":" not in entry:
+            continue
+        key, _, params = entry.partition(":")
+        values: Dict[str, float] = {}
+        for kv in params.split(","):
+            name, _, val = kv.partition("=")
+            try:
+                values[name.strip().lower()] = float(val)
+            except ValueError:
+                continue
+        limit = Limit(rpm=values.get("rpm"), tpm=values.get("tpm"))
+        if key.strip() and (limit.rpm or limit.tpm):
+            out[key.strip().lower()] = limit
+    return out
+
+
+def limit_for(key: str, limits: Optional[Dict[str, Limit]] = None) -> Optional[Limit]:
+    """Look up a configured limit; `gemini/gemini-2.0-flash` also matches `gemini-2.0-flash`."""
+    table = parse_limits(os.getenv("RATE_LIMITS", "")) if limits is None else limits
+    k = (key or "").strip().lower()
+    return table.get(k) or table.get(k.split("/", 1)[-1])
+
+
+_SCHEMA = """
+create table if not exists buckets (
+  key text primary key,
+  requests real not null,
+  tokens real not null,
+  updated_at real not null
+);
+"""
+
+
+class RateLimiter:
+    """Token buckets (requests/min and tokens/min) persisted in SQLite."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), "rate_limits.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("pragma journal_mode=wal")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, key: str, limit: Limit, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """Reserve one request (and `tokens` tokens) and return seconds to wait before using it."""
+        rpm = float(limit.rpm) if limit.rpm else None
+        tpm = float(limit.tpm) if limit.tpm else None
+        # A single call larger than the per-minute budget could never be admitted.
+        need_tokens = min(float(tokens), tpm) if tpm else 0.0
+        conn = self._conn()
+        conn.execute("begin immediate")
+        try:
+            now = time.time()
+            row = conn.execute("select requests, tokens, updated_at from buckets where key = ?", (key,)).fetchone()
+            req_level = rpm if rpm else 0.0
+            tok_level = tpm if tpm else 0.0
+            if row is not None:
+                elapsed = max(0.0, now - float(row[2]))
+                if rpm:
+                    req_level = min(rpm, float(row[0]) + elapsed * rpm / 60.0)
+                if tpm:
+                    tok_level = min(tpm, float(row[1]) + elapsed * tpm / 60.0)
+
+            wait = 0.0
+            if rpm:
+                req_level -= 1.0
+                if req_level < 0:
+                    wait = max(wait, -req_level * 60.0 / rpm)
+            if tpm:
+                tok_level -= need_tokens
+                if tok_level < 0:
+                    wait = max(wait, -tok_level * 60.0 / tpm)
+
+            if max_wait is not None and wait > max_wait:
+                conn.execute("rollback")
+                raise RateLimitTimeout(f"Rate limit for {key} needs {wait:.1f}s wait (max {max_wait:.1f}s)")
+
+            conn.execute(
+                "insert or replace into buckets (key, requests, tokens, updated_at) values (?, ?, ?, ?)",
+                (key, req_level, tok_level, now),
+            )
+            conn.execute("commit")
+            return wait
+        except RateLimitTimeout:
+            raise
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def acquire(self, key: str, limit: Limit, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """Block until a slot for `key` is available. Returns seconds waited."""
+        wait = self.reserve(key, limit, tokens=tokens, max_wait=max_wait)
+        if wait > 0:
+            logger.info("Rate limiter: waiting %.2fs for %s", wait, key)
+            time.sleep(wait)
+        return wait
+
+
+_LIMITER: Optional[RateLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _LIMITER
+    if _LIMITER is None:
+        with _LIMITER_LOCK:
+            if _LIMITER is None:
+                _LIMITER = RateLimiter()
+    return _LIMITER
+
+
+def throttle(key: str, tokens: int = 0) -> float:
+    """Wait for a slot under the configured limit for `key`; no-op if unconfigured.
+
+    Limiter storage errors are logged and ignored so a broken cache dir never
+    blocks a run.
+    """
+    limit = limit_for(key)
+    if limit is None:
+        return 0.0
+    try:
+        max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", "300").strip().strip('"'))
+    except ValueError:
+        max_wait = 300.0
+    bucket = key.strip().lower().split("/", 1)[-1]
+    try:
+        return get_rate_limiter().acquire(bucket, limit, tokens=tokens, max_wait=max_wait)
+    except RateLimitTimeout:
+        raise
+    except Exception as e:  # pragma: no cover - best effort only
+        logger.debug("Rate limiter unavailable for %s: %s", key, e)
+        return 0.0
+
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt token estimate (~4 chars/token) for tokens-per-minute budgeting."""
+    if isinstance(messages, str):
+        return len(messages) // 4 + 1
+    total = 0
+    for m in messages or []:
+        content = m.get("content") if isinstance(m, dict) else m
+        total += len(str(content or ""))
+    return total // 4 + 1
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import re
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(name: str) -> str:
+    """Lowercase, hyphen-separated ASCII slug (max 80 chars), e.g. "Grid Co." -> "grid-co"."""
+    s = (name or "").strip().lower()
+    # replace non-alphanumeric with hyphens
+    s = _NON_ALNUM.sub("-", s)
+    s = s.strip("-")
+    s = re.sub(r"-+", "-", s)
+    return s[:80]
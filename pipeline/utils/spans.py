@@ -0,0 +1,134 @@
+"""
+Nested timing spans for pipeline stages.
+
+Usage:
+    with trace("pipeline", model=model_id) as root:
+        with span("research"):
+            ...
+    record["spans"] = root.to_dict()
+    record["stage_ms"] = root.flatten()
+
+The active span lives in a context variable, so spans opened anywhere below a
+`trace()` (LLM calls, tool calls, JSON extraction) nest under the current stage.
+Spans opened outside any trace are still timed but not attached anywhere.
+Worker threads do not inherit context by default; submit jobs through
+`bind_context(fn)` to keep their spans under the submitting stage.
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_CURRENT: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("pipeline_span", default=None)
+
+
+class Span:
+    """One timed section with optional attributes and child spans."""
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs: Dict[str, Any] = {k: v for k, v in attrs.items() if v is not None}
+        self.children: List[Span] = []
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self._end if self._end is not None else time.perf_counter()
+        return (end - self._start) * 1000.0
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update({k: v for k, v in attrs.items() if v is not None})
+
+    def finish(self) -> None:
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def _add_child(self, child: "Span") -> None:
+        # Children may be appended from several worker threads at once
+        with self._lock:
+            self.children.append(child)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable tree; unfinished spans report elapsed time so far."""
+        out: Dict[str, Any] = {"name": self.name, "ms": round(self.duration_ms, 1)}
+        if self.attrs:
+            out["attrs"] = dict(self.attrs)
+        if self.error:
+            out["error"] = self.error
+        with self._lock:
+            children = list(self.children)
+        if children:
+            out["children"] = [c.to_dict() for c in children]
+        return out
+
+    def flatten(self, sep: str = "/") -> Dict[str, float]:
+        """Total ms per span path below this span, e.g. {"verify/url/llm": 8123.4}.
+
+        Repeated spans (one per URL, per LLM call, ...) are summed, so concurrent
+        stages can add up to more than wall-clock time.
+        """
+        totals: Dict[str, float] = {}
+
+        def _walk(s: Span, prefix: str) -> None:
+            with s._lock:
+                children = list(s.children)
+            for c in children:
+                path = f"{prefix}{sep}{c.name}" if prefix else c.name
+                totals[path] = totals.get(path, 0.0) + c.duration_ms
+                _walk(c, path)
+
+        _walk(self, "")
+        return {k: round(v, 1) for k, v in totals.items()}
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def _activate(s: Span) -> Iterator[Span]:
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = type(e).__name__
+        raise
+    finally:
+        s.finish()
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def trace(name: str, **attrs: Any) -> Iterator[Span]:
+    """Open a new root span, independent of any span already active."""
+    with _activate(Span(name, **attrs)) as root:
+        yield root
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a block as a child of the current span."""
+    s = Span(name, **attrs)
+    parent = _CURRENT.get()
+    if parent is not None:
+        parent._add_child(s)
+    with _activate(s):
+        yield s
+
+
+def bind_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap `fn` to run in a copy of the caller's context (for thread pools)."""
+    ctx = contextvars.copy_context()
+
+    def _run(*args: Any, **kwargs: Any) -> T:
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return _run
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import re
+from typing import List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Loose URL matcher for agent output; trailing punctuation is trimmed separately.
+_URL_RE = re.compile(r"https?://[^\s<>\"'`\]\[]+", re.IGNORECASE)
+_TRAILING = ".,;:!?)}'\""
+
+
+def extract_urls(text: str) -> List[str]:
+    """Return http(s) URLs found in free text, de-duplicated in first-seen order.
+
+    The research task is asked for one URL per line, but agents occasionally add
+    bullets, numbering or markdown links; this tolerates all of those.
+    """
+    urls: List[str] = []
+    seen: set[str] = set()
+    for m in _URL_RE.finditer(text or ""):
+        url = m.group(0).rstrip(_TRAILING)
+        # Markdown link syntax: [title](https://...) leaves a dangling '(' pair
+        if url.count("(") < url.count(")"):
+            url = url.rstrip(")")
+        if len(url) <= len("https://") or url in seen:
+            continue
+        seen.add(url)
+        urls.append(url)
+    return urls
+
+
+# Query parameters that never change page content; dropped from cache keys.
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for use as a cache/dedupe key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query string.
+    """
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
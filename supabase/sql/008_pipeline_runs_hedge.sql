@@ -0,0 +1,8 @@
+-- 008_pipeline_runs_hedge.sql
+-- Records the outcome of hedged model fallback (LLM_HEDGE=true) on the winning run.
+-- Shape: {"winner": text, "candidates": [text], "delay_ms": int, "delay_source": "env"|"p95"|"default"}
+
+alter table public.pipeline_runs
+  add column if not exists hedge jsonb;
+
+comment on column public.pipeline_runs.hedge is 'Hedged model fallback details (winner, started candidates, hedge delay) when hedging was enabled';
@@ -0,0 +1,11 @@
+-- 009_pipeline_runs_run_id.sql
+-- Links telemetry rows to pipeline run checkpoints (pipeline/.runs/<run_id>/).
+-- A resumed run reuses its run_id, so several rows may share one id.
+
+alter table public.pipeline_runs
+  add column if not exists run_id text;
+
+create index if not exists idx_pipeline_runs_run_id
+  on public.pipeline_runs (run_id);
+
+comment on column public.pipeline_runs.run_id is 'Pipeline run id (checkpoint directory name); shared by resumed attempts';
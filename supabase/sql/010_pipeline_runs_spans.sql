@@ -0,0 +1,56 @@
+-- 010_pipeline_runs_spans.sql
+-- Per-stage timing spans for pipeline runs.
+-- spans:    nested tree {"name", "ms", "attrs"?, "error"?, "children"?: [...]}
+-- stage_ms: flattened totals per span path, e.g. {"research": 41234.5, "verify/url/llm": 80312.0}
+
+alter table public.pipeline_runs
+  add column if not exists spans jsonb,
+  add column if not exists stage_ms jsonb;
+
+comment on column public.pipeline_runs.spans is 'Nested stage timing spans (research, verify, per-URL crews, LLM and tool calls, sanitize, validate, upsert)';
+comment on column public.pipeline_runs.stage_ms is 'Total milliseconds per span path, summed over repeated spans';
+
+-- Recreate the daily mview with per-stage averages (same grain and columns as 005, plus stage_avg_ms)
+DROP MATERIALIZED VIEW IF EXISTS public.pipeline_runs_daily;
+
+CREATE MATERIALIZED VIEW public.pipeline_runs_daily AS
+WITH base AS (
+  SELECT
+    date_trunc('day', ts)::date AS day,
+    model,
+    status,
+    count(*) AS runs,
+    sum(raw_count) AS raw_sum,
+    sum(validated_count) AS valid_sum,
+    avg(duration_ms)::numeric(12,2) AS duration_avg_ms
+  FROM public.pipeline_runs
+  GROUP BY 1,2,3
+),
+stages AS (
+  SELECT
+    date_trunc('day', r.ts)::date AS day,
+    r.model,
+    r.status,
+    s.key AS stage,
+    avg(s.value::numeric)::numeric(12,2) AS avg_ms
+  FROM public.pipeline_runs r
+  CROSS JOIN LATERAL jsonb_each_text(r.stage_ms) AS s(key, value)
+  WHERE r.stage_ms IS NOT NULL
+  GROUP BY 1,2,3,4
+)
+SELECT
+  b.*,
+  coalesce(
+    (SELECT jsonb_object_agg(st.stage, st.avg_ms)
+       FROM stages st
+      WHERE st.day = b.day AND st.model = b.model AND st.status = b.status),
+    '{}'::jsonb
+  ) AS stage_avg_ms
+FROM base b;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pipeline_runs_daily_unique
+  ON public.pipeline_runs_daily (day, model, status);
+
+GRANT SELECT ON public.pipeline_runs_daily TO authenticated;
+
+COMMENT ON MATERIALIZED VIEW public.pipeline_runs_daily IS 'Daily aggregated telemetry metrics for dashboards, including average ms per stage';
@@ -0,0 +1,65 @@
+-- 011_pipeline_runs_usage.sql
+-- LLM token usage and cost per run.
+-- usage: {"calls", "cached_calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd",
+--         "tokens_per_validated_event", "by_stage": {...}, "by_agent": {...}, "by_model": {...}}
+
+alter table public.pipeline_runs
+  add column if not exists usage jsonb,
+  add column if not exists prompt_tokens integer,
+  add column if not exists completion_tokens integer,
+  add column if not exists cost_usd numeric(12,6),
+  add column if not exists tokens_per_event numeric(12,2);
+
+comment on column public.pipeline_runs.usage is 'LLM usage breakdown per stage, agent (researcher, verifier, ...) and model';
+comment on column public.pipeline_runs.cost_usd is 'Estimated LLM cost in USD (LLM_PRICING or litellm prices); null when a model has no known price';
+comment on column public.pipeline_runs.tokens_per_event is 'Total LLM tokens divided by validated events';
+
+-- Recreate the daily mview with token and cost totals (same grain and columns as 010)
+DROP MATERIALIZED VIEW IF EXISTS public.pipeline_runs_daily;
+
+CREATE MATERIALIZED VIEW public.pipeline_runs_daily AS
+WITH base AS (
+  SELECT
+    date_trunc('day', ts)::date AS day,
+    model,
+    status,
+    count(*) AS runs,
+    sum(raw_count) AS raw_sum,
+    sum(validated_count) AS valid_sum,
+    avg(duration_ms)::numeric(12,2) AS duration_avg_ms,
+    sum(prompt_tokens) AS prompt_tokens_sum,
+    sum(completion_tokens) AS completion_tokens_sum,
+    sum(cost_usd)::numeric(12,6) AS cost_usd_sum,
+    (sum(coalesce(prompt_tokens, 0) + coalesce(completion_tokens, 0))
+      / nullif(sum(validated_count) FILTER (WHERE prompt_tokens IS NOT NULL), 0))::numeric(12,2) AS tokens_per_event
+  FROM public.pipeline_runs
+  GROUP BY 1,2,3
+),
+stages AS (
+  SELECT
+    date_trunc('day', r.ts)::date AS day,
+    r.model,
+    r.status,
+    s.key AS stage,
+    avg(s.value::numeric)::numeric(12,2) AS avg_ms
+  FROM public.pipeline_runs r
+  CROSS JOIN LATERAL jsonb_each_text(r.stage_ms) AS s(key, value)
+  WHERE r.stage_ms IS NOT NULL
+  GROUP BY 1,2,3,4
+)
+SELECT
+  b.*,
+  coalesce(
+    (SELECT jsonb_object_agg(st.stage, st.avg_ms)
+       FROM stages st
+      WHERE st.day = b.day AND st.model = b.model AND st.status = b.status),
+    '{}'::jsonb
+  ) AS stage_avg_ms
+FROM base b;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pipeline_runs_daily_unique
+  ON public.pipeline_runs_daily (day, model, status);
+
+GRANT SELECT ON public.pipeline_runs_daily TO authenticated;
+
+COMMENT ON MATERIALIZED VIEW public.pipeline_runs_daily IS 'Daily aggregated telemetry metrics for dashboards, including average ms per stage and LLM token/cost totals';
@@ -0,0 +1,22 @@
+-- 012_funding_events_sources.sql
+-- One row per funding round: reports of the same round from several outlets are merged
+-- by the pipeline (pipeline/utils/dedupe.py) and every report's URL is kept in `sources`.
+-- source_url stays the unique upsert key (the canonical report).
+
+alter table public.funding_events
+  add column if not exists sources text[];
+
+-- Rows written before this migration were reported by their source_url only
+update public.funding_events
+   set sources = array[source_url]
+ where sources is null and source_url is not null;
+
+-- Lookups like "which row covers this article?": where sources @> array['https://...']
+create index if not exists idx_funding_events_sources on public.funding_events using gin (sources);
+
+comment on column public.funding_events.sources is 'URLs of every report of this funding round; source_url is the canonical one';
+
+alter table public.pipeline_runs
+  add column if not exists merged_count integer;
+
+comment on column public.pipeline_runs.merged_count is 'Duplicate reports folded into another event by the dedupe stage';